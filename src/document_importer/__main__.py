@@ -1,9 +1,19 @@
 # Project main file
+import os
 import sys
 import argparse
+from itertools import chain
+from typing import Any, Iterable
+import asyncio
+from datetime import datetime
 from dotenv import load_dotenv, dotenv_values
 import logging
 from document_importer.importer import Importer
+from document_importer.file_discovery import FileDiscovery
+from document_importer.front_matter_validation import validate_files, print_validation_report
+from document_importer.multi_importer import MultiImporter, load_manifest
+from document_importer.git_changes import git_changes, read_change_list
+from document_importer.metrics import write_json_report, write_prometheus_textfile, export_opentelemetry
 
 
 def main(args: list = sys.argv) -> None:
@@ -14,11 +24,75 @@ def main(args: list = sys.argv) -> None:
     logging.info("-----------------Starting Script-----------------")
     # Parse the arguments
     parser = argparse.ArgumentParser()
-    parser.add_argument('-r', '--repository', help='The github repository name', required=True)
-    parser.add_argument('-d', '--directory', help='The directory of the markdown documents', required=True)
+    parser.add_argument('-r', '--repository', help='The github repository name')
+    parser.add_argument('-d', '--directory', help='The directory of the markdown documents')
+    parser.add_argument('-m', '--manifest',
+                        help='The YAML or JSON manifest of the repositories and directories imported together')
+    parser.add_argument('--parallel-repositories', type=int, default=4,
+                        help='The number of repositories of the manifest imported at the same time, default=4')
+    parser.add_argument('--max-files-in-flight', type=int, default=32,
+                        help='The number of files imported at the same time across the manifest, default=32')
     parser.add_argument('-l', '--loglevel', default='warning',
                         help='Provide logging level. Example --loglevel debug, default=warning')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='Only import new or changed markdown files and remove deleted ones')
+    parser.add_argument('--state-file', default='.import_state.json',
+                        help='The file storing the content hashes used by --incremental, default=.import_state.json')
+    parser.add_argument('--checkpoint', action='store_true',
+                        help='Record the progress of every file in a checkpoint journal so the import can be resumed')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume the import interrupted after its last checkpoint, implies --checkpoint')
+    parser.add_argument('--checkpoint-file', default='.import_checkpoint.sqlite',
+                        help='The SQLite checkpoint journal, default=.import_checkpoint.sqlite')
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument('--git-range', metavar='REVISIONS',
+                         help='Only import the markdown files changed in a git revision range, example HEAD~1..HEAD')
+    changes.add_argument('--changes-file', metavar='PATH',
+                         help='Only import the files of a git diff --name-status --relative list, - reads stdin')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='A glob pattern of the files to import, replacing DISCOVERY_INCLUDE, default=*.md')
+    parser.add_argument('--exclude', action='append', metavar='GLOB',
+                        help='A glob pattern of the files and directories to skip, added to DISCOVERY_EXCLUDE')
+    parser.add_argument('--modified-since', type=datetime.fromisoformat, metavar='DATETIME',
+                        help='Only import the files modified since this ISO 8601 date and time')
+    parser.add_argument('-u', '--upsert', action='store_true',
+                        help='Embed and upload only the added chunks of each file and delete only its removed chunks')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='The number of concurrent workers of each import stage, default=1 (sequential)')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='The number of processes parsing markdown files, default=0 (parse in the main process)')
+    parser.add_argument('--async', dest='asynchronous', action='store_true',
+                        help='Import with the asyncio engine, keeping hundreds of requests in flight from one thread')
+    parser.add_argument('--verify', action='store_true',
+                        help='Verify the chunk counts of every markdown file in the index after the import, '
+                             + 'exiting with status 1 when they differ')
+    parser.add_argument('--verify-only', action='store_true',
+                        help='Verify the chunk counts of every markdown file in the index without importing')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='Validate the frontmatter of the markdown files without importing them or connecting '
+                             + 'to any service, exiting with status 1 when one is invalid')
+    parser.add_argument('--validate-first', action='store_true',
+                        help='Validate the frontmatter of every markdown file before importing any, '
+                             + 'exiting with status 1 when one is invalid')
+    parser.add_argument('--validate-workers', type=int, default=os.cpu_count() or 1,
+                        help='The number of processes validating the frontmatter, default=the number of CPUs')
+    parser.add_argument('--report-json', help='The file the JSON run report with the import metrics is written to')
+    parser.add_argument('--report-prometheus',
+                        help='The .prom file the import metrics are written to, for the Prometheus textfile collector')
+    parser.add_argument('--report-opentelemetry', action='store_true',
+                        help='Record the import metrics with the OpenTelemetry meter provider (requires opentelemetry)')
     args = parser.parse_known_args(args)
+    if not args[0].manifest and not (args[0].directory and (args[0].repository or args[0].validate_only)):
+        parser.error("the following arguments are required: -r/--repository, -d/--directory (or -m/--manifest)")
+    if args[0].manifest and (args[0].git_range or args[0].changes_file):
+        parser.error("--git-range and --changes-file are set per repository in a manifest")
+    if args[0].manifest and (args[0].include or args[0].exclude or args[0].modified_since):
+        parser.error("--include, --exclude and --modified-since apply to one repository, "
+                     + "use the DISCOVERY_* settings with a manifest")
+    if args[0].manifest and args[0].verify_only:
+        parser.error("--verify-only verifies one repository, use --verify with a manifest")
+    if args[0].manifest and args[0].asynchronous:
+        parser.error("--async imports a single repository, not a manifest")
 
     logging.basicConfig(level=args[0].loglevel.upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     # Load the environment variables
@@ -28,9 +102,105 @@ def main(args: list = sys.argv) -> None:
     }
     print(f"Imported configuration of length: {len(config.keys())}")
     print(f"Args: {args}")
-    Importer(config, repository=args[0].repository, directory=args[0].directory).run()
+    checkpoint_path = args[0].checkpoint_file if args[0].checkpoint or args[0].resume else None
+    if args[0].manifest:
+        _import_manifest(config, args[0], checkpoint_path)
+        return
+    file_changes = None
+    if args[0].git_range:
+        file_changes = git_changes(args[0].directory, args[0].git_range)
+    elif args[0].changes_file == "-":
+        file_changes = read_change_list(sys.stdin, args[0].directory)
+    elif args[0].changes_file:
+        with open(args[0].changes_file, "r", encoding="utf-8") as changes_file:
+            file_changes = read_change_list(changes_file, args[0].directory)
+    if file_changes is not None:
+        print(f"Changes: {len(file_changes.changed)} changed and {len(file_changes.deleted)} deleted markdown files")
+    modified_after = args[0].modified_since.timestamp() if args[0].modified_since else None
+    discovery = FileDiscovery.from_config(config, include=args[0].include, exclude=args[0].exclude,
+                                          modified_after=modified_after)
+    if args[0].validate_only or args[0].validate_first:
+        # The validation pass has its own discovery, so the import does not count the skipped files twice
+        validation_discovery = FileDiscovery.from_config(config, include=args[0].include, exclude=args[0].exclude,
+                                                         modified_after=modified_after)
+        file_paths = (validation_discovery.filter_paths(args[0].directory, file_changes.changed)
+                      if file_changes is not None else validation_discovery.iter_files(args[0].directory))
+        _validate(file_paths, args[0])
+        if args[0].validate_only:
+            return
+    importer = Importer(config, repository=args[0].repository, directory=args[0].directory,
+                        incremental=args[0].incremental, state_path=args[0].state_file, workers=args[0].workers,
+                        parse_workers=args[0].parse_workers, upsert=args[0].upsert, changes=file_changes,
+                        checkpoint_path=checkpoint_path, resume=args[0].resume, discovery=discovery)
+    try:
+        if not args[0].verify_only:
+            if args[0].asynchronous:
+                asyncio.run(importer.arun())
+            else:
+                importer.run()
+        if args[0].verify or args[0].verify_only:
+            importer.verify()
+    finally:
+        labels = {"repository": args[0].repository}
+        if args[0].report_json:
+            write_json_report(args[0].report_json, importer.run_report())
+        if args[0].report_prometheus:
+            write_prometheus_textfile(args[0].report_prometheus, importer.metrics, labels=labels)
+        if args[0].report_opentelemetry:
+            export_opentelemetry(importer.metrics, attributes=labels)
 
     logging.info("-----------------Script Completed-----------------")
+    if importer.verification is not None and not importer.verification["consistent"]:
+        sys.exit(1)
+
+
+def _import_manifest(config: dict[str, Any], args: argparse.Namespace, checkpoint_path: str | None) -> None:
+    """
+    Imports the repositories of a manifest in one process with shared clients.
+    """
+    entries = load_manifest(args.manifest)
+    print(f"Manifest: {len(entries)} repositories")
+    if args.validate_only or args.validate_first:
+        discovery = FileDiscovery.from_config(config)
+        # Like the import, the repositories with a git range only validate their changed files
+        file_paths = (discovery.filter_paths(entry.directory, git_changes(entry.directory, entry.git_range).changed)
+                      if entry.git_range else discovery.iter_files(entry.directory) for entry in entries)
+        _validate(chain.from_iterable(file_paths), args)
+        if args.validate_only:
+            return
+    for entry in entries:
+        if args.upsert:
+            entry.upsert = True
+    multi_importer = MultiImporter(config, entries, parallel_repositories=args.parallel_repositories,
+                                   workers=args.workers, max_files_in_flight=args.max_files_in_flight,
+                                   incremental=args.incremental, state_path=args.state_file,
+                                   checkpoint_path=checkpoint_path, resume=args.resume, verify=args.verify)
+    try:
+        multi_importer.run()
+    finally:
+        if args.report_json:
+            write_json_report(args.report_json, multi_importer.run_report())
+        if args.report_prometheus:
+            write_prometheus_textfile(args.report_prometheus, multi_importer.shared.metrics)
+        if args.report_opentelemetry:
+            export_opentelemetry(multi_importer.shared.metrics)
+    logging.info("-----------------Script Completed-----------------")
+    if any(not (importer.verification or {}).get("consistent", True) for importer in multi_importer.importers.values()):
+        sys.exit(1)
+
+
+def _validate(file_paths: Iterable[str], args: argparse.Namespace) -> None:
+    """
+    Validates the frontmatter of markdown files before any client is created, and exits with status 1 when
+    one is invalid, writing the validation report to the JSON report file.
+    """
+    report = validate_files(file_paths, workers=args.validate_workers)
+    print_validation_report(report)
+    # The run report replaces the validation report when the import goes on
+    if args.report_json and (report["invalid"] > 0 or args.validate_only):
+        write_json_report(args.report_json, {"validation": report})
+    if report["invalid"] > 0:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+
+class AsyncBatcher:
+    """
+    A class that collects the items submitted by many coroutines into batched calls of up to max_items items
+    and max_weight total weight. A batch is sent as soon as it is full, or once the first of its items waited
+    for linger seconds, and every coroutine receives the results of its own items.
+    """
+
+    def __init__(self, function: Callable[[list[Any]], Awaitable[list[Any]]], max_items: int = 16,
+                 max_weight: float | None = None, weight: Callable[[Any], float] | None = None,
+                 linger: float = 0.01):
+        """
+        Initializes a new instance of the AsyncBatcher class.
+
+        Args:
+            function (Callable): The coroutine function processing a batch of items, returning one result per
+                item in the same order.
+            max_items (int, optional): The maximum number of items per batch. Defaults to 16.
+            max_weight (float, optional): The maximum total weight of a batch, unlimited when None.
+                Defaults to None.
+            weight (Callable, optional): The function computing the weight of an item. Defaults to None.
+            linger (float, optional): The time in seconds a batch waits for more items. Defaults to 0.01.
+        """
+        self.function = function
+        self.max_items: int = max_items
+        self.max_weight: float | None = max_weight
+        self.weight = weight
+        self.linger: float = linger
+        self.requests: int = 0
+        self.__pending: list[tuple[Any, asyncio.Future[Any]]] = []
+        self.__pending_weight: float = 0.0
+        self.__timer: asyncio.TimerHandle | None = None
+        self.__sending: set[asyncio.Task[None]] = set()
+
+    async def submit(self, items: list[Any]) -> list[Any]:
+        """
+        Adds items to the batches and waits for their results.
+
+        Args:
+            items (list): The items to process.
+
+        Returns:
+            list: The result of each item.
+
+        Raises:
+            Exception: The error of the first batch of the items that failed.
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            item_weight = self.weight(item) if self.weight is not None else 0.0
+            full = len(self.__pending) >= self.max_items
+            if self.max_weight is not None:
+                full = full or self.__pending_weight + item_weight > self.max_weight
+            if self.__pending and full:
+                self.__send_pending()
+            future = loop.create_future()
+            self.__pending.append((item, future))
+            self.__pending_weight += item_weight
+            futures.append(future)
+            if len(self.__pending) == 1:
+                self.__timer = loop.call_later(self.linger, self.__send_pending)
+        if len(self.__pending) >= self.max_items:
+            self.__send_pending()
+        # Every future is awaited, so the errors of the other batches of the items are retrieved too
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return list(results)
+
+    async def flush(self) -> None:
+        """
+        Sends the pending items and waits for all the batches in flight.
+        """
+        self.__send_pending()
+        if self.__sending:
+            await asyncio.gather(*self.__sending, return_exceptions=True)
+
+    def __send_pending(self) -> None:
+        """
+        Starts sending the pending items as one batch.
+        """
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        if not self.__pending:
+            return
+        batch = self.__pending
+        self.__pending = []
+        self.__pending_weight = 0.0
+        task = asyncio.get_running_loop().create_task(self.__send(batch))
+        self.__sending.add(task)
+        task.add_done_callback(self.__sending.discard)
+
+    async def __send(self, batch: list[tuple[Any, asyncio.Future[Any]]]) -> None:
+        """
+        Processes a batch and distributes the results, or the error, to the waiting coroutines.
+
+        Args:
+            batch (list): The items of the batch with their futures.
+        """
+        self.requests += 1
+        try:
+            results = await self.function([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Expected {len(batch)} results but received {len(results)}")
+        except Exception as e:
+            logging.debug(f"Async batch of {len(batch)} items failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
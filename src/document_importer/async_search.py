@@ -0,0 +1,67 @@
+# The aiohttp and azure aio modules are only needed by the async import path, they are imported on first use
+import logging
+from typing import TYPE_CHECKING, Any
+from azure.core.credentials import AzureKeyCredential
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class AsyncSearchSession:
+    """
+    A pooled aiohttp session shared by the async Azure AI Search clients of an import, so hundreds of concurrent
+    requests reuse the same connections. The session is bound to the event loop it was first used in, it is
+    created again after it was closed.
+    """
+
+    def __init__(self, endpoint: str, key: str, connection_limit: int = 100):
+        """
+        Initializes a new instance of the AsyncSearchSession class.
+
+        Args:
+            endpoint (str): The Azure AI Search endpoint.
+            key (str): The Azure AI Search key.
+            connection_limit (int, optional): The maximum number of open connections. Defaults to 100.
+        """
+        self.endpoint: str = endpoint
+        self.credential: AzureKeyCredential = AzureKeyCredential(key)
+        self.connection_limit: int = connection_limit
+        self.__session: "aiohttp.ClientSession | None" = None
+        self.__clients: dict[str, Any] = {}
+
+    def search_client(self, index_name: str) -> Any:
+        """
+        Returns the async search client of an index, created on first use. Must be called in the running
+        event loop.
+
+        Args:
+            index_name (str): The name of the index.
+
+        Returns:
+            azure.search.documents.aio.SearchClient: The async search client.
+        """
+        client = self.__clients.get(index_name)
+        if client is None:
+            import aiohttp
+            from azure.core.pipeline.transport import AioHttpTransport
+            from azure.search.documents.aio import SearchClient as AsyncSearchClient
+
+            if self.__session is None:
+                self.__session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connection_limit))
+                logging.info(f"Async search session opened: {self.endpoint} (max connections: "
+                             + f"{self.connection_limit})")
+            client = AsyncSearchClient(self.endpoint, index_name, self.credential,
+                                       transport=AioHttpTransport(session=self.__session, session_owner=False))
+            self.__clients[index_name] = client
+        return client
+
+    async def close(self) -> None:
+        """
+        Closes the search clients and the pooled session.
+        """
+        for client in self.__clients.values():
+            await client.close()
+        self.__clients = {}
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
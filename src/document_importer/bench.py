@@ -0,0 +1,233 @@
+# Benchmark of the importer against local stand-ins for Azure OpenAI and Azure AI Search
+import sys
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Any
+from document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from document_importer.importer import Importer
+from document_importer.metrics import percentile
+
+WORDS = ("azure", "search", "vector", "index", "document", "markdown", "chunk", "embedding", "import", "query",
+         "service", "pipeline", "latency", "throughput", "batch", "token", "model", "content", "metadata", "source")
+
+
+def generate_corpus(directory: str, files: int, sections: int = 4, paragraphs: int = 3, words: int = 80,
+                    invalid_rate: float = 0.0, seed: int = 0) -> list[str]:
+    """
+    Generates synthetic markdown documents with valid frontmatter, spread over subdirectories of 100 files.
+
+    Args:
+        directory (str): The directory of the corpus.
+        files (int): The number of documents.
+        sections (int, optional): The number of top level sections per document. Defaults to 4.
+        paragraphs (int, optional): The number of paragraphs per section. Defaults to 3.
+        words (int, optional): The number of words per paragraph. Defaults to 80.
+        invalid_rate (float, optional): The fraction of documents without frontmatter. Defaults to 0.0.
+        seed (int, optional): The seed of the generator, the same seed generates the same corpus. Defaults to 0.
+
+    Returns:
+        list[str]: The paths of the generated documents.
+    """
+    generator = random.Random(seed)
+    paths = []
+    for number in range(files):
+        folder = os.path.join(directory, f"part_{number // 100:04d}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"document_{number:06d}.md")
+        lines = []
+        if generator.random() >= invalid_rate:
+            lines += ["---", f"title: Document {number}", f"summary: Synthetic benchmark document {number}",
+                      f"uri: https://example.com/documents/{number}", "authors:", "  - benchmark", "---", ""]
+        for section in range(sections):
+            lines += [f"# Section {section + 1}", ""]
+            for paragraph in range(paragraphs):
+                if paragraph % 2 == 1:
+                    lines += [f"## Topic {section + 1}.{paragraph + 1}", ""]
+                lines += [" ".join(generator.choice(WORDS) for _ in range(words)) + ".", ""]
+        with open(path, "w", encoding="utf-8") as markdown_file:
+            markdown_file.write("\n".join(lines))
+        paths.append(path)
+    return paths
+
+
+def peak_rss_mb() -> dict[str, float]:
+    """
+    Reads the peak resident set size of the process and of its terminated children, such as parse workers.
+
+    Returns:
+        dict: The peak RSS in megabytes of the process and of its children, empty if it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError:
+        return {}
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit,
+    }
+
+
+def run_benchmark(directory: str, embedding_service: FakeEmbeddingService, search_service: FakeSearchService,
+                  workers: int = 1, parse_workers: int = 0, upsert: bool = False,
+                  settings: dict[str, str] | None = None, asynchronous: bool = False) -> dict[str, Any]:
+    """
+    Imports a corpus into the fake services and measures the throughput of the importer.
+
+    Args:
+        directory (str): The directory of the markdown documents.
+        embedding_service (FakeEmbeddingService): The running embedding service.
+        search_service (FakeSearchService): The running search service.
+        workers (int, optional): The number of concurrent workers of each import stage. Defaults to 1.
+        parse_workers (int, optional): The number of processes parsing markdown files. Defaults to 0.
+        upsert (bool, optional): Import with chunk diffs instead of replacing all chunks. Defaults to False.
+        settings (dict, optional): Configuration settings overriding the defaults. Defaults to None.
+        asynchronous (bool, optional): Import with the asyncio engine instead of the threaded pipeline.
+            Defaults to False.
+
+    Returns:
+        dict: The benchmark report.
+    """
+    config = {
+        "AZURE_OPENAI_ENDPOINT": embedding_service.url,
+        "AZURE_OPENAI_API_KEY": "benchmark",
+        "AZURE_OPENAI_API_VERSION": "2024-02-01",
+        "AZURE_DEPLOYMENT": "benchmark",
+        "VECTOR_STORE_ADDRESS": search_service.url,
+        "VECTOR_STORE_PASSWORD": "benchmark",
+        "INDEX_NAME": "benchmark",
+        "EMBEDDING_DIMENSIONS": str(embedding_service.dimensions),
+        **(settings or {}),
+    }
+    importer = Importer(config, repository="benchmark/corpus", directory=directory,
+                        workers=workers, parse_workers=parse_workers, upsert=upsert)
+    embedding_requests, search_requests = embedding_service.requests, search_service.requests
+    start = time.perf_counter()
+    if asynchronous:
+        asyncio.run(importer.arun())
+    else:
+        importer.run()
+    seconds = time.perf_counter() - start
+    stages = {
+        name: {
+            "count": len(durations),
+            "p50_ms": percentile(durations, 0.50) * 1000,
+            "p99_ms": percentile(durations, 0.99) * 1000,
+        }
+        for name, durations in (importer.pipeline.durations if importer.pipeline is not None
+                                else importer.async_durations).items()
+    }
+    return {
+        "files": importer.total_files,
+        "succeeded": len(importer.succeed_files),
+        "failed": len(importer.failed_files),
+        "chunks": importer.total_chunks,
+        "seconds": seconds,
+        "files_per_second": importer.total_files / seconds if seconds > 0 else 0.0,
+        "chunks_per_second": importer.total_chunks / seconds if seconds > 0 else 0.0,
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb(),
+        "embedding_service": {"requests": embedding_service.requests - embedding_requests,
+                              "throttled": embedding_service.throttled, "failed": embedding_service.failed},
+        "search_service": {"requests": search_service.requests - search_requests,
+                           "throttled": search_service.throttled, "failed": search_service.failed},
+        "metrics": importer.metrics.snapshot(),
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    """
+    Prints a benchmark report.
+
+    Args:
+        report (dict): The benchmark report.
+    """
+    print(f"Imported {report['succeeded']}/{report['files']} files ({report['failed']} failed) "
+          + f"and {report['chunks']} chunks in {report['seconds']:.2f}s")
+    print(f"Throughput: {report['files_per_second']:.1f} files/s, {report['chunks_per_second']:.1f} chunks/s")
+    for name, stage in report["stages"].items():
+        print(f"Stage {name}: {stage['count']} tasks, p50 {stage['p50_ms']:.1f}ms, p99 {stage['p99_ms']:.1f}ms")
+    if report["peak_rss_mb"]:
+        print(f"Peak RSS: {report['peak_rss_mb']['self']:.1f}MB "
+              + f"(child processes: {report['peak_rss_mb']['children']:.1f}MB)")
+    for name in ("embedding_service", "search_service"):
+        service = report[name]
+        print(f"{name.replace('_', ' ').capitalize()}: {service['requests']} requests, "
+              + f"{service['throttled']} throttled, {service['failed']} failed")
+
+
+def main(args: list[str] = sys.argv) -> None:
+    """
+    Main function that generates a synthetic corpus and benchmarks its import against local fake services.
+    """
+    parser = argparse.ArgumentParser(prog="python -m document_importer.bench")
+    parser.add_argument('--files', type=int, default=200, help='The number of generated documents, default=200')
+    parser.add_argument('--sections', type=int, default=4, help='The number of sections per document, default=4')
+    parser.add_argument('--paragraphs', type=int, default=3,
+                        help='The number of paragraphs per section, default=3')
+    parser.add_argument('--words', type=int, default=80, help='The number of words per paragraph, default=80')
+    parser.add_argument('--invalid-rate', type=float, default=0.0,
+                        help='The fraction of documents generated without frontmatter, default=0')
+    parser.add_argument('--corpus', help='The directory of the corpus, default=a temporary directory')
+    parser.add_argument('--seed', type=int, default=0, help='The seed of the corpus and failures, default=0')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='The number of concurrent workers of each import stage, default=1 (sequential)')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='The number of processes parsing markdown files, default=0 (parse in the main process)')
+    parser.add_argument('--upsert', action='store_true',
+                        help='Import with chunk diffs instead of replacing all chunks of each file')
+    parser.add_argument('--async', dest='asynchronous', action='store_true',
+                        help='Import with the asyncio engine instead of the threaded pipeline')
+    parser.add_argument('--dimensions', type=int, default=1536,
+                        help='The number of dimensions of the fake embeddings, default=1536')
+    for service in ("embedding", "search"):
+        parser.add_argument(f'--{service}-latency-ms', type=float, default=20.0,
+                            help=f'The latency of every {service} request in milliseconds, default=20')
+        parser.add_argument(f'--{service}-rpm', type=float,
+                            help=f'The requests per minute limit of the {service} service, default=unlimited')
+        parser.add_argument(f'--{service}-failure-rate', type=float, default=0.0,
+                            help=f'The fraction of {service} requests failing with 503, default=0')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='A configuration setting of the importer, for example --set UPLOAD_BATCH_SIZE=500')
+    parser.add_argument('--json', help='The file the JSON report is written to')
+    parser.add_argument('-l', '--loglevel', default='warning',
+                        help='Provide logging level. Example --loglevel debug, default=warning')
+    options = parser.parse_known_args(args[1:])[0]
+
+    logging.basicConfig(level=options.loglevel.upper(),
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    settings = dict(setting.split("=", 1) for setting in options.set)
+
+    with tempfile.TemporaryDirectory(prefix="document_importer_bench_") as temporary_directory:
+        directory = options.corpus or temporary_directory
+        if not os.path.isdir(directory) or not os.listdir(directory):
+            print(f"Generating {options.files} documents in {directory}...")
+            generate_corpus(directory, options.files, sections=options.sections, paragraphs=options.paragraphs,
+                            words=options.words, invalid_rate=options.invalid_rate, seed=options.seed)
+        embedding_service = FakeEmbeddingService(
+            dimensions=options.dimensions, latency=options.embedding_latency_ms / 1000,
+            requests_per_minute=options.embedding_rpm, failure_rate=options.embedding_failure_rate,
+            seed=options.seed)
+        search_service = FakeSearchService(
+            latency=options.search_latency_ms / 1000, requests_per_minute=options.search_rpm,
+            failure_rate=options.search_failure_rate, seed=options.seed)
+        with embedding_service, search_service:
+            report = run_benchmark(directory, embedding_service, search_service,
+                                   workers=options.workers, parse_workers=options.parse_workers, upsert=options.upsert,
+                                   settings=settings, asynchronous=options.asynchronous)
+
+    print_report(report)
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
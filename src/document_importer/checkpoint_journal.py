@@ -0,0 +1,237 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Callable
+from document_importer.pipeline import BatchingStage, FileTask
+
+# The stages recorded for a file, in the order a file goes through them
+STAGES = ("parsed", "cleaned", "diffed", "embedded", "uploaded")
+
+
+class CheckpointJournal:
+    """
+    A durable SQLite journal of the progress of an import, so an interrupted import can be resumed. It records
+    the last stage every file completed, with the content hash and chunking parameters it was imported with,
+    and the vectors of the embedded chunks of the files that are not uploaded yet.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes a new instance of the CheckpointJournal class.
+
+        Args:
+            path (str): The path to the SQLite database file.
+        """
+        self.path: str = path
+        self.__lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        # Every checkpoint is committed, the write-ahead log keeps these small commits cheap
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "repository TEXT NOT NULL, source TEXT NOT NULL, hash TEXT NOT NULL, chunk_size INTEGER NOT NULL, "
+            "chunk_overlap INTEGER NOT NULL, stage TEXT NOT NULL, updated_at REAL NOT NULL, tokenizer TEXT, "
+            "PRIMARY KEY (repository, source))"
+        )
+        # Journals created before the tokenizer was recorded get the column, their rows keep a NULL tokenizer
+        # that matches no import, as they do not say how their chunks were measured
+        columns = [row[1] for row in self.__connection.execute("PRAGMA table_info(files)")]
+        if "tokenizer" not in columns:
+            self.__connection.execute("ALTER TABLE files ADD COLUMN tokenizer TEXT")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "repository TEXT NOT NULL, source TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (repository, source, hash))"
+        )
+        self.__connection.commit()
+        logging.info(f"Checkpoint journal opened: {path}")
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """
+        Computes the key of the vector of a chunk.
+
+        Args:
+            text (str): The content of the chunk.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest of the content.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def record(self, repository: str, source: str, file_hash: str, chunk_size: int, chunk_overlap: int,
+               stage: str, texts: list[str] | None = None, vectors: list[list[float] | None] | None = None,
+               tokenizer: str | None = None) -> None:
+        """
+        Records the last stage a file completed. The vectors of an embedded file are stored with the stage in
+        the same transaction, and dropped once the file is uploaded.
+
+        Args:
+            repository (str): The repository name.
+            source (str): The source path of the markdown document.
+            file_hash (str): The hash of the content of the file.
+            chunk_size (int): The chunk size used for the import.
+            chunk_overlap (int): The chunk overlap used for the import.
+            stage (str): The completed stage, one of STAGES.
+            texts (list[str], optional): The content of the chunks of the file. Defaults to None.
+            vectors (list, optional): The vector of each chunk, None for chunks that were not embedded.
+                Defaults to None.
+            tokenizer (str, optional): The tokenizer measuring the chunks, None for characters. Defaults to None.
+
+        Raises:
+            ValueError: If the stage is unknown.
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown checkpoint stage {stage}, expected one of {', '.join(STAGES)}")
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO files (repository, source, hash, chunk_size, chunk_overlap, stage, "
+                "updated_at, tokenizer) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (repository, source, file_hash, chunk_size, chunk_overlap, stage, time.time(), tokenizer or ""),
+            )
+            if stage == "uploaded":
+                self.__connection.execute("DELETE FROM vectors WHERE repository = ? AND source = ?",
+                                          (repository, source))
+            elif texts is not None and vectors is not None:
+                self.__connection.executemany(
+                    "INSERT OR REPLACE INTO vectors (repository, source, hash, vector) VALUES (?, ?, ?, ?)",
+                    [(repository, source, self.hash_text(text), array("f", vector).tobytes())
+                     for text, vector in zip(texts, vectors) if vector is not None],
+                )
+            self.__connection.commit()
+
+    def stage(self, repository: str, source: str, file_hash: str, chunk_size: int, chunk_overlap: int,
+              tokenizer: str | None = None) -> str | None:
+        """
+        Looks up the last stage a file completed with the same content and chunking parameters.
+
+        Args:
+            repository (str): The repository name.
+            source (str): The source path of the markdown document.
+            file_hash (str): The hash of the current content of the file.
+            chunk_size (int): The chunk size used for the import.
+            chunk_overlap (int): The chunk overlap used for the import.
+            tokenizer (str, optional): The tokenizer measuring the chunks, None for characters. Defaults to None.
+
+        Returns:
+            str | None: The last completed stage, or None if the file was not journaled or has changed since.
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT stage FROM files WHERE repository = ? AND source = ? AND hash = ? AND chunk_size = ? "
+                "AND chunk_overlap = ? AND tokenizer = ?",
+                (repository, source, file_hash, chunk_size, chunk_overlap, tokenizer or ""),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_vectors(self, repository: str, source: str, texts: list[str]) -> list[list[float] | None]:
+        """
+        Looks up the journaled vectors of the chunks of a file.
+
+        Args:
+            repository (str): The repository name.
+            source (str): The source path of the markdown document.
+            texts (list[str]): The content of the chunks of the file.
+
+        Returns:
+            list: The journaled vector of each chunk, or None for chunks that were not embedded.
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT hash, vector FROM vectors WHERE repository = ? AND source = ?", (repository, source)
+            ).fetchall()
+        found = {text_hash: vector for text_hash, vector in rows}
+        results = []
+        for text in texts:
+            vector = found.get(self.hash_text(text))
+            results.append(array("f", vector).tolist() if vector is not None else None)
+        return results
+
+    def clear(self, repository: str) -> None:
+        """
+        Removes the checkpoints of a repository, once its import completed or before a new import starts.
+
+        Args:
+            repository (str): The repository name.
+        """
+        with self.__lock:
+            self.__connection.execute("DELETE FROM files WHERE repository = ?", (repository,))
+            self.__connection.execute("DELETE FROM vectors WHERE repository = ?", (repository,))
+            self.__connection.commit()
+        logging.info(f"Checkpoints of {repository} cleared from {self.path}")
+
+    def __len__(self) -> int:
+        with self.__lock:
+            count: int = self.__connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            return count
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+
+class CheckpointStage(BatchingStage):
+    """
+    A batching stage that records a checkpoint for every file the wrapped batching stage completed.
+    """
+
+    def __init__(self, stage: BatchingStage, checkpoint: Callable[[FileTask], None]):
+        """
+        Initializes a new instance of the CheckpointStage class.
+
+        Args:
+            stage (BatchingStage): The wrapped batching stage.
+            checkpoint (Callable): The function recording the checkpoint of a completed file.
+        """
+        self.stage: BatchingStage = stage
+        self.checkpoint = checkpoint
+
+    def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Adds a task to the wrapped stage.
+
+        Args:
+            task (FileTask): The task to add.
+
+        Returns:
+            list: The tasks that finished processing.
+        """
+        return self.__record(self.stage.add(task))
+
+    def flush(self) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Flushes the wrapped stage.
+
+        Returns:
+            list: The tasks that finished processing.
+        """
+        return self.__record(self.stage.flush())
+
+    def __record(self, finished: list[tuple[FileTask, Exception | None]]) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Records the checkpoint of the tasks that succeeded. A checkpoint that cannot be written does not fail
+        the file, it is only imported again from the start when the import is resumed.
+
+        Args:
+            finished (list): The tasks that finished processing.
+
+        Returns:
+            list: The same tasks.
+        """
+        for task, error in finished:
+            if error is None:
+                try:
+                    self.checkpoint(task)
+                except Exception as e:
+                    logging.warning(f"Failed to record the checkpoint of {task.file_path}: {str(e)}")
+        return finished
@@ -0,0 +1,92 @@
+import base64
+import hashlib
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+from document_importer.chunk_record import deserialize_metadata
+
+# Metadata keys that change on every import and are not compared when diffing chunks
+VOLATILE_METADATA_KEYS = {"last_update"}
+# Metadata keys of the chunks uploaded by older imports and no longer uploaded, path repeated the source
+LEGACY_METADATA_KEYS = {"path"}
+
+
+@dataclass
+class ChunkDiff:
+    """
+    The difference between the chunks of a parsed file and the chunks of the same file already in the index.
+    """
+    keys: list[str] = field(default_factory=list)
+    added: list[int] = field(default_factory=list)
+    updated: list[int] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def chunk_keys(page_contents: list[str], page_metadatas: list[dict[str, Any]]) -> list[str]:
+    """
+    Computes the document keys of chunks from their repository, source and content, so an unchanged chunk
+    keeps its key between imports. Identical chunks of the same file are told apart by their occurrence.
+
+    Args:
+        page_contents (list[str]): The text of each chunk.
+        page_metadatas (list[dict]): The metadata of each chunk, with its repository and source.
+
+    Returns:
+        list[str]: The URL-safe base64 key of each chunk.
+    """
+    occurrences: dict[tuple[str, str, str], int] = {}
+    keys = []
+    for content, metadata in zip(page_contents, page_metadatas):
+        identity = (metadata.get("repository") or "", metadata.get("source") or "", content)
+        occurrence = occurrences.get(identity, 0)
+        occurrences[identity] = occurrence + 1
+        digest = hashlib.sha256("\0".join([*identity, str(occurrence)]).encode("utf-8")).digest()
+        keys.append(base64.urlsafe_b64encode(digest).decode("ascii"))
+    return keys
+
+
+def comparable_metadata(metadata: Mapping[str, Any] | str | None) -> dict[str, Any]:
+    """
+    Normalizes chunk metadata, or its JSON form stored in the index, for comparison.
+
+    Args:
+        metadata (Mapping | str | None): The metadata.
+
+    Returns:
+        dict: The metadata as decoded from JSON, without the keys that change on every import.
+    """
+    if metadata is None:
+        return {}
+    decoded = json.loads(metadata) if isinstance(metadata, str) else json.loads(json.dumps(dict(metadata)))
+    return {key: value for key, value in decoded.items()
+            if key not in VOLATILE_METADATA_KEYS and key not in LEGACY_METADATA_KEYS}
+
+
+def diff_chunks(page_contents: list[str], page_metadatas: list[dict[str, Any]],
+                indexed: list[dict[str, Any]]) -> ChunkDiff:
+    """
+    Compares the chunks of a parsed file with its chunks in the index.
+
+    Args:
+        page_contents (list[str]): The text of each parsed chunk.
+        page_metadatas (list[dict]): The metadata of each parsed chunk.
+        indexed (list[dict]): The id, metadata and FIELD_KEYS fields of the chunks of the file in the index.
+
+    Returns:
+        ChunkDiff: The chunks to embed and upload, the chunks whose metadata must be merged, and the keys of
+            the indexed chunks to delete.
+    """
+    diff = ChunkDiff(keys=chunk_keys(page_contents, page_metadatas))
+    indexed_metadata = {chunk["id"]: deserialize_metadata(chunk) for chunk in indexed}
+    for index, (key, metadata) in enumerate(zip(diff.keys, page_metadatas)):
+        if key not in indexed_metadata:
+            diff.added.append(index)
+        elif comparable_metadata(indexed_metadata[key]) != comparable_metadata(metadata):
+            diff.updated.append(index)
+        else:
+            diff.unchanged += 1
+    current_keys = set(diff.keys)
+    diff.removed = [key for key in indexed_metadata if key not in current_keys]
+    return diff
@@ -0,0 +1,86 @@
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+# Metadata keys that are the same for every chunk of a document, in the order they are serialized
+HEADER_KEYS = ("title", "source", "uri", "repository", "summary", "authors", "last_update")
+# Metadata keys of each chunk, token_count is only set when the chunks are measured in tokens
+CHUNK_KEYS = ("heading", "chunk_number", "token_count")
+# Header keys stored in their own index fields, left out of the metadata field and restored from the fields on read
+FIELD_KEYS = ("title", "source", "uri", "repository", "summary", "last_update")
+
+
+@dataclass(slots=True, frozen=True)
+class ChunkHeader:
+    """
+    The metadata shared by every chunk of a markdown document, stored once per document.
+    """
+    title: Any
+    source: str
+    uri: Any
+    repository: str
+    summary: Any
+    authors: Any
+    last_update: str
+
+
+@dataclass(slots=True, eq=False)
+class ChunkMetadata(Mapping[str, Any]):
+    """
+    The metadata of a chunk, pointing to the header of its document. It reads like the metadata dictionary of
+    the chunk and is only expanded into one, with dict(metadata), when it is serialized.
+    """
+    header: ChunkHeader
+    heading: dict[str, str]
+    chunk_number: int
+    token_count: int | None = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key in HEADER_KEYS:
+            return getattr(self.header, key)
+        if key in CHUNK_KEYS and (key != "token_count" or self.token_count is not None):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from HEADER_KEYS
+        yield "heading"
+        yield "chunk_number"
+        if self.token_count is not None:
+            yield "token_count"
+
+    def __len__(self) -> int:
+        return len(HEADER_KEYS) + (3 if self.token_count is not None else 2)
+
+
+def serialize_metadata(metadata: Mapping[str, Any]) -> str:
+    """
+    Serializes the metadata of a chunk into the compact JSON string stored in the metadata field of the index.
+    The keys stored in their own index fields are left out.
+
+    Args:
+        metadata (Mapping): The metadata of the chunk.
+
+    Returns:
+        str: The JSON string, without whitespace between the separators.
+    """
+    return json.dumps({key: value for key, value in metadata.items() if key not in FIELD_KEYS},
+                      separators=(",", ":"))
+
+
+def deserialize_metadata(document: Mapping[str, Any], metadata_field: str = "metadata") -> dict[str, Any]:
+    """
+    Rebuilds the metadata of a chunk from an indexed document, merging its metadata field with the keys stored
+    in their own fields. Documents uploaded by older imports also hold these keys in their metadata field.
+
+    Args:
+        document (Mapping): The fields of the indexed document.
+        metadata_field (str, optional): The name of the metadata field. Defaults to "metadata".
+
+    Returns:
+        dict: The metadata of the chunk.
+    """
+    metadata: dict[str, Any] = json.loads(document.get(metadata_field) or "{}")
+    metadata.update({key: document[key] for key in FIELD_KEYS if key in document})
+    return metadata
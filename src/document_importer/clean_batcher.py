@@ -0,0 +1,78 @@
+import logging
+import threading
+from typing import Callable
+from document_importer.pipeline import BatchingStage, FileTask
+
+
+class CleanBatcher(BatchingStage):
+    """
+    A class that collects parsed files and removes their previously imported chunks from the index with one
+    bulk clean per batch_size files.
+    """
+
+    def __init__(self, clean: Callable[[list[str]], dict[str, bool]], batch_size: int = 100):
+        """
+        Initializes a new instance of the CleanBatcher class.
+
+        Args:
+            clean (Callable): The bulk clean function, called with a list of sources and returning True for
+                each source that was cleaned successfully.
+            batch_size (int, optional): The number of files collected before cleaning. Defaults to 100.
+        """
+        self.clean = clean
+        self.batch_size: int = batch_size
+        self.succeeded: int = 0
+        self.__lock = threading.Lock()
+        self.__pending: list[FileTask] = []
+
+    def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Queues a parsed file and cleans the pending files once the batch is full.
+
+        Args:
+            task (FileTask): The parsed file.
+
+        Returns:
+            list: The files that were cleaned, or that failed.
+        """
+        with self.__lock:
+            self.__pending.append(task)
+            if len(self.__pending) < self.batch_size:
+                return []
+            tasks = self.__pending
+            self.__pending = []
+        return self.__clean_tasks(tasks)
+
+    def flush(self) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Cleans the files still waiting for a clean.
+
+        Returns:
+            list: The files that were cleaned, or that failed.
+        """
+        with self.__lock:
+            tasks = self.__pending
+            self.__pending = []
+        if not tasks:
+            return []
+        return self.__clean_tasks(tasks)
+
+    def __clean_tasks(self, tasks: list[FileTask]) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Cleans the chunks of several files with one bulk clean.
+
+        Args:
+            tasks (list): The files to clean.
+
+        Returns:
+            list: The files that were cleaned, or that failed.
+        """
+        logging.debug(f"Cleaning {len(tasks)} files...")
+        try:
+            cleaned = self.clean([task.file_path for task in tasks])
+            succeeded = sum(1 for task in tasks if cleaned.get(task.file_path))
+        except Exception as e:
+            return [(task, e) for task in tasks]
+        with self.__lock:
+            self.succeeded += succeeded
+        return [(task, None) for task in tasks]
@@ -0,0 +1,102 @@
+import logging
+import threading
+from typing import Any, Callable
+from document_importer.chunk_diff import diff_chunks
+from document_importer.pipeline import BatchingStage, FileTask
+
+
+class DiffBatcher(BatchingStage):
+    """
+    A class that collects parsed files, looks their indexed chunks up with one bulk query per batch_size files,
+    and attaches to each file the difference between its parsed and indexed chunks.
+    """
+
+    def __init__(self, lookup: Callable[[list[str]], dict[str, list[dict[str, Any]]]], batch_size: int = 100):
+        """
+        Initializes a new instance of the DiffBatcher class.
+
+        Args:
+            lookup (Callable): The bulk lookup function, called with a list of sources and returning the id and
+                metadata fields of the indexed chunks of each source.
+            batch_size (int, optional): The number of files collected before looking them up. Defaults to 100.
+        """
+        self.lookup = lookup
+        self.batch_size: int = batch_size
+        self.added: int = 0
+        self.updated: int = 0
+        self.removed: int = 0
+        self.unchanged: int = 0
+        self.__lock = threading.Lock()
+        self.__pending: list[FileTask] = []
+
+    def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Queues a parsed file and diffs the pending files once the batch is full.
+
+        Args:
+            task (FileTask): The parsed file.
+
+        Returns:
+            list: The files that were diffed, or that failed.
+        """
+        with self.__lock:
+            self.__pending.append(task)
+            if len(self.__pending) < self.batch_size:
+                return []
+            tasks = self.__pending
+            self.__pending = []
+        return self.__diff_tasks(tasks)
+
+    def flush(self) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Diffs the files still waiting for a lookup.
+
+        Returns:
+            list: The files that were diffed, or that failed.
+        """
+        with self.__lock:
+            tasks = self.__pending
+            self.__pending = []
+        if not tasks:
+            return []
+        return self.__diff_tasks(tasks)
+
+    def __diff_tasks(self, tasks: list[FileTask]) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Looks the indexed chunks of several files up with one bulk query and diffs each file.
+
+        Args:
+            tasks (list): The files to diff.
+
+        Returns:
+            list: The files that were diffed, or that failed.
+        """
+        logging.debug(f"Looking up the indexed chunks of {len(tasks)} files...")
+        try:
+            indexed = self.lookup([task.file_path for task in tasks])
+        except Exception as e:
+            return [(task, e) for task in tasks]
+        finished: list[tuple[FileTask, Exception | None]] = []
+        for task in tasks:
+            try:
+                self.diff_task(task, indexed.get(task.file_path, []))
+            except Exception as e:
+                finished.append((task, e))
+                continue
+            finished.append((task, None))
+        return finished
+
+    def diff_task(self, task: FileTask, indexed: list[dict[str, Any]]) -> None:
+        """
+        Diffs the chunks of a file with its indexed chunks and counts the changes.
+
+        Args:
+            task (FileTask): The parsed file.
+            indexed (list[dict]): The indexed chunks of the file.
+        """
+        task.chunk_diff = diff_chunks(task.page_contents, task.page_metadatas, indexed)
+        with self.__lock:
+            self.added += len(task.chunk_diff.added)
+            self.updated += len(task.chunk_diff.updated)
+            self.removed += len(task.chunk_diff.removed)
+            self.unchanged += task.chunk_diff.unchanged
@@ -1,29 +1,62 @@
-from ast import Dict, List
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError
 from azure.search.documents import SearchClient, SearchItemPaged
 from azure.search.documents.indexes import SearchIndexClient
 import logging
+from typing import Any
+from document_importer.async_search import AsyncSearchSession
+from document_importer.local_vector_store import LocalVectorStore
+from document_importer.metrics import Metrics
+from document_importer.rate_limiter import RateLimiter
 
 
 class DocumentManager:
     """
     A class that manages documents and provides methods for retrieving and cleaning them.
     """
-    def __init__(self, config):
+    # Maximum number of results returned by a single search request
+    PAGE_SIZE: int = 1000
+    # Number of sources looked up by a single filtered search
+    SOURCES_PER_QUERY: int = 100
+    # Maximum number of values counted by a single facet query
+    FACET_LIMIT: int = 100000
+
+    def __init__(self, config, rate_limiter: RateLimiter | None = None, metrics: Metrics | None = None,
+                 local_store: LocalVectorStore | None = None, async_session: AsyncSearchSession | None = None):
         """
         Initializes a new instance of the DocumentManager class.
 
         Args:
             config: A dictionary containing configuration settings.
+            rate_limiter: The rate limiter of the search requests (default: created from the SEARCH_* configuration).
+            metrics: The metrics the cleaning timers and counters are recorded in (default: a new Metrics).
+            local_store: The local vector store replacing the Azure Search clients (default: None, or opened
+                from the configuration when VECTOR_STORE_BACKEND is local).
+            async_session: The pooled session of the async search client (default: a new session).
         """
+        self.metrics: Metrics = metrics or Metrics()
+        self.rate_limiter: RateLimiter = rate_limiter or RateLimiter.from_config(config, "SEARCH")
         self.service_endpoint = config.get("VECTOR_STORE_ADDRESS")
         self.index_name = config.get("INDEX_NAME")
+        if local_store is None and (config.get("VECTOR_STORE_BACKEND") or "azure").lower() == "local":
+            local_store = LocalVectorStore.from_config(config)
+        self.async_session: AsyncSearchSession | None = None
+        self.local_store: LocalVectorStore | None = local_store
+        # Pages are ordered by key unless the key field is not sortable, as in the indexes created before it was
+        self.ordered_paging: bool = True
+        # The local store stands in for both Azure AI Search clients
+        self.search_client: Any
+        self.index_client: Any
+        if local_store is not None:
+            self.search_client = self.index_client = local_store
+            return
         key = config.get("VECTOR_STORE_PASSWORD")
         credential = AzureKeyCredential(key)
         self.search_client = SearchClient(self.service_endpoint, self.index_name, credential)
         self.index_client = SearchIndexClient(self.service_endpoint, credential)
+        self.async_session = async_session or AsyncSearchSession(self.service_endpoint, key)
 
-    def get_full_document(self, repository: str, source: str) -> SearchItemPaged[Dict]:
+    def get_full_document(self, repository: str, source: str) -> SearchItemPaged[dict[str, Any]]:
         """
         Retrieves the full document based on the repository and source.
 
@@ -35,7 +68,84 @@ class DocumentManager:
             The full document matching the repository and source.
         """
         filter = f"repository eq '{repository}' and source eq '{source}'"
-        return self.search_client.search(search_text="*", filter=filter, top=1000)
+        results: SearchItemPaged[dict[str, Any]] = self.search_client.search(search_text="*", filter=filter, top=1000)
+        return results
+
+    def get_document_keys(self, repository: str, sources: list[str]) -> dict[str, list[str]]:
+        """
+        Retrieves the keys of the chunks of several sources, requesting only the key and source fields and
+        paging past the 1000 results limit of a single search.
+
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+
+        Returns:
+            A dictionary of the chunk keys of each source.
+        """
+        chunks = self.get_document_chunks(repository, sources)
+        return {source: [chunk["id"] for chunk in source_chunks] for source, source_chunks in chunks.items()}
+
+    def get_document_chunks(self, repository: str, sources: list[str],
+                            select: list[str] = ["id", "source"]) -> dict[str, list[dict[str, Any]]]:
+        """
+        Retrieves the chunks of several sources with as few filtered searches as possible, paging past the
+        1000 results limit of a single search. Pages are ordered by key and start after the last key of the
+        previous page, so they stay stable while the index changes and are not limited by the maximum skip.
+        Indexes whose key field is not sortable are paged with skip instead.
+
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+            select: The fields to retrieve, including the source field (default: the key and source fields).
+
+        Returns:
+            A dictionary of the chunks of each source, with the selected fields.
+        """
+        chunks: dict[str, list[dict[str, Any]]] = {source: [] for source in sources}
+        select = select if "id" in select else [*select, "id"]
+        for filter in self.__source_filters(repository, sources):
+            last_key, skip = None, 0
+            while True:
+                page = self.rate_limiter.call(self.__search_page, filter=filter, select=select, last_key=last_key,
+                                              skip=skip)
+                self.metrics.increment("clean.search_requests")
+                for chunk in page:
+                    chunks.setdefault(chunk["source"], []).append(chunk)
+                if len(page) < self.PAGE_SIZE:
+                    break
+                last_key, skip = page[-1]["id"], skip + self.PAGE_SIZE
+        return chunks
+
+    async def aget_document_chunks(self, repository: str, sources: list[str],
+                                   select: list[str] = ["id", "source"]) -> dict[str, list[dict[str, Any]]]:
+        """
+        Retrieves the chunks of several sources with the async search client, see get_document_chunks.
+
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+            select: The fields to retrieve, including the source field (default: the key and source fields).
+
+        Returns:
+            A dictionary of the chunks of each source, with the selected fields.
+        """
+        if self.async_session is None:
+            return self.get_document_chunks(repository, sources, select)
+        chunks: dict[str, list[dict[str, Any]]] = {source: [] for source in sources}
+        select = select if "id" in select else [*select, "id"]
+        for filter in self.__source_filters(repository, sources):
+            last_key, skip = None, 0
+            while True:
+                page = await self.rate_limiter.acall(self.__asearch_page, filter=filter, select=select,
+                                                     last_key=last_key, skip=skip)
+                self.metrics.increment("clean.search_requests")
+                for chunk in page:
+                    chunks.setdefault(chunk["source"], []).append(chunk)
+                if len(page) < self.PAGE_SIZE:
+                    break
+                last_key, skip = page[-1]["id"], skip + self.PAGE_SIZE
+        return chunks
 
     def clean_document(self, repository: str, source: str) -> int:
         """
@@ -48,19 +158,139 @@ class DocumentManager:
         Returns:
             True if the documents were cleaned successfully, False otherwise.
         """
-        logging.info(f"Cleaning documents for {repository}:{source}...")
-        # Getting documents from index
-        chunks = self.get_full_document(repository, source)
-        data_list: List[Dict] = []
-        [data_list.append(chunk) for chunk in chunks]
-        if len(data_list) == 0:
-            logging.info(f"No documents found for {repository}: {source}")
-            return True
+        return self.clean_documents(repository, [source])[source]
+
+    def clean_documents(self, repository: str, sources: list[str]) -> dict[str, bool]:
+        """
+        Cleans the documents of several sources of the specified repository, looking their keys up with as few
+        queries as possible and deleting them in large batches.
+
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+
+        Returns:
+            A dictionary with True for each source whose documents were cleaned successfully, False otherwise.
+        """
+        with self.metrics.timer("clean.documents"):
+            return self.__clean_documents(repository, sources)
+
+    async def aclean_documents(self, repository: str, sources: list[str]) -> dict[str, bool]:
+        """
+        Cleans the documents of several sources with the async search client, see clean_documents.
+
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+
+        Returns:
+            A dictionary with True for each source whose documents were cleaned successfully, False otherwise.
+        """
+        if self.async_session is None:
+            return self.clean_documents(repository, sources)
+        with self.metrics.timer("clean.documents"):
+            logging.info(f"Cleaning documents for {len(sources)} sources of {repository}...")
+            self.metrics.increment("clean.sources", len(sources))
+            chunks = await self.aget_document_chunks(repository, sources)
+            keys = {source: [chunk["id"] for chunk in source_chunks] for source, source_chunks in chunks.items()}
+            client = self.async_session.search_client(self.index_name)
+            results = []
+            for batch in self.__delete_batches(repository, sources, keys):
+                results.extend(await self.rate_limiter.acall(client.delete_documents, batch))
+                self.metrics.increment("clean.delete_requests")
+            return self.__report_cleaned(repository, sources, keys, results)
+
+    def __clean_documents(self, repository: str, sources: list[str]) -> dict[str, bool]:
+        """
+        Cleans the documents of several sources of the specified repository.
+        """
+        logging.info(f"Cleaning documents for {len(sources)} sources of {repository}...")
+        self.metrics.increment("clean.sources", len(sources))
+        # Getting document keys from index
+        keys = self.get_document_keys(repository, sources)
         # Deleting documents from index
-        results = self.search_client.delete_documents(data_list)
-        return self.__report_clean(repository, source, data_list, results)
+        results = []
+        for batch in self.__delete_batches(repository, sources, keys):
+            results.extend(self.rate_limiter.call(self.search_client.delete_documents, batch))
+            self.metrics.increment("clean.delete_requests")
+        return self.__report_cleaned(repository, sources, keys, results)
+
+    def __source_filters(self, repository: str, sources: list[str]) -> list[str]:
+        """
+        Builds the filters looking up the chunks of several sources, SOURCES_PER_QUERY sources at a time.
+
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+
+        Returns:
+            The OData filters.
+        """
+        return [f"repository eq '{self.escape(repository)}' and "
+                + f"search.in(source, '{self.escape('|'.join(sources[start:start + self.SOURCES_PER_QUERY]))}', '|')"
+                for start in range(0, len(sources), self.SOURCES_PER_QUERY)]
+
+    def __delete_batches(self, repository: str, sources: list[str],
+                         keys: dict[str, list[str]]) -> list[list[dict[str, str]]]:
+        """
+        Splits the keys of the chunks to delete into batches of up to PAGE_SIZE keys.
+
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+            keys: The chunk keys of each source.
+
+        Returns:
+            The batches of documents to delete.
+        """
+        data_list: list[dict[str, str]] = [{"id": key} for source_keys in keys.values() for key in source_keys]
+        self.metrics.increment("clean.documents_found", len(data_list))
+        if len(data_list) == 0:
+            logging.info(f"No documents found for {len(sources)} sources of {repository}")
+        return [data_list[start:start + self.PAGE_SIZE] for start in range(0, len(data_list), self.PAGE_SIZE)]
+
+    def __report_cleaned(self, repository: str, sources: list[str], keys: dict[str, list[str]],
+                         results: list[Any]) -> dict[str, bool]:
+        """
+        Reports the deletion results of the chunks of several sources.
 
-    def get_document_store_statistics(self, oldStats: Dict = None) -> Dict:
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+            keys: The chunk keys of each source.
+            results: The deletion result of each chunk.
+
+        Returns:
+            A dictionary with True for each source whose documents were cleaned successfully, False otherwise.
+        """
+        cleaned = {source: True for source in sources}
+        if len(results) == 0:
+            return cleaned
+        source_by_key = {key: source for source, source_keys in keys.items() for key in source_keys}
+        self.metrics.increment("clean.documents_deleted", sum(1 for result in results if result.succeeded))
+        results_by_source: dict[str | None, list[Any]] = {}
+        for result in results:
+            results_by_source.setdefault(source_by_key.get(result.key), []).append(result)
+        for source in sources:
+            if len(keys[source]) > 0:
+                cleaned[source] = self.__report_clean(repository, source, keys[source],
+                                                      results_by_source.get(source, []))
+        return cleaned
+
+    @staticmethod
+    def escape(value: str) -> str:
+        """
+        Escapes a string value for use in an OData filter.
+
+        Args:
+            value: The string value.
+
+        Returns:
+            The escaped value.
+        """
+        return value.replace("'", "''")
+
+    def get_document_store_statistics(self, oldStats: dict[str, Any] | None = None) -> dict[str, Any]:
         """
         Retrieves the statistics for the document store.
 
@@ -68,13 +298,187 @@ class DocumentManager:
             A dictionary containing the statistics for the document store.
         """
         logging.info(f"Getting statistics for index {self.index_name}...")
-        result: Dict = self.index_client.get_index_statistics(self.index_name)
+        result: dict[str, Any] = self.rate_limiter.call(self.index_client.get_index_statistics, self.index_name)
         log: str = f"Statistics for index {self.index_name} retrieved: {result}"
         if oldStats is not None:
             log += f" old stats: {oldStats}"
         print(log)
         return result
 
+    def count_chunks(self, field: str = "source", repository: str | None = None) -> dict[str, int]:
+        """
+        Counts the chunks of each value of a facetable field with a single facet query, without retrieving any
+        document.
+
+        Args:
+            field: The facetable field, source or repository (default: source).
+            repository: Only count the chunks of this repository (default: the chunks of every repository).
+
+        Returns:
+            A dictionary of the number of chunks of each value of the field.
+
+        Raises:
+            HttpResponseError: If the field is not facetable, as in the indexes created before it was.
+        """
+        filter = f"repository eq '{self.escape(repository)}'" if repository else None
+        self.metrics.increment("verify.count_requests")
+        if self.local_store is not None:
+            return self.local_store.count_values(field, filter)
+        counts, total = self.rate_limiter.call(self.__facet_counts, field, filter)
+        if sum(counts.values()) < total:
+            logging.warning(f"Only the first {len(counts)} values of the {field} facet of index {self.index_name} "
+                            + "were counted")
+        return counts
+
+    def count_source_chunks(self, repository: str, sources: list[str]) -> dict[str, int]:
+        """
+        Counts the chunks of several sources with one count query per source, for the indexes whose source field
+        is not facetable.
+
+        Args:
+            repository: A string representing the repository.
+            sources: A list of strings representing the sources.
+
+        Returns:
+            A dictionary of the number of chunks of each source.
+        """
+        return {source: self.count_documents(f"repository eq '{self.escape(repository)}' and "
+                                             + f"source eq '{self.escape(source)}'")
+                for source in sources}
+
+    def count_documents(self, filter: str | None = None) -> int:
+        """
+        Counts the documents matching a filter with a single count query, without retrieving any document.
+
+        Args:
+            filter: The OData filter of the documents (default: every document).
+
+        Returns:
+            The number of documents.
+        """
+        self.metrics.increment("verify.count_requests")
+        if self.local_store is not None:
+            return self.local_store.count(filter)
+        count: int = self.rate_limiter.call(self.__count_page, filter)
+        return count
+
+    def __facet_counts(self, field: str, filter: str | None) -> tuple[dict[str, int], int]:
+        """
+        Runs a facet query returning no document. The facets are read inside the call so that the request is
+        sent, and retried, by the rate limiter.
+
+        Args:
+            field: The facetable field.
+            filter: The OData filter of the counted documents.
+
+        Returns:
+            The number of documents of each value of the field, and the total number of documents.
+        """
+        results = self.search_client.search(search_text="*", filter=filter, top=0, include_total_count=True,
+                                            facets=[f"{field},count:{self.FACET_LIMIT}"])
+        facets = results.get_facets() or {}
+        counts = {facet["value"]: facet["count"] for facet in facets.get(field, [])}
+        return counts, results.get_count() or 0
+
+    def __count_page(self, filter: str | None) -> int:
+        """
+        Runs a count query returning no document.
+
+        Args:
+            filter: The OData filter of the counted documents.
+
+        Returns:
+            The number of documents.
+        """
+        count: int = self.search_client.search(search_text="*", filter=filter, top=0,
+                                               include_total_count=True).get_count()
+        return count
+
+    def __page_filter(self, filter: str, last_key: str | None) -> str:
+        """
+        Restricts a filter to the keys after the last key of the previous page.
+
+        Args:
+            filter: The OData filter of the search.
+            last_key: The last key of the previous page, None for the first page.
+
+        Returns:
+            The OData filter of the page.
+        """
+        return filter if last_key is None else f"{filter} and id gt '{self.escape(last_key)}'"
+
+    def __unordered_paging(self, error: HttpResponseError, last_key: str | None) -> bool:
+        """
+        Checks if a failed ordered search must be sent again with skip paging, because the key field of the
+        index is not sortable.
+
+        Args:
+            error: The error of the ordered search.
+            last_key: The last key of the previous page, None for the first page.
+
+        Returns:
+            True if the page must be retrieved with skip paging, False if the error must be raised.
+        """
+        # A page after the first one would mix both orders, only the first page switches
+        if error.status_code != 400 or last_key is not None:
+            return False
+        logging.warning(f"Failed to order the search results of index {self.index_name} by key, paging them with "
+                        + f"skip (rebuild the index to make the id field sortable): {error.message}")
+        self.ordered_paging = False
+        return True
+
+    def __search_page(self, filter: str, select: list[str], last_key: str | None,
+                      skip: int) -> list[dict[str, Any]]:
+        """
+        Retrieves one page of search results ordered by key, starting after the last key of the previous page.
+        The results are read inside the call so that the request is sent, and retried, by the rate limiter.
+
+        Args:
+            filter: The OData filter of the search.
+            select: The fields to retrieve, including the key field.
+            last_key: The last key of the previous page, None for the first page.
+            skip: The number of results to skip when the index cannot be ordered by key.
+
+        Returns:
+            The page of results.
+        """
+        if self.ordered_paging:
+            try:
+                return list(self.search_client.search(search_text="*", filter=self.__page_filter(filter, last_key),
+                                                      select=select, order_by=["id"], top=self.PAGE_SIZE))
+            except HttpResponseError as e:
+                if not self.__unordered_paging(e, last_key):
+                    raise
+        return list(self.search_client.search(search_text="*", filter=filter, select=select,
+                                              top=self.PAGE_SIZE, skip=skip))
+
+    async def __asearch_page(self, filter: str, select: list[str], last_key: str | None,
+                             skip: int) -> list[dict[str, Any]]:
+        """
+        Retrieves one page of search results with the async search client, see __search_page.
+
+        Args:
+            filter: The OData filter of the search.
+            select: The fields to retrieve, including the key field.
+            last_key: The last key of the previous page, None for the first page.
+            skip: The number of results to skip when the index cannot be ordered by key.
+
+        Returns:
+            The page of results.
+        """
+        assert self.async_session is not None, "Only the Azure AI Search backend pages with the async client"
+        client = self.async_session.search_client(self.index_name)
+        if self.ordered_paging:
+            try:
+                results = await client.search(search_text="*", filter=self.__page_filter(filter, last_key),
+                                              select=select, order_by=["id"], top=self.PAGE_SIZE)
+                return [result async for result in results]
+            except HttpResponseError as e:
+                if not self.__unordered_paging(e, last_key):
+                    raise
+        results = await client.search(search_text="*", filter=filter, select=select, top=self.PAGE_SIZE, skip=skip)
+        return [result async for result in results]
+
     def __report_clean(self, repository, source, data_list, results):
         """
         Reports the cleaning results for the specified repository and source.
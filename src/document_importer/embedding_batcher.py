@@ -0,0 +1,170 @@
+import logging
+import threading
+from typing import Callable
+from document_importer.pipeline import BatchingStage, FileTask
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a text, assuming about four characters per token.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+def chunks_to_embed(task: FileTask, count_tokens: Callable[[str], int] = estimate_tokens) -> list[tuple[int, int]]:
+    """
+    Lists the chunks of a file that need a vector, and prepares the vectors of the file.
+
+    Args:
+        task (FileTask): The parsed file.
+        count_tokens (Callable, optional): The function counting the tokens of a text. Defaults to estimate_tokens.
+
+    Returns:
+        list: The index and the number of tokens of each chunk to embed.
+    """
+    # Upserted files only embed the chunks that are not in the index yet
+    indexes = task.chunk_diff.added if task.chunk_diff is not None else range(len(task.page_contents))
+    # Resumed files keep the vectors restored from their checkpoint and only embed the other chunks
+    if len(task.vectors) != len(task.page_contents):
+        task.vectors = [None] * len(task.page_contents)
+    chunks = []
+    for index in indexes:
+        if task.vectors[index] is None:
+            # Chunks split by a tokenizer carry their exact token count
+            tokens = task.page_metadatas[index].get("token_count") if task.page_metadatas else None
+            chunks.append((index, tokens if tokens is not None else count_tokens(task.page_contents[index])))
+    return chunks
+
+
+class EmbeddingBatcher(BatchingStage):
+    """
+    A class that collects the chunks of many files into embedding requests of up to max_items texts and
+    max_tokens tokens, and assigns the returned vectors back to the files the chunks came from.
+    """
+
+    def __init__(self, embed: Callable[[list[str]], list[list[float]]],
+                 max_items: int = 16, max_tokens: int = 32000,
+                 count_tokens: Callable[[str], int] = estimate_tokens):
+        """
+        Initializes a new instance of the EmbeddingBatcher class.
+
+        Args:
+            embed (Callable): The function embedding a list of texts with a single request.
+            max_items (int, optional): The maximum number of texts per request. Defaults to 16.
+            max_tokens (int, optional): The maximum number of tokens per request. Defaults to 32000.
+            count_tokens (Callable, optional): The function counting the tokens of a text.
+                Defaults to estimate_tokens.
+        """
+        self.embed = embed
+        self.max_items: int = max_items
+        self.max_tokens: int = max_tokens
+        self.count_tokens = count_tokens
+        self.requests: int = 0
+        self.__lock = threading.Lock()
+        # Pending (task, chunk index, text, tokens) entries waiting for a request
+        self.__pending: list[tuple[FileTask, int, str, int]] = []
+        self.__pending_tokens: int = 0
+        # Number of chunks still waiting for a vector, per task
+        self.__remaining: dict[int, int] = {}
+        self.__failed: set[int] = set()
+
+    def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Queues the chunks of a file and sends the embedding requests that are full.
+
+        Args:
+            task (FileTask): The parsed file.
+
+        Returns:
+            list: The files whose chunks are all embedded, or that failed.
+        """
+        chunks = chunks_to_embed(task, self.count_tokens)
+        if len(chunks) == 0:
+            return [(task, None)]
+        batches = []
+        with self.__lock:
+            self.__remaining[id(task)] = len(chunks)
+            for index, tokens in chunks:
+                text = task.page_contents[index]
+                if self.__pending and (len(self.__pending) >= self.max_items
+                                       or self.__pending_tokens + tokens > self.max_tokens):
+                    batches.append(self.__take_pending())
+                self.__pending.append((task, index, text, tokens))
+                self.__pending_tokens += tokens
+            if len(self.__pending) >= self.max_items:
+                batches.append(self.__take_pending())
+        finished = []
+        for batch in batches:
+            finished.extend(self.__embed_batch(batch))
+        return finished
+
+    def flush(self) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Sends the chunks still waiting for a request.
+
+        Returns:
+            list: The files whose chunks are all embedded, or that failed.
+        """
+        with self.__lock:
+            if not self.__pending:
+                return []
+            batch = self.__take_pending()
+        return self.__embed_batch(batch)
+
+    def __take_pending(self) -> list[tuple[FileTask, int, str, int]]:
+        """
+        Takes the pending chunks out of the batcher. Must be called while holding the lock.
+
+        Returns:
+            list: The pending chunks.
+        """
+        batch = self.__pending
+        self.__pending = []
+        self.__pending_tokens = 0
+        return batch
+
+    def __embed_batch(self, batch: list[tuple[FileTask, int, str, int]]) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Embeds a batch of chunks with one request and distributes the vectors to their files.
+
+        Args:
+            batch (list): The chunks to embed.
+
+        Returns:
+            list: The files whose chunks are all embedded, or that failed.
+        """
+        error: Exception | None = None
+        vectors: list[list[float]] = []
+        try:
+            logging.debug(f"Embedding a batch of {len(batch)} chunks...")
+            vectors = self.embed([text for _, _, text, _ in batch])
+            if len(vectors) != len(batch):
+                raise RuntimeError(f"Expected {len(batch)} embeddings but received {len(vectors)}")
+        except Exception as e:
+            error = e
+        finished: list[tuple[FileTask, Exception | None]] = []
+        with self.__lock:
+            self.requests += 1
+            for position, (task, index, _, _) in enumerate(batch):
+                key = id(task)
+                if key not in self.__failed:
+                    if error is not None:
+                        # The file is reported once, its other chunks are dropped when their batches complete
+                        self.__failed.add(key)
+                        finished.append((task, error))
+                    else:
+                        task.vectors[index] = vectors[position]
+                self.__remaining[key] -= 1
+                if self.__remaining[key] == 0:
+                    del self.__remaining[key]
+                    if key in self.__failed:
+                        self.__failed.discard(key)
+                    else:
+                        finished.append((task, None))
+        return finished
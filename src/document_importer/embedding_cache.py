@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from langchain_core.embeddings import Embeddings
+
+
+class EmbeddingCache:
+    """
+    A persistent SQLite cache of embeddings keyed by embedding model and the SHA-256 hash of the embedded text.
+    The least recently used entries are evicted once the cache grows above its size limit.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        """
+        Initializes a new instance of the EmbeddingCache class.
+
+        Args:
+            path (str): The path to the SQLite database file.
+            max_entries (int, optional): The maximum number of cached embeddings. Defaults to 100000.
+        """
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.__lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        # Older caches keyed their embeddings by deployment name only, which does not tell the endpoints apart
+        self.__connection.execute("DROP TABLE IF EXISTS embeddings")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS model_embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, last_access REAL NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self.__connection.execute(
+            "CREATE INDEX IF NOT EXISTS model_embeddings_last_access ON model_embeddings (last_access)")
+        self.__connection.commit()
+        # The number of entries is counted once, then kept up to date by put_many
+        self.__count: int = self.__connection.execute("SELECT COUNT(*) FROM model_embeddings").fetchone()[0]
+        logging.info(f"Embedding cache opened: {path} (max entries: {max_entries})")
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """
+        Computes the cache key of a text.
+
+        Args:
+            text (str): The text to hash.
+
+        Returns:
+            str: The hexadecimal SHA-256 digest of the text.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def model_key(endpoint: str, deployment: str, dimensions: int) -> str:
+        """
+        Computes the cache key of an embedding model, the same deployment name can serve different models on
+        different endpoints.
+
+        Args:
+            endpoint (str): The Azure OpenAI endpoint.
+            deployment (str): The embedding deployment name.
+            dimensions (int): The dimension of the embedding vectors.
+
+        Returns:
+            str: The key of the model.
+        """
+        return f"{endpoint}|{deployment}|{dimensions}"
+
+    def get_many(self, model: str, texts: list[str]) -> list[list[float] | None]:
+        """
+        Looks up the embeddings of several texts.
+
+        Args:
+            model (str): The key of the embedding model, see model_key.
+            texts (list[str]): The texts to look up.
+
+        Returns:
+            list: The cached embedding of each text, or None for cache misses.
+        """
+        hashes = [self.hash_text(text) for text in texts]
+        found: dict[str, list[float]] = {}
+        with self.__lock:
+            for start in range(0, len(hashes), 500):
+                batch = list(set(hashes[start:start + 500]))
+                placeholders = ",".join("?" * len(batch))
+                rows = self.__connection.execute(
+                    f"SELECT hash, vector FROM model_embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = array("f", vector).tolist()
+            if found:
+                now = time.time()
+                self.__connection.executemany(
+                    "UPDATE model_embeddings SET last_access = ? WHERE model = ? AND hash = ?",
+                    [(now, model, text_hash) for text_hash in found],
+                )
+                self.__connection.commit()
+            results = [found.get(text_hash) for text_hash in hashes]
+            hits = sum(1 for result in results if result is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, model: str, texts: list[str], vectors: list[list[float]]) -> None:
+        """
+        Stores the embeddings of several texts and evicts the least recently used entries above the size limit.
+
+        Args:
+            model (str): The key of the embedding model, see model_key.
+            texts (list[str]): The embedded texts.
+            vectors (list[list[float]]): The embedding of each text.
+        """
+        now = time.time()
+        rows = [(model, self.hash_text(text), array("f", vector).tobytes(), now)
+                for text, vector in zip(texts, vectors)]
+        with self.__lock:
+            inserted = self.__connection.executemany(
+                "INSERT OR IGNORE INTO model_embeddings (model, hash, vector, last_access) VALUES (?, ?, ?, ?)", rows
+            ).rowcount
+            if inserted < len(rows):
+                # The texts embedded again since they were looked up replace their cached embeddings
+                self.__connection.executemany(
+                    "UPDATE model_embeddings SET vector = ?, last_access = ? WHERE model = ? AND hash = ?",
+                    [(vector, access, row_model, text_hash) for row_model, text_hash, vector, access in rows],
+                )
+            self.__count += inserted
+            if self.__count > self.max_entries:
+                evicted = self.__connection.execute(
+                    "DELETE FROM model_embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM model_embeddings ORDER BY last_access ASC, rowid ASC LIMIT ?)",
+                    (self.__count - self.max_entries,),
+                ).rowcount
+                self.__count -= evicted
+                logging.debug(f"Evicted {evicted} embeddings from cache {self.path}")
+            self.__connection.commit()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__count
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    An embeddings wrapper that only sends the texts missing from an EmbeddingCache to the wrapped embeddings.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: str):
+        """
+        Initializes a new instance of the CachedEmbeddings class.
+
+        Args:
+            embeddings (Embeddings): The embeddings used for cache misses.
+            cache (EmbeddingCache): The embedding cache.
+            model (str): The key of the embedding model used as part of the cache key, see EmbeddingCache.model_key.
+        """
+        self.embeddings: Embeddings = embeddings
+        self.cache: EmbeddingCache = cache
+        self.model: str = model
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds a list of texts, using cached embeddings where available.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            list[list[float]]: The embedding of each text.
+        """
+        vectors = self.cache.get_many(self.model, texts)
+        # Embed each distinct missing text once, even if it appears several times in the batch
+        missing_texts = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        computed: dict[str, list[float]] = {}
+        if missing_texts:
+            logging.debug(f"Embedding {len(missing_texts)}/{len(texts)} texts missing from the cache")
+            computed = dict(zip(missing_texts, self.embeddings.embed_documents(missing_texts)))
+            self.cache.put_many(self.model, missing_texts, [computed[text] for text in missing_texts])
+        return [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds a list of texts with the async client of the wrapped embeddings, using cached embeddings where
+        available.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            list[list[float]]: The embedding of each text.
+        """
+        vectors = self.cache.get_many(self.model, texts)
+        missing_texts = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        computed: dict[str, list[float]] = {}
+        if missing_texts:
+            logging.debug(f"Embedding {len(missing_texts)}/{len(texts)} texts missing from the cache")
+            computed = dict(zip(missing_texts, await self.embeddings.aembed_documents(missing_texts)))
+            self.cache.put_many(self.model, missing_texts, [computed[text] for text in missing_texts])
+        return [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+
+    def embed_query(self, text: str) -> list[float]:
+        """
+        Embeds a single text, using the cached embedding if available.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            list[float]: The embedding of the text.
+        """
+        return self.embed_documents([text])[0]
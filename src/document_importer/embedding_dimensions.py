@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+from typing import Any, Callable
+
+# Vector dimensions of the Azure OpenAI embedding models, used when the deployment is named after its model
+KNOWN_MODEL_DIMENSIONS: dict[str, int] = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+DEFAULT_CACHE_PATH = ".cache/embedding_dimensions.json"
+
+
+def resolve_embedding_dimensions(config: dict[str, Any], probe: Callable[[], int]) -> int:
+    """
+    Finds the vector dimension of the embedding deployment without an embedding request when possible.
+
+    The dimension is read, in order, from the EMBEDDING_DIMENSIONS setting, from the known dimensions of the
+    EMBEDDING_MODEL setting or of the deployment name, and from the dimensions cache file
+    (EMBEDDING_DIMENSIONS_CACHE_PATH). Only if none of them knows the deployment, the dimension is probed
+    with one embedding request and stored in the cache file for the next runs.
+
+    Args:
+        config (dict): The configuration dictionary.
+        probe (Callable[[], int]): The function embedding a text and returning the length of its vector.
+
+    Returns:
+        int: The number of dimensions of the embedding vectors.
+    """
+    configured = config.get("EMBEDDING_DIMENSIONS")
+    if configured:
+        return int(configured)
+    deployment = config.get("AZURE_DEPLOYMENT") or ""
+    for model in (config.get("EMBEDDING_MODEL"), deployment):
+        if model and model.lower() in KNOWN_MODEL_DIMENSIONS:
+            return KNOWN_MODEL_DIMENSIONS[model.lower()]
+
+    cache_path = config.get("EMBEDDING_DIMENSIONS_CACHE_PATH") or DEFAULT_CACHE_PATH
+    cache_key = f"{config.get('AZURE_OPENAI_ENDPOINT') or ''}|{deployment}"
+    cache = _read_cache(cache_path)
+    if cache_key in cache:
+        return int(cache[cache_key])
+
+    logging.info(f"Probing the vector dimension of embedding deployment {deployment}...")
+    dimensions = probe()
+    cache[cache_key] = dimensions
+    try:
+        directory = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{cache_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file, indent=2, sort_keys=True)
+        os.replace(temporary_path, cache_path)
+    except OSError as e:
+        logging.warning(f"Failed to save the embedding dimensions cache {cache_path}: {str(e)}")
+    return dimensions
+
+
+def _read_cache(path: str) -> dict[str, Any]:
+    """
+    Reads the dimensions cache file, ignoring a missing or unreadable file.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable embedding dimensions cache {path}: {str(e)}")
+        return {}
+    return cache if isinstance(cache, dict) else {}
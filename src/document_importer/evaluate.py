@@ -0,0 +1,191 @@
+# Evaluation of the retrieval quality and latency of an index
+import sys
+import argparse
+import json
+import logging
+import time
+from typing import Any, Callable
+from dotenv import load_dotenv, dotenv_values
+from document_importer.metrics import percentile, write_json_report
+
+# Metadata fields an expected value is compared with
+MATCH_FIELDS = ("source", "uri")
+
+
+def load_queries(path: str) -> list[dict[str, Any]]:
+    """
+    Loads the evaluation queries from a JSON Lines file, or a JSON file with a list, of objects with a query and
+    its expected source or uri, for example {"query": "How do I import?", "expected": "docs/import.md"}. The
+    expected value can also be a list of sources or uris.
+
+    Args:
+        path (str): The path to the queries file.
+
+    Returns:
+        list[dict]: The queries, each with a query text and a list of expected sources or uris.
+
+    Raises:
+        ValueError: If a query has no query text or no expected value.
+    """
+    with open(path, "r", encoding="utf-8") as queries_file:
+        content = queries_file.read()
+    if content.lstrip().startswith("["):
+        entries = json.loads(content)
+    else:
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+    queries = []
+    for number, entry in enumerate(entries, start=1):
+        expected = entry.get("expected")
+        if not entry.get("query") or not expected:
+            raise ValueError(f"Query {number} of {path} needs a query and an expected source or uri")
+        queries.append({"query": entry["query"], "expected": expected if isinstance(expected, list) else [expected]})
+    return queries
+
+
+def evaluate(search: Callable[..., Any], queries: list[dict[str, Any]], k: int = 3, search_type: str = "similarity",
+             filters: str | None = None) -> dict[str, Any]:
+    """
+    Runs the evaluation queries one at a time and measures the retrieval quality and the query latency.
+
+    Args:
+        search (Callable): The search function, such as VectorSearch.search, called with the query, k,
+            search_type and filters and returning langchain documents.
+        queries (list[dict]): The queries with their expected sources or uris, see load_queries.
+        k (int, optional): The number of results retrieved per query. Defaults to 3.
+        search_type (str, optional): The type of search. Defaults to "similarity".
+        filters (str, optional): The filters applied to every query. Defaults to None.
+
+    Returns:
+        dict: The recall@k, the mean reciprocal rank, the p50/p95 latency in milliseconds and the rank of the
+            first relevant result of each query, None if it was not retrieved.
+    """
+    durations: list[float] = []
+    recalls: list[float] = []
+    reciprocal_ranks: list[float] = []
+    results: list[dict[str, Any]] = []
+    for query in queries:
+        start = time.perf_counter()
+        documents = search(query=query["query"], k=k, search_type=search_type, filters=filters)
+        durations.append(time.perf_counter() - start)
+        expected = set(query["expected"])
+        found: set[str] = set()
+        rank = None
+        for position, document in enumerate(documents[:k], start=1):
+            matched = {str(document.metadata.get(field)) for field in MATCH_FIELDS} & expected
+            if matched and rank is None:
+                rank = position
+            found |= matched
+        recalls.append(len(found) / len(expected))
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        results.append({"query": query["query"], "rank": rank})
+    count = len(queries)
+    return {
+        "queries": count,
+        "k": k,
+        "search_type": search_type,
+        "filters": filters,
+        "recall_at_k": sum(recalls) / count if count else 0.0,
+        "mrr": sum(reciprocal_ranks) / count if count else 0.0,
+        "latency_ms": {
+            "p50": percentile(durations, 0.50) * 1000,
+            "p95": percentile(durations, 0.95) * 1000,
+            "mean": sum(durations) / count * 1000 if count else 0.0,
+        },
+        "results": results,
+    }
+
+
+def compare_with_baseline(report: dict[str, Any], baseline: dict[str, Any], quality_tolerance: float = 0.0,
+                          latency_tolerance: float = 0.2) -> dict[str, Any]:
+    """
+    Compares an evaluation report with a baseline report.
+
+    Args:
+        report (dict): The evaluation report.
+        baseline (dict): The baseline evaluation report.
+        quality_tolerance (float, optional): The drop of recall@k or MRR accepted before it is reported as a
+            regression. Defaults to 0.0.
+        latency_tolerance (float, optional): The relative increase of the p95 latency accepted before it is
+            reported as a regression. Defaults to 0.2.
+
+    Returns:
+        dict: The difference of each measure with the baseline, and the measures that regressed.
+    """
+    deltas = {
+        "recall_at_k": report["recall_at_k"] - baseline["recall_at_k"],
+        "mrr": report["mrr"] - baseline["mrr"],
+        "latency_p50_ms": report["latency_ms"]["p50"] - baseline["latency_ms"]["p50"],
+        "latency_p95_ms": report["latency_ms"]["p95"] - baseline["latency_ms"]["p95"],
+    }
+    regressions = [name for name in ("recall_at_k", "mrr") if deltas[name] < -quality_tolerance]
+    if report["latency_ms"]["p95"] > baseline["latency_ms"]["p95"] * (1 + latency_tolerance):
+        regressions.append("latency_p95_ms")
+    baseline_ranks = {result["query"]: result["rank"] for result in baseline.get("results", [])}
+    lost = [result["query"] for result in report["results"]
+            if baseline_ranks.get(result["query"]) and not result["rank"]]
+    return {"deltas": deltas, "regressions": regressions, "lost_queries": lost}
+
+
+def print_report(report: dict[str, Any], comparison: dict[str, Any] | None = None) -> None:
+    """
+    Prints an evaluation report and its comparison with the baseline.
+
+    Args:
+        report (dict): The evaluation report.
+        comparison (dict, optional): The comparison with the baseline. Defaults to None.
+    """
+    print(f"Evaluated {report['queries']} queries with k={report['k']} ({report['search_type']}): "
+          + f"recall@{report['k']} {report['recall_at_k']:.3f}, MRR {report['mrr']:.3f}, "
+          + f"latency p50 {report['latency_ms']['p50']:.1f}ms, p95 {report['latency_ms']['p95']:.1f}ms")
+    if comparison is not None:
+        deltas = comparison["deltas"]
+        print(f"Compared with the baseline: recall@{report['k']} {deltas['recall_at_k']:+.3f}, "
+              + f"MRR {deltas['mrr']:+.3f}, latency p50 {deltas['latency_p50_ms']:+.1f}ms, "
+              + f"p95 {deltas['latency_p95_ms']:+.1f}ms")
+        if comparison["regressions"]:
+            print(f"Regressions: {', '.join(comparison['regressions'])} "
+                  + f"({len(comparison['lost_queries'])} queries no longer retrieved)")
+
+
+def main(args: list[str] = sys.argv) -> None:
+    """
+    Main function that evaluates the index configured in the .env file with a file of queries.
+    """
+    parser = argparse.ArgumentParser(prog="python -m document_importer.evaluate")
+    parser.add_argument('-q', '--queries', required=True,
+                        help='The JSON Lines file of queries with their expected source or uri')
+    parser.add_argument('-k', type=int, default=3, help='The number of results retrieved per query, default=3')
+    parser.add_argument('--search-type', default='similarity', help='The type of search, default=similarity')
+    parser.add_argument('--filters', help='The OData filter applied to every query')
+    parser.add_argument('--baseline', help='The JSON report of a previous evaluation to compare with')
+    parser.add_argument('--json', help='The file the JSON evaluation report is written to')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='Exit with an error if the quality or latency regressed from the baseline')
+    parser.add_argument('-l', '--loglevel', default='warning',
+                        help='Provide logging level. Example --loglevel debug, default=warning')
+    options = parser.parse_known_args(args[1:])[0]
+
+    logging.basicConfig(level=options.loglevel.upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    load_dotenv(override=True)
+    config = {
+        **dotenv_values(),
+    }
+    from document_importer.vector_search import VectorSearch
+
+    vector_search = VectorSearch(config)
+    report = evaluate(vector_search.search, load_queries(options.queries), k=options.k, search_type=options.search_type,
+                      filters=options.filters)
+    comparison = None
+    if options.baseline:
+        with open(options.baseline, "r", encoding="utf-8") as baseline_file:
+            comparison = compare_with_baseline(report, json.load(baseline_file))
+        report["baseline"] = comparison
+    print_report(report, comparison)
+    if options.json:
+        write_json_report(options.json, report)
+    if options.fail_on_regression and comparison is not None and comparison["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+import base64
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import urlparse
+from document_importer.search_filter import parse_filter, sort_key
+
+EMBEDDINGS_PATH = re.compile(r"^/openai/deployments/([^/]+)/embeddings$")
+INDEX_PATH = re.compile(r"^/indexes(?:\('([^']+)'\)|/([^/('?]+))?(/.*)?$")
+
+
+class FakeService(ABC):
+    """
+    The base class of the local stand-ins for the Azure services, served over HTTP from a background thread.
+
+    Every request waits for the configured latency, and is rejected with 429 above the requests per minute
+    limit or with 503 at the configured failure rate.
+    """
+
+    def __init__(self, latency: float = 0.0, requests_per_minute: float | None = None,
+                 failure_rate: float = 0.0, seed: int = 0):
+        """
+        Initializes a new instance of the FakeService class.
+
+        Args:
+            latency (float, optional): The time in seconds spent on every request. Defaults to 0.0.
+            requests_per_minute (float, optional): The maximum number of requests per minute. Defaults to None.
+            failure_rate (float, optional): The fraction of requests failing with 503. Defaults to 0.0.
+            seed (int, optional): The seed of the failure generator. Defaults to 0.
+        """
+        self.latency: float = latency
+        self.requests_per_minute: float | None = requests_per_minute
+        self.failure_rate: float = failure_rate
+        self.requests: int = 0
+        self.throttled: int = 0
+        self.failed: int = 0
+        self.lock = threading.Lock()
+        self.__random = random.Random(seed)
+        self.__window_start: float = time.monotonic()
+        self.__window_requests: int = 0
+        self.__server: ThreadingHTTPServer | None = None
+        self.__thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """
+        The base URL of the running service.
+        """
+        assert self.__server is not None, "The service is not running"
+        host, port = self.__server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode("ascii")
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "FakeService":
+        """
+        Starts serving requests in a background thread.
+
+        Args:
+            host (str, optional): The host to listen on. Defaults to "127.0.0.1".
+            port (int, optional): The port to listen on, 0 picks a free port. Defaults to 0.
+
+        Returns:
+            FakeService: The running service.
+        """
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, Nagle's algorithm would delay every response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                service.dispatch(self, "GET")
+
+            def do_POST(self):
+                service.dispatch(self, "POST")
+
+            def do_PUT(self):
+                service.dispatch(self, "PUT")
+
+            def do_DELETE(self):
+                service.dispatch(self, "DELETE")
+
+            def log_message(self, format, *args):
+                logging.debug(f"{type(service).__name__}: {format % args}")
+
+        self.__server = ThreadingHTTPServer((host, port), Handler)
+        self.__server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name=type(self).__name__, daemon=True)
+        self.__thread.start()
+        logging.info(f"{type(self).__name__} listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the service.
+        """
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            if self.__thread is not None:
+                self.__thread.join()
+            self.__server = None
+
+    def __enter__(self) -> "FakeService":
+        return self.start() if self.__server is None else self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        """
+        Applies the latency, rate limit and failures of the service, then handles the request.
+
+        Args:
+            handler (BaseHTTPRequestHandler): The handler of the request.
+            method (str): The HTTP method of the request.
+        """
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length) or b"null") if length else None
+        if self.latency > 0:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            now = time.monotonic()
+            if now - self.__window_start >= 60.0:
+                self.__window_start = now
+                self.__window_requests = 0
+            self.__window_requests += 1
+            throttled = self.requests_per_minute is not None and self.__window_requests > self.requests_per_minute
+            failed = not throttled and self.__random.random() < self.failure_rate
+            self.throttled += throttled
+            self.failed += failed
+            retry_after = 60.0 - (now - self.__window_start)
+        if throttled:
+            self.respond(handler, 429, {"error": {"code": "429", "message": "Rate limit exceeded"}},
+                         headers={"Retry-After-Ms": str(int(retry_after * 1000))})
+            return
+        if failed:
+            self.respond(handler, 503, {"error": {"code": "ServiceUnavailable", "message": "Injected failure"}})
+            return
+        url = urlparse(handler.path)
+        try:
+            status, payload = self.handle(method, url.path, body)
+        except Exception as e:
+            status, payload = 400, {"error": {"code": "BadRequest", "message": str(e)}}
+        self.respond(handler, status, payload)
+
+    @abstractmethod
+    def handle(self, method: str, path: str, body: Any) -> tuple[int, Any]:
+        """
+        Handles a request of the service.
+
+        Args:
+            method (str): The HTTP method of the request.
+            path (str): The path of the request.
+            body: The decoded JSON body of the request, if any.
+
+        Returns:
+            tuple: The status code and JSON payload of the response.
+        """
+
+    @staticmethod
+    def respond(handler: BaseHTTPRequestHandler, status: int, payload: Any,
+                headers: dict[str, str] | None = None) -> None:
+        """
+        Sends a JSON response.
+        """
+        data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+class FakeEmbeddingService(FakeService):
+    """
+    A local stand-in for the Azure OpenAI embeddings API returning deterministic vectors: the same input
+    always gets the same vector. Vectors are picked by hash from a pool generated once, so the service costs
+    little CPU next to the importer it measures.
+    """
+
+    def __init__(self, dimensions: int = 1536, pool_size: int = 256, **kwargs):
+        """
+        Initializes a new instance of the FakeEmbeddingService class.
+
+        Args:
+            dimensions (int, optional): The number of dimensions of the vectors. Defaults to 1536.
+            pool_size (int, optional): The number of distinct vectors. Defaults to 256.
+            **kwargs: The latency, rate limit and failure settings of FakeService.
+        """
+        super().__init__(**kwargs)
+        self.dimensions: int = dimensions
+        self.embedded: int = 0
+        generator = random.Random(dimensions)
+        self.__pool: list[list[float]] = []
+        # Base64 encoded float32 vectors, returned when the client asks for encoding_format=base64
+        self.__encoded_pool: list[str] = []
+        for _ in range(pool_size):
+            vector = [generator.gauss(0.0, 1.0) for _ in range(dimensions)]
+            norm = sum(value * value for value in vector) ** 0.5 or 1.0
+            self.__pool.append([round(value / norm, 6) for value in vector])
+            self.__encoded_pool.append(base64.b64encode(array("f", self.__pool[-1]).tobytes()).decode("ascii"))
+
+    def handle(self, method: str, path: str, body: Any) -> tuple[int, Any]:
+        if method != "POST" or not EMBEDDINGS_PATH.match(path):
+            return 404, {"error": {"code": "NotFound", "message": f"Unknown path {path}"}}
+        inputs = body["input"]
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        with self.lock:
+            self.embedded += len(inputs)
+        pool = self.__encoded_pool if body.get("encoding_format") == "base64" else self.__pool
+        data = [{"object": "embedding", "index": index, "embedding": pool[self.pool_index(text)]}
+                for index, text in enumerate(inputs)]
+        tokens = sum(len(text) if isinstance(text, list) else len(text) // 4 + 1 for text in inputs)
+        return 200, {"object": "list", "data": data, "model": body.get("model", "fake"),
+                     "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    def vector(self, text: str | list[int]) -> list[float]:
+        """
+        Returns the deterministic vector of an input.
+
+        Args:
+            text (str | list[int]): The text, or its tokens.
+
+        Returns:
+            list[float]: The unit length vector of the input.
+        """
+        return self.__pool[self.pool_index(text)]
+
+    def pool_index(self, text: str | list[int]) -> int:
+        """
+        Returns the position in the pool of the vector of an input.
+        """
+        digest = hashlib.sha256(json.dumps(text).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % len(self.__pool)
+
+
+class FakeSearchService(FakeService):
+    """
+    A local stand-in for the Azure AI Search REST API, keeping the indexes and their documents in memory.
+
+    It supports the index definition, statistics, indexing and search requests sent by the importer. Searches
+    only apply the eq, gt and search.in filter clauses, with the orderby of sortable fields, top, skip, select,
+    count and the count option of the facets of facetable fields.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Initializes a new instance of the FakeSearchService class.
+
+        Args:
+            **kwargs: The latency, rate limit and failure settings of FakeService.
+        """
+        super().__init__(**kwargs)
+        self.indexes: dict[str, dict[str, Any]] = {}
+        self.documents: dict[str, dict[str, dict[str, Any]]] = {}
+
+    def handle(self, method: str, path: str, body: Any) -> tuple[int, Any]:
+        match = INDEX_PATH.match(path)
+        if not match:
+            return 404, {"error": {"code": "NotFound", "message": f"Unknown path {path}"}}
+        name, operation = match.group(1) or match.group(2), match.group(3) or ""
+        if name is None:
+            if method == "POST":
+                return self.__put_index(body["name"], body)
+            return 200, {"value": list(self.indexes.values())}
+        if operation == "":
+            if method in ("PUT", "POST"):
+                return self.__put_index(name, body)
+            if method == "DELETE":
+                with self.lock:
+                    self.indexes.pop(name, None)
+                    self.documents.pop(name, None)
+                return 204, None
+            if name not in self.indexes:
+                return 404, {"error": {"code": "ResourceNotFound", "message": f"Index {name} not found"}}
+            return 200, self.indexes[name]
+        if name not in self.indexes:
+            return 404, {"error": {"code": "ResourceNotFound", "message": f"Index {name} not found"}}
+        if operation == "/search.stats":
+            with self.lock:
+                count = len(self.documents[name])
+                size = sum(len(json.dumps(document)) for document in self.documents[name].values())
+            return 200, {"documentCount": count, "storageSize": size, "vectorIndexSize": 0}
+        if operation == "/docs/$count":
+            return 200, len(self.documents[name])
+        if operation == "/docs/search.index":
+            return self.__index(name, body["value"])
+        if operation == "/docs/search.post.search":
+            return self.__search(name, body)
+        return 404, {"error": {"code": "NotFound", "message": f"Unknown path {path}"}}
+
+    def __put_index(self, name: str, definition: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        """
+        Creates or updates an index definition.
+        """
+        with self.lock:
+            created = name not in self.indexes
+            self.indexes[name] = {**definition, "name": name}
+            self.documents.setdefault(name, {})
+        return (201 if created else 200), self.indexes[name]
+
+    def __key_field(self, name: str) -> str:
+        """
+        Returns the name of the key field of an index.
+        """
+        for index_field in self.indexes[name].get("fields", []):
+            if index_field.get("key"):
+                return str(index_field["name"])
+        return "id"
+
+    def __index(self, name: str, actions: list[dict[str, Any]]) -> tuple[int, dict[str, Any]]:
+        """
+        Applies a batch of indexing actions.
+        """
+        key_field = self.__key_field(name)
+        results = []
+        with self.lock:
+            documents = self.documents[name]
+            for action in actions:
+                kind = action.get("@search.action", "upload")
+                document = {key: value for key, value in action.items() if key != "@search.action"}
+                key = document.get(key_field)
+                if key is None:
+                    raise ValueError(f"The document has no {key_field} key field")
+                if kind == "delete":
+                    documents.pop(key, None)
+                elif kind == "merge" and key not in documents:
+                    results.append({"key": key, "status": False, "errorMessage": "Document not found",
+                                    "statusCode": 404})
+                    continue
+                elif kind in ("merge", "mergeOrUpload"):
+                    documents[key] = {**documents.get(key, {}), **document}
+                else:
+                    documents[key] = document
+                results.append({"key": key, "status": True, "errorMessage": None,
+                                "statusCode": 200 if kind == "delete" else 201})
+        status = 200 if all(result["status"] for result in results) else 207
+        return status, {"value": results}
+
+    def __search(self, name: str, body: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        """
+        Runs a filtered search, returning the documents in insertion order unless they are ordered by fields,
+        or ranked by cosine similarity for a vector query.
+        """
+        matches = self.parse_filter(body.get("filter"))
+        with self.lock:
+            found = [document for document in self.documents[name].values() if matches(document)]
+        order = sort_key(body.get("orderby"))
+        if order is not None:
+            index_fields = {field["name"]: field for field in self.indexes[name].get("fields", [])}
+            for field_name in (item.split()[0] for item in str(body["orderby"]).split(",") if item.strip()):
+                if not index_fields.get(field_name, {}).get("sortable"):
+                    return 400, {"error": {"code": "InvalidRequestParameter",
+                                           "message": f"Field '{field_name}' is not sortable"}}
+            found.sort(key=order[0], reverse=order[1])
+        skip = int(body.get("skip") or 0)
+        top = 50 if body.get("top") is None else int(body["top"])
+        scores = [1.0] * len(found)
+        if body.get("vectorQueries"):
+            vector_query = body["vectorQueries"][0]
+            scores = [self.__score(vector_query["vector"], document.get(vector_query.get("fields", "content_vector")))
+                      for document in found]
+            ranked = sorted(range(len(found)), key=lambda index: -scores[index])[:int(vector_query.get("k") or top)]
+            found, scores = [found[index] for index in ranked], [scores[index] for index in ranked]
+        select = body.get("select")
+        selected = [field_name.strip() for field_name in select.split(",")] if select else None
+        results = []
+        for document, score in list(zip(found, scores))[skip:skip + top]:
+            if selected is not None:
+                document = {field_name: document.get(field_name) for field_name in selected}
+            results.append({"@search.score": score, **document})
+        payload: dict[str, Any] = {"value": results}
+        if body.get("count"):
+            payload["@odata.count"] = len(found)
+        if body.get("facets"):
+            index_fields = {field["name"]: field for field in self.indexes[name].get("fields", [])}
+            payload["@search.facets"] = {}
+            for facet in body["facets"]:
+                field_name, _, options = facet.partition(",")
+                if not index_fields.get(field_name, {}).get("facetable"):
+                    return 400, {"error": {"code": "InvalidRequestParameter",
+                                           "message": f"Field '{field_name}' is not facetable"}}
+                limit = int(options.split(":", 1)[1]) if options.startswith("count:") else 10
+                counts = Counter(document[field_name] for document in found if document.get(field_name) is not None)
+                payload["@search.facets"][field_name] = [{"value": value, "count": count}
+                                                         for value, count in counts.most_common(limit)]
+        return 200, payload
+
+    @staticmethod
+    def __score(query: list[float], vector: list[float] | None) -> float:
+        """
+        Scores a document vector like the cosine metric of Azure AI Search, 1 / (1 + cosine distance).
+        """
+        if not vector:
+            return 0.0
+        norms = math.sqrt(sum(value * value for value in query)) * math.sqrt(sum(value * value for value in vector))
+        similarity = sum(a * b for a, b in zip(query, vector)) / norms if norms else 0.0
+        return 1.0 / (2.0 - similarity)
+
+    @staticmethod
+    def parse_filter(filter: str | None):
+        """
+        Parses an OData filter made of eq, gt and search.in clauses joined by and, see search_filter.parse_filter.
+        """
+        return parse_filter(filter)
@@ -0,0 +1,365 @@
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+# Directories that never hold documentation to import, skipped without reading them
+DEFAULT_PRUNED_DIRECTORIES = (".git", "node_modules", "vendor", ".venv", "venv", "__pycache__", ".tox",
+                              "site-packages")
+
+
+@dataclass(frozen=True)
+class _Rule:
+    """
+    A compiled include, exclude or .gitignore pattern.
+    """
+    regex: re.Pattern[str]
+    negate: bool
+    directory_only: bool
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    Translates a glob pattern into a regular expression matching relative paths separated by slashes.
+    ** matches any number of directories, * and ? match within one path component.
+
+    Args:
+        pattern (str): The glob pattern.
+
+    Returns:
+        str: The regular expression.
+    """
+    regex: list[str] = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            regex.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            regex.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            regex.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            regex.append("[^/]")
+            index += 1
+        elif pattern[index] == "[" and pattern.find("]", index + 1) != -1:
+            end = pattern.find("]", index + 1)
+            characters = pattern[index + 1:end]
+            if characters.startswith("!"):
+                characters = "^" + characters[1:]
+            regex.append("[" + characters.replace("\\", "\\\\") + "]")
+            index = end + 1
+        else:
+            regex.append(re.escape(pattern[index]))
+            index += 1
+    return "".join(regex)
+
+
+def _compile_rule(pattern: str, base: str = "") -> _Rule | None:
+    """
+    Compiles a pattern with the .gitignore syntax. A pattern without a slash matches a name at any depth, a
+    pattern with a slash is relative to the directory it is defined in, a trailing slash only matches
+    directories and a leading ! re-includes the paths excluded by the previous patterns.
+
+    Args:
+        pattern (str): The pattern.
+        base (str, optional): The relative path of the directory of the .gitignore file. Defaults to "".
+
+    Returns:
+        _Rule: The compiled rule, None for blank lines and comments.
+    """
+    pattern = pattern.strip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\"):
+        pattern = pattern[1:]
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    anchored = "/" in pattern
+    regex = (re.escape(base + "/") if base else "") + ("" if anchored else "(?:.*/)?")
+    return _Rule(re.compile(regex + _glob_to_regex(pattern.lstrip("/"))), negate, directory_only)
+
+
+def _matches(rules: tuple[_Rule, ...], relative_path: str, is_directory: bool) -> bool:
+    """
+    Checks if a path is matched by a list of rules, the last rule matching the path wins.
+
+    Args:
+        rules (tuple[_Rule, ...]): The rules, in the order they are defined.
+        relative_path (str): The path relative to the discovery root, separated by slashes.
+        is_directory (bool): Whether the path is a directory.
+
+    Returns:
+        bool: True if the path is matched.
+    """
+    matched = False
+    for rule in rules:
+        if rule.directory_only and not is_directory:
+            continue
+        if rule.regex.fullmatch(relative_path):
+            matched = not rule.negate
+    return matched
+
+
+class FileDiscovery:
+    """
+    A class that lazily yields the markdown files of a directory tree. Directories are read one at a time with
+    os.scandir, excluded and pruned directories are never read, and files are filtered by include and exclude
+    glob patterns, the .gitignore files of the tree, their size and their modification time.
+    """
+
+    def __init__(self, include: tuple[str, ...] = ("*.md",), exclude: tuple[str, ...] = (),
+                 gitignore: bool = False, prune: tuple[str, ...] = (), max_file_bytes: int | None = None,
+                 modified_after: float | None = None):
+        """
+        Initializes a new instance of the FileDiscovery class.
+
+        Args:
+            include (tuple[str, ...], optional): The glob patterns of the files to import, relative to the
+                directory. Defaults to ("*.md",).
+            exclude (tuple[str, ...], optional): The glob patterns of the files and directories to skip.
+                Defaults to ().
+            gitignore (bool, optional): Skip the files and directories ignored by the .gitignore files of the
+                tree. Defaults to False.
+            prune (tuple[str, ...], optional): The names of the directories to skip. Defaults to ().
+            max_file_bytes (int, optional): Skip the files larger than this size, unlimited when None.
+                Defaults to None.
+            modified_after (float, optional): Skip the files last modified before this timestamp, no filter
+                when None. Defaults to None.
+        """
+        self.include: tuple[_Rule, ...] = tuple(rule for rule in map(_compile_rule, include) if rule is not None)
+        self.exclude: tuple[_Rule, ...] = tuple(rule for rule in map(_compile_rule, exclude) if rule is not None)
+        self.gitignore: bool = gitignore
+        self.prune: frozenset[str] = frozenset(prune)
+        self.max_file_bytes: int | None = max_file_bytes
+        self.modified_after: float | None = modified_after
+        self.pruned_directories: int = 0
+        self.ignored_files: int = 0
+        self.oversized_files: int = 0
+        self.unmodified_files: int = 0
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], include: list[str] | None = None, exclude: list[str] | None = None,
+                    modified_after: float | None = None) -> "FileDiscovery":
+        """
+        Creates the file discovery of the DISCOVERY_INCLUDE, DISCOVERY_EXCLUDE, DISCOVERY_GITIGNORE,
+        DISCOVERY_PRUNE_DIRECTORIES and DISCOVERY_MAX_FILE_BYTES settings.
+
+        Args:
+            config (dict): The configuration dictionary.
+            include (list[str], optional): The include patterns replacing DISCOVERY_INCLUDE. Defaults to None.
+            exclude (list[str], optional): The exclude patterns added to DISCOVERY_EXCLUDE. Defaults to None.
+            modified_after (float, optional): Skip the files last modified before this timestamp.
+                Defaults to None.
+
+        Returns:
+            FileDiscovery: The file discovery.
+        """
+        def split(value: str | None) -> tuple[str, ...]:
+            return tuple(item.strip() for item in (value or "").split(",") if item.strip())
+
+        prune = config.get("DISCOVERY_PRUNE_DIRECTORIES")
+        max_file_bytes = config.get("DISCOVERY_MAX_FILE_BYTES")
+        return cls(
+            include=tuple(include or ()) or split(config.get("DISCOVERY_INCLUDE")) or ("*.md",),
+            exclude=split(config.get("DISCOVERY_EXCLUDE")) + tuple(exclude or ()),
+            gitignore=str(config.get("DISCOVERY_GITIGNORE") or "true").lower() == "true",
+            prune=DEFAULT_PRUNED_DIRECTORIES if prune is None else split(prune),
+            max_file_bytes=int(max_file_bytes) if max_file_bytes else None,
+            modified_after=modified_after,
+        )
+
+    def iter_files(self, directory: str, on_unmodified: Callable[[str], None] | None = None,
+                   on_skipped: Callable[[str], None] | None = None) -> Iterator[str]:
+        """
+        Generator function that lazily yields the files of a directory and its subdirectories, in the same
+        top-down order as os.walk.
+
+        Args:
+            directory (str): The directory to search for markdown files.
+            on_unmodified (Callable, optional): The function called with the path of every file skipped
+                because it was not modified after modified_after. Defaults to None.
+            on_skipped (Callable, optional): The function called with the path of every file matching the include
+                patterns that is skipped because it is excluded, ignored or too large. Defaults to None.
+
+        Yields:
+            str: The file paths of the markdown files.
+        """
+        # Each pending directory carries its path relative to the root and the .gitignore rules that apply to it
+        pending_directories: list[tuple[str, str, tuple[_Rule, ...]]] = [(directory, "", ())]
+        while pending_directories:
+            current_directory, relative_directory, ignore_rules = pending_directories.pop()
+            if self.gitignore:
+                ignore_rules = ignore_rules + self.__read_gitignore(current_directory, relative_directory)
+            subdirectories = []
+            with os.scandir(current_directory) as entries:
+                for entry in entries:
+                    relative_path = f"{relative_directory}/{entry.name}" if relative_directory else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if (entry.name in self.prune or _matches(self.exclude, relative_path, True)
+                                or _matches(ignore_rules, relative_path, True)):
+                            self.pruned_directories += 1
+                            continue
+                        subdirectories.append((entry.path, relative_path, ignore_rules))
+                    elif entry.is_file() and _matches(self.include, relative_path, False):
+                        if (_matches(self.exclude, relative_path, False)
+                                or _matches(ignore_rules, relative_path, False)):
+                            self.ignored_files += 1
+                            if on_skipped is not None:
+                                on_skipped(entry.path)
+                        elif self.__accept(entry.path, entry.stat, on_unmodified, on_skipped):
+                            yield entry.path
+            # Visit the subdirectories in the same top-down order as os.walk
+            pending_directories.extend(reversed(subdirectories))
+
+    def filter_paths(self, directory: str, paths: Iterable[str],
+                     on_unmodified: Callable[[str], None] | None = None,
+                     on_skipped: Callable[[str], None] | None = None) -> Iterator[str]:
+        """
+        Generator function that lazily yields the files of a list, such as the files changed in a git revision
+        range, that iter_files would yield. The files that are excluded or ignored, or are in a pruned, excluded
+        or ignored directory, are counted as ignored files, and too large or unmodified files are counted like
+        in iter_files.
+
+        Args:
+            directory (str): The directory the paths are under.
+            paths (Iterable[str]): The file paths.
+            on_unmodified (Callable, optional): The function called with the path of every file skipped
+                because it was not modified after modified_after. Defaults to None.
+            on_skipped (Callable, optional): The function called with the path of every file matching the include
+                patterns that is skipped because it is excluded, ignored or too large. Defaults to None.
+
+        Yields:
+            str: The file paths that must be imported.
+        """
+        # The .gitignore rules that apply to each directory, read once for all the paths under it
+        directory_rules: dict[str, tuple[_Rule, ...] | None] = {}
+        for path in paths:
+            relative_path = os.path.relpath(path, directory).replace(os.sep, "/")
+            parts = relative_path.split("/")
+            ignore_rules = self.__directory_rules(directory, "", (), directory_rules)
+            for index in range(len(parts) - 1):
+                if ignore_rules is None:
+                    break
+                relative_directory = "/".join(parts[:index + 1])
+                ignore_rules = self.__directory_rules(directory, relative_directory, ignore_rules, directory_rules,
+                                                      name=parts[index])
+            if not _matches(self.include, relative_path, False):
+                continue
+            if (ignore_rules is None or _matches(self.exclude, relative_path, False)
+                    or _matches(ignore_rules, relative_path, False)):
+                self.ignored_files += 1
+                if on_skipped is not None:
+                    on_skipped(path)
+                continue
+            try:
+                accepted = self.__accept(path, lambda: os.stat(path), on_unmodified, on_skipped)
+            except OSError:
+                # The import reports the file that cannot be read
+                accepted = True
+            if accepted:
+                yield path
+
+    def __directory_rules(self, directory: str, relative_directory: str, parent_rules: tuple[_Rule, ...],
+                          directory_rules: dict[str, tuple[_Rule, ...] | None],
+                          name: str | None = None) -> tuple[_Rule, ...] | None:
+        """
+        Looks up the .gitignore rules that apply to the files of a directory.
+
+        Args:
+            directory (str): The root directory.
+            relative_directory (str): The path of the directory relative to the root, "" for the root.
+            parent_rules (tuple[_Rule, ...]): The rules that apply to the parent directory.
+            directory_rules (dict): The rules of the directories already looked up.
+            name (str, optional): The name of the directory, None for the root. Defaults to None.
+
+        Returns:
+            tuple[_Rule, ...]: The rules, None if the directory is pruned, excluded or ignored.
+        """
+        if relative_directory not in directory_rules:
+            if name is not None and (name in self.prune or _matches(self.exclude, relative_directory, True)
+                                     or _matches(parent_rules, relative_directory, True)):
+                directory_rules[relative_directory] = None
+            elif self.gitignore:
+                directory_rules[relative_directory] = parent_rules + self.__read_gitignore(
+                    os.path.join(directory, *relative_directory.split("/")) if name is not None else directory,
+                    relative_directory)
+            else:
+                directory_rules[relative_directory] = parent_rules
+        return directory_rules[relative_directory]
+
+    def __accept(self, path: str, stat: Callable[[], os.stat_result],
+                 on_unmodified: Callable[[str], None] | None, on_skipped: Callable[[str], None] | None) -> bool:
+        """
+        Checks the size and modification time of a file, only reading its status when a limit is set.
+
+        Args:
+            path (str): The path of the file.
+            stat (Callable): The function reading the status of the file.
+            on_unmodified (Callable): The function called with the path of an unmodified file.
+            on_skipped (Callable): The function called with the path of a too large file.
+
+        Returns:
+            bool: True if the file must be imported.
+        """
+        if self.max_file_bytes is None and self.modified_after is None:
+            return True
+        status = stat()
+        if self.max_file_bytes is not None and status.st_size > self.max_file_bytes:
+            logging.warning(f"Skipping markdown file {path} of {status.st_size} bytes, "
+                            + f"larger than {self.max_file_bytes} bytes")
+            self.oversized_files += 1
+            if on_skipped is not None:
+                on_skipped(path)
+            return False
+        if self.modified_after is not None and status.st_mtime < self.modified_after:
+            self.unmodified_files += 1
+            if on_unmodified is not None:
+                on_unmodified(path)
+            return False
+        return True
+
+    @staticmethod
+    def __read_gitignore(directory: str, relative_directory: str) -> tuple[_Rule, ...]:
+        """
+        Reads the rules of the .gitignore file of a directory.
+
+        Args:
+            directory (str): The directory.
+            relative_directory (str): The path of the directory relative to the root.
+
+        Returns:
+            tuple[_Rule, ...]: The rules, empty if the directory has no .gitignore file.
+        """
+        try:
+            with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8") as gitignore_file:
+                rules = (_compile_rule(line, relative_directory) for line in gitignore_file)
+                return tuple(rule for rule in rules if rule is not None)
+        except (FileNotFoundError, NotADirectoryError):
+            return ()
+        except (OSError, UnicodeDecodeError) as e:
+            logging.warning(f"Failed to read the .gitignore file of {directory}: {str(e)}")
+            return ()
+
+
+def iter_markdown_files(directory: str, extension: str = ".md") -> Iterator[str]:
+    """
+    Generator function that lazily yields the markdown files of a directory and its subdirectories.
+    Directories are read one at a time with os.scandir, so memory use does not grow with the size of the tree.
+
+    Args:
+        directory (str): The directory to search for markdown files.
+        extension (str, optional): The extension of the markdown files. Defaults to ".md".
+
+    Yields:
+        str: The file paths of the markdown files.
+    """
+    return FileDiscovery(include=(f"*{extension}",)).iter_files(directory)
@@ -0,0 +1,120 @@
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Iterable, Iterator
+from document_importer.markdown_parser import MarkdownParser
+
+
+def validate_file(parser: MarkdownParser, path: str) -> str | None:
+    """
+    Validates the frontmatter of a markdown document, reading the YAML header block but not the body.
+
+    Args:
+        parser (MarkdownParser): The parser reading the frontmatter.
+        path (str): The path to the markdown document.
+
+    Returns:
+        str: The validation error, None if the frontmatter is valid.
+    """
+    try:
+        parser.validate_front_matter(parser.read_front_matter(path), path)
+    except Exception as e:
+        return str(e)
+    return None
+
+
+def _validate_batch(paths: list[str]) -> list[tuple[str, str]]:
+    """
+    Validates the frontmatter of a batch of markdown documents in a worker process.
+
+    Args:
+        paths (list[str]): The paths to the markdown documents.
+
+    Returns:
+        list: The path and validation error of each invalid document.
+    """
+    parser = MarkdownParser()
+    invalid = []
+    for path in paths:
+        error = validate_file(parser, path)
+        if error is not None:
+            invalid.append((path, error))
+    return invalid
+
+
+def _batches(paths: Iterable[str], batch_size: int) -> Iterator[list[str]]:
+    """
+    Groups paths into batches.
+
+    Args:
+        paths (Iterable[str]): The paths.
+        batch_size (int): The number of paths per batch.
+
+    Yields:
+        list[str]: The batches of paths.
+    """
+    batch: list[str] = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def validate_files(paths: Iterable[str], workers: int = 0, batch_size: int = 256) -> dict[str, Any]:
+    """
+    Validates the frontmatter of markdown documents before they are imported, without reading their bodies or
+    connecting to any service. The paths are consumed lazily and at most two batches per worker are in flight,
+    so memory use does not grow with the number of documents.
+
+    Args:
+        paths (Iterable[str]): The paths to the markdown documents.
+        workers (int, optional): The number of worker processes, 0 validates in the main process. Defaults to 0.
+        batch_size (int, optional): The number of documents validated by a worker at a time. Defaults to 256.
+
+    Returns:
+        dict: The validation report, with the number of documents and the error of every invalid document, in
+            the order of the paths.
+    """
+    start = time.perf_counter()
+    files = 0
+    invalid: list[tuple[str, str]] = []
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            window: deque[Future[list[tuple[str, str]]]] = deque()
+            for batch in _batches(paths, batch_size):
+                files += len(batch)
+                window.append(executor.submit(_validate_batch, batch))
+                if len(window) >= workers * 2:
+                    invalid.extend(window.popleft().result())
+            while window:
+                invalid.extend(window.popleft().result())
+    else:
+        for batch in _batches(paths, batch_size):
+            files += len(batch)
+            invalid.extend(_validate_batch(batch))
+    seconds = time.perf_counter() - start
+    logging.info(f"Validated the frontmatter of {files} markdown files in {seconds:.2f}s")
+    return {
+        "files": files,
+        "valid": files - len(invalid),
+        "invalid": len(invalid),
+        "invalid_files": [{"path": path, "error": error} for path, error in invalid],
+        "seconds": seconds,
+    }
+
+
+def print_validation_report(report: dict[str, Any]) -> None:
+    """
+    Prints a validation report.
+
+    Args:
+        report (dict): The validation report.
+    """
+    print(f"Validated the frontmatter of {report['files']} markdown files in {report['seconds']:.2f}s: "
+          + f"{report['valid']} valid, {report['invalid']} invalid.")
+    for invalid_file in report["invalid_files"]:
+        print(f"Invalid markdown file {invalid_file['path']}: {invalid_file['error']}")
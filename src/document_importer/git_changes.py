@@ -0,0 +1,119 @@
+import os
+import subprocess
+from dataclasses import dataclass, field
+from typing import Iterable, TextIO
+
+
+@dataclass
+class FileChanges:
+    """
+    The markdown files changed between two revisions: the files to import and the sources to remove.
+    Renamed files are imported under their new path and removed under their old path.
+    """
+    changed: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+
+
+def git_changes(directory: str, revision_range: str, extension: str = ".md") -> FileChanges:
+    """
+    Lists the markdown files of a directory added, modified, renamed or deleted in a revision range with
+    git diff, without walking the directory.
+
+    Args:
+        directory (str): The directory of the markdown documents, inside a git work tree.
+        revision_range (str): The revisions to compare, for example HEAD~1..HEAD, or a single revision to
+            compare with the work tree.
+        extension (str, optional): The extension of the markdown files. Defaults to ".md".
+
+    Returns:
+        FileChanges: The changed and deleted files, as paths under the directory.
+
+    Raises:
+        RuntimeError: If git fails, for example because the revision is unknown.
+    """
+    command = ["git", "-C", directory, "diff", "--name-status", "-z", "-M", "--relative", revision_range, "--"]
+    try:
+        process = subprocess.run(command, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", None)
+        message = stderr.decode("utf-8", errors="replace").strip() if stderr else str(e)
+        raise RuntimeError(f"Failed to list the changes of {revision_range} in {directory}: {message}")
+    fields = process.stdout.decode("utf-8", errors="surrogateescape").split("\0")
+    entries = []
+    position = 0
+    while position < len(fields) and fields[position]:
+        status = fields[position]
+        # Renames and copies are followed by the old and the new path, other changes by one path
+        path_count = 2 if status[0] in "RC" else 1
+        entries.append((status, fields[position + 1:position + 1 + path_count]))
+        position += 1 + path_count
+    return _file_changes(entries, directory, extension)
+
+
+def read_change_list(stream: TextIO, directory: str, extension: str = ".md") -> FileChanges:
+    """
+    Reads the changed files from the output of git diff --name-status --relative, run in the directory, or
+    from a list of paths relative to the directory, one per line. A listed path that no longer exists is
+    removed, any other listed path is imported.
+
+    Args:
+        stream (TextIO): The change list, for example sys.stdin.
+        directory (str): The directory of the markdown documents.
+        extension (str, optional): The extension of the markdown files. Defaults to ".md".
+
+    Returns:
+        FileChanges: The changed and deleted files, as paths under the directory.
+    """
+    entries = []
+    for line in stream:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        columns = line.split("\t")
+        if len(columns) == 1:
+            path = _unquote(columns[0].strip())
+            status = "M" if os.path.exists(_source(directory, path)) else "D"
+            entries.append((status, [path]))
+        else:
+            entries.append((columns[0], [_unquote(column) for column in columns[1:]]))
+    return _file_changes(entries, directory, extension)
+
+
+def _file_changes(entries: Iterable[tuple[str, list[str]]], directory: str, extension: str) -> FileChanges:
+    """
+    Converts name-status entries to the changed and deleted markdown files.
+    """
+    changed: dict[str, None] = {}
+    deleted: dict[str, None] = {}
+    for status, paths in entries:
+        kind = status[0]
+        if kind == "D":
+            deleted[paths[0]] = None
+        elif kind == "R":
+            deleted[paths[0]] = None
+            changed[paths[1]] = None
+        elif kind == "C":
+            changed[paths[1]] = None
+        elif kind in "AMTU":
+            changed[paths[0]] = None
+    return FileChanges(
+        changed=[_source(directory, path) for path in changed if path.endswith(extension)],
+        deleted=[_source(directory, path) for path in deleted
+                 if path.endswith(extension) and path not in changed],
+    )
+
+
+def _source(directory: str, path: str) -> str:
+    """
+    Joins a path relative to the directory, as printed by git, in the same form as the discovered files.
+    """
+    return os.path.join(directory, *path.split("/"))
+
+
+def _unquote(path: str) -> str:
+    """
+    Decodes a path that git quoted because it contains special characters.
+    """
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+    return path[1:-1].encode("latin-1").decode("unicode_escape").encode("latin-1").decode("utf-8")
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any
+
+
+class ImportState:
+    """
+    A class that keeps track of the content hash of every imported markdown file so that unchanged files
+    can be skipped by incremental imports. The state can be shared by the importers of several repositories, the
+    files are recorded per repository and imported directory so that importing another directory of a repository
+    never sees the files of the first one as deleted.
+    """
+    VERSION: int = 2
+
+    def __init__(self, path: str):
+        """
+        Initializes a new instance of the ImportState class and loads the state file if it exists.
+
+        Args:
+            path (str): The path to the JSON state file.
+        """
+        self.path: str = path
+        self.files: dict[str, dict[str, dict[str, Any]]] = {}
+        # The files of version 1 state files were recorded per repository only, they are adopted by the first
+        # import of the directory they are under
+        self.legacy_files: dict[str, dict[str, dict[str, Any]]] = {}
+        self.__lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as state_file:
+                state = json.load(state_file)
+            if state.get("version") == self.VERSION:
+                self.files = state.get("files", {})
+                self.legacy_files = state.get("legacy_files", {})
+            elif state.get("version") == 1:
+                self.legacy_files = state.get("files", {})
+            else:
+                logging.warning(f"Ignoring import state {path} with unsupported version {state.get('version')}")
+        file_count = sum(len(v) for v in self.files.values()) + sum(len(v) for v in self.legacy_files.values())
+        logging.info(f"Import state loaded from {path}: {file_count} files")
+
+    @staticmethod
+    def scope(repository: str, directory: str) -> str:
+        """
+        Returns the key of the files imported from a directory of a repository.
+
+        Args:
+            repository (str): The repository name.
+            directory (str): The imported directory, every spelling of the same directory has the same key.
+
+        Returns:
+            str: The key of the files.
+        """
+        return f"{repository}:{os.path.abspath(directory)}"
+
+    @staticmethod
+    def is_under(source: str, directory: str) -> bool:
+        """
+        Checks if a source path is under a directory.
+
+        Args:
+            source (str): The source path of the markdown document.
+            directory (str): The directory.
+
+        Returns:
+            bool: True if the source is under the directory.
+        """
+        root = os.path.abspath(directory)
+        try:
+            return os.path.commonpath([root, os.path.abspath(source)]) == root
+        except ValueError:
+            # The paths are on different drives
+            return False
+
+    @staticmethod
+    def hash_file(path: str, block_size: int = 65536) -> str:
+        """
+        Computes the SHA-256 hash of the content of a file.
+
+        Args:
+            path (str): The path to the file.
+            block_size (int, optional): The number of bytes read at a time. Defaults to 65536.
+
+        Returns:
+            str: The hexadecimal digest of the file content.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def is_unchanged(self, repository: str, directory: str, source: str, file_hash: str, chunk_size: int,
+                     chunk_overlap: int, tokenizer: str | None = None) -> bool:
+        """
+        Checks if a file was already imported with the same content and chunking parameters.
+
+        Args:
+            repository (str): The repository name.
+            directory (str): The imported directory.
+            source (str): The source path of the markdown document.
+            file_hash (str): The hash of the current content of the file.
+            chunk_size (int): The chunk size used for the import.
+            chunk_overlap (int): The chunk overlap used for the import.
+            tokenizer (str, optional): The tokenizer measuring the chunks, None for characters. Defaults to None.
+
+        Returns:
+            bool: True if the file can be skipped, False otherwise.
+        """
+        entry = self.files.get(self.scope(repository, directory), {}).get(source)
+        if entry is None and self.is_under(source, directory):
+            entry = self.legacy_files.get(repository, {}).get(source)
+        if entry is None:
+            return False
+        # Entries recorded before the tokenizer was tracked do not tell how their chunks were measured
+        return (entry.get("hash") == file_hash
+                and entry.get("chunk_size") == chunk_size
+                and entry.get("chunk_overlap") == chunk_overlap
+                and "tokenizer" in entry and entry["tokenizer"] == tokenizer)
+
+    def record(self, repository: str, directory: str, source: str, file_hash: str, chunk_size: int,
+               chunk_overlap: int, tokenizer: str | None = None) -> None:
+        """
+        Records a successfully imported file.
+
+        Args:
+            repository (str): The repository name.
+            directory (str): The imported directory.
+            source (str): The source path of the markdown document.
+            file_hash (str): The hash of the imported content of the file.
+            chunk_size (int): The chunk size used for the import.
+            chunk_overlap (int): The chunk overlap used for the import.
+            tokenizer (str, optional): The tokenizer measuring the chunks, None for characters. Defaults to None.
+        """
+        with self.__lock:
+            self.files.setdefault(self.scope(repository, directory), {})[source] = {
+                "hash": file_hash,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "tokenizer": tokenizer,
+            }
+            self.__remove_legacy(repository, source)
+
+    def remove(self, repository: str, directory: str, source: str) -> None:
+        """
+        Removes a file from the state.
+
+        Args:
+            repository (str): The repository name.
+            directory (str): The imported directory.
+            source (str): The source path of the markdown document.
+        """
+        with self.__lock:
+            self.files.get(self.scope(repository, directory), {}).pop(source, None)
+            self.__remove_legacy(repository, source)
+
+    def sources(self, repository: str, directory: str) -> set[str]:
+        """
+        Returns the sources recorded for a directory of a repository.
+
+        Args:
+            repository (str): The repository name.
+            directory (str): The imported directory.
+
+        Returns:
+            set[str]: The recorded source paths under the directory.
+        """
+        with self.__lock:
+            sources = set(self.files.get(self.scope(repository, directory), {}).keys())
+            sources.update(self.legacy_files.get(repository, {}).keys())
+        return {source for source in sources if self.is_under(source, directory)}
+
+    def save(self) -> None:
+        """
+        Writes the state to disk. The file is replaced atomically so an interrupted run never leaves
+        a truncated state file behind.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with self.__lock:
+            with open(temporary_path, "w", encoding="utf-8") as state_file:
+                json.dump({"version": self.VERSION, "files": self.files, "legacy_files": self.legacy_files},
+                          state_file, indent=2, sort_keys=True)
+            os.replace(temporary_path, self.path)
+        logging.info(f"Import state saved to {self.path}")
+
+    def __remove_legacy(self, repository: str, source: str) -> None:
+        """
+        Removes a file from the files of a version 1 state file, the caller holds the lock.
+
+        Args:
+            repository (str): The repository name.
+            source (str): The source path of the markdown document.
+        """
+        legacy_sources = self.legacy_files.get(repository)
+        if legacy_sources is not None:
+            legacy_sources.pop(source, None)
+            if len(legacy_sources) == 0:
+                del self.legacy_files[repository]
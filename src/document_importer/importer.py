@@ -1,18 +1,57 @@
-import os
+import asyncio
 import logging
-from document_importer.vector_search import VectorSearch
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Iterator
 from document_importer.markdown_parser import MarkdownParser
-from document_importer.document_manager import DocumentManager
+from document_importer.import_state import ImportState
+from document_importer.pipeline import BatchingStage, ImportPipeline, FileTask
+from document_importer.embedding_batcher import EmbeddingBatcher, chunks_to_embed
+from document_importer.async_batcher import AsyncBatcher
+from document_importer.upload_batcher import UploadBatcher
+from document_importer.clean_batcher import CleanBatcher
+from document_importer.diff_batcher import DiffBatcher
+from document_importer.checkpoint_journal import CheckpointStage
+from document_importer.chunk_record import FIELD_KEYS
+from document_importer.shared_clients import SharedClients
+from document_importer.file_discovery import FileDiscovery
+from document_importer.git_changes import FileChanges
+from document_importer.parse_pool import ParsePool
+from document_importer.metrics import Metrics
+from document_importer.index_verification import verify_index, print_verification
 
 
 class Importer:
-    def __init__(self, config: dict, repository: str, directory: str) -> None:
+    def __init__(self, config: dict, repository: str, directory: str,
+                 incremental: bool = False, state_path: str = ".import_state.json", workers: int = 1,
+                 parse_workers: int = 0, upsert: bool = False, changes: FileChanges | None = None,
+                 checkpoint_path: str | None = None, resume: bool = False,
+                 shared: SharedClients | None = None, discovery: FileDiscovery | None = None) -> None:
         """
         Initializes an instance of the Importer class.
         Args:
             config (dict): The configuration dictionary.
             repository (str): The repository name.
             directory (str): The directory path.
+            incremental (bool): Only import new or changed files and remove deleted files (default: False).
+            state_path (str): The path to the import state file used by incremental imports.
+            workers (int): The number of concurrent workers of each import stage, 1 imports files sequentially.
+            parse_workers (int): The number of processes parsing markdown files, 0 parses in the main process.
+            upsert (bool): Compare the chunks of each file with its indexed chunks, embedding and uploading only the
+                added chunks and deleting only the removed chunks, instead of replacing all of them (default: False).
+            changes (FileChanges): Only import the changed files accepted by the discovery filters and remove the
+                deleted files, instead of walking the directory (default: None).
+            checkpoint_path (str): The path to the checkpoint journal recording the progress of every file, no
+                journal is kept when None (default: None).
+            resume (bool): Resume the import recorded in the checkpoint journal, skipping the files already
+                uploaded and reusing the vectors already computed, instead of starting over (default: False).
+            shared (SharedClients): The clients, import state, checkpoint journal and budget of files in flight
+                shared with the importers of other repositories, which replace the incremental, state_path and
+                checkpoint_path settings. The importer creates its own clients when None (default: None).
+            discovery (FileDiscovery): The filters of the markdown files found in the directory (default: the
+                DISCOVERY_* settings).
         """
         # Load the environment variables
         self.config: dict = config
@@ -21,54 +60,571 @@ class Importer:
         self.__check_environment_variable("AZURE_OPENAI_API_KEY")
         self.__check_environment_variable("AZURE_OPENAI_API_VERSION")
         self.__check_environment_variable("AZURE_DEPLOYMENT")
-        self.__check_environment_variable("VECTOR_STORE_ADDRESS")
-        self.__check_environment_variable("VECTOR_STORE_PASSWORD")
+        if (config.get("VECTOR_STORE_BACKEND") or "azure").lower() != "local":
+            self.__check_environment_variable("VECTOR_STORE_ADDRESS")
+            self.__check_environment_variable("VECTOR_STORE_PASSWORD")
         self.__check_environment_variable("INDEX_NAME")
         # Set the parameters
-        self.vector_search = VectorSearch(config)
-        self.document_manager = DocumentManager(config)
-        self.markdown_parser = MarkdownParser()
+        self.owns_clients: bool = shared is None
+        self.shared: SharedClients = shared or SharedClients.from_config(
+            config, incremental=incremental, state_path=state_path, checkpoint_path=checkpoint_path)
+        # Importers sharing their clients keep their own metrics, the shared clients record into the shared ones
+        self.metrics: Metrics = self.shared.metrics if self.owns_clients else Metrics()
+        self.search_rate_limiter = self.shared.search_rate_limiter
+        self.vector_search = self.shared.vector_search
+        self.document_manager = self.shared.document_manager
+        # Chunk sizes are measured in tokens of the CHUNK_TOKENIZER encoding when set, else in characters
+        self.chunk_tokenizer: str | None = config.get("CHUNK_TOKENIZER") or None
+        self.markdown_parser = MarkdownParser(metrics=self.metrics, tokenizer=self.chunk_tokenizer)
         self.directory: str = directory
         self.repository: str = repository
-        self.chunk_size: int = 1000
-        self.chunk_overlap: int = 0
+        self.chunk_size: int = int(config.get("CHUNK_SIZE") or (512 if self.chunk_tokenizer else 1000))
+        self.chunk_overlap: int = int(config.get("CHUNK_OVERLAP") or 0)
         self.failed_files: list[str] = []
         self.succeed_files: list[str] = []
         self.total_chunks: int = 0
+        # Number of chunks of every file imported by the run, compared with the index by verify
+        self.imported_chunks: dict[str, int] = {}
+        self.verification: dict[str, Any] | None = None
         self.succeed_cleaning: int = 0
-        self.file_paths: list[str] = []
+        self.total_files: int = 0
+        # Sources found in the directory, only tracked by incremental imports to detect deleted files
+        self.found_sources: set[str] = set()
+        self.skipped_files: list[str] = []
+        self.deleted_files: list[str] = []
+        self.import_state: ImportState | None = self.shared.import_state
+        self.workers: int = workers
+        self.parse_workers: int = parse_workers
+        self.upsert: bool = upsert
+        self.changes: FileChanges | None = changes
+        self.discovery: FileDiscovery = discovery or FileDiscovery.from_config(config)
+        self.diff_batcher: DiffBatcher = self.__diff_batcher()
+        self.checkpoint_journal = self.shared.checkpoint_journal
+        if resume and self.checkpoint_journal is None:
+            raise ValueError("Resuming an import requires a checkpoint journal")
+        # Files holding a slot of the shared budget of files in flight
+        self.__budgeted: set[int] = set()
+        self.resume: bool = resume
+        self.resumed_files: list[str] = []
+        self.resumed_vectors: int = 0
+        self.parse_pool: ParsePool | None = None
+        self.pipeline: ImportPipeline | None = None
+        # Stage durations of the async import, the threaded import records them in its pipeline
+        self.async_durations: dict[str, list[float]] = {}
+        self.async_max_files: int = int(config.get("ASYNC_MAX_FILES") or 256)
+        # Batchers of the async import, their batches are only sent from the event loop of arun
+        self.__clean_batcher = AsyncBatcher(self.__aclean_sources,
+                                            max_items=int(config.get("CLEAN_BATCH_SIZE") or 100))
+        self.__lookup_batcher = AsyncBatcher(self.__alookup_sources,
+                                             max_items=int(config.get("CLEAN_BATCH_SIZE") or 100))
+        self.__embedding_batcher = AsyncBatcher(
+            self.vector_search.aembed_chunks,
+            max_items=int(config.get("EMBEDDING_BATCH_MAX_ITEMS") or 16),
+            max_weight=int(config.get("EMBEDDING_BATCH_MAX_TOKENS") or 32000),
+            weight=lambda chunk: chunk[1],
+        )
+        self.__upload_batcher = AsyncBatcher(self.__aupload_documents,
+                                             max_items=self.vector_search.upload_batch_size)
+        self.started_at: datetime | None = None
+        self.run_seconds: float = 0.0
+        self.pre_import_index_stats: dict[str, Any] | None = None
+        self.post_import_index_stats: dict[str, Any] | None = None
+        self.__lock = threading.Lock()
 
     def run(self) -> None:
         """
         Runs the import process.
         """
-        # Get all the markdown files
-        logging.info("-----------------Getting Markdown Files-----------------")
-        self.file_paths = list(self.__get_all_files(self.directory))
-        logging.info(f"Found {len(self.file_paths)} markdown files in directory {self.directory}...")
-        logging.info(f"Files: {self.file_paths}")
+        self.started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            self.__run()
+        finally:
+            self.__end_run(start)
+
+    async def arun(self) -> None:
+        """
+        Runs the import process in the running event loop. The files are imported by coroutines whose chunks
+        are batched into async embedding and upload requests, so hundreds of requests stay in flight from
+        one thread.
+        """
+        self.started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            await self.__arun()
+        finally:
+            self.__end_run(start)
+            if self.owns_clients:
+                await self.vector_search.aclose()
+                session = self.document_manager.async_session
+                if session is not None and session is not self.vector_search.async_session:
+                    await session.close()
+
+    def run_report(self) -> dict[str, Any]:
+        """
+        Builds the machine-readable report of the last run.
+
+        Returns:
+            dict: The run summary, the index statistics before and after the import, and the metrics.
+        """
+        return {
+            "repository": self.repository,
+            "directory": self.directory,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "seconds": self.run_seconds,
+            "files": {
+                "found": self.total_files,
+                "succeeded": len(self.succeed_files),
+                "failed": len(self.failed_files),
+                "skipped": len(self.skipped_files),
+                "deleted": len(self.deleted_files),
+                "resumed": len(self.resumed_files),
+            },
+            "chunks": self.total_chunks,
+            "failed_files": list(self.failed_files),
+            "index_statistics": {
+                "before": self.pre_import_index_stats,
+                "after": self.post_import_index_stats,
+            },
+            "verification": self.verification,
+            "metrics": self.metrics.snapshot(),
+        }
+
+    def verify(self) -> dict[str, Any]:
+        """
+        Verifies that the index holds the chunks of every markdown file of the directory, comparing the chunk
+        counts of a facet query with the local parse. The files imported by the last run are not parsed again.
+
+        Returns:
+            dict: The verification report, see index_verification.compare_chunk_counts.
+        """
+        logging.info("-----------------Verifying the Index-----------------")
+        # A separate parser keeps the parse metrics of the import unchanged
+        parser = MarkdownParser(tokenizer=self.chunk_tokenizer)
+        expected: dict[str, int] = {}
+        unmodified: list[str] = []
+        for file_path in self.discovery.iter_files(self.directory, on_unmodified=unmodified.append):
+            self.__count_expected_chunks(parser, file_path, expected)
+        for file_path in unmodified:
+            self.__count_expected_chunks(parser, file_path, expected)
+        self.verification = verify_index(self.document_manager, self.repository, expected)
+        print_verification(self.verification)
+        self.metrics.observe("verify.run", self.verification["seconds"])
+        self.metrics.increment("verify.sources_missing", len(self.verification["missing_sources"]))
+        self.metrics.increment("verify.sources_mismatched", len(self.verification["mismatched_sources"]))
+        self.metrics.increment("verify.chunks_orphaned", self.verification["orphaned_chunks"])
+        return self.verification
+
+    def __count_expected_chunks(self, parser: MarkdownParser, file_path: str, expected: dict[str, int]) -> None:
+        """
+        Counts the chunks a markdown file should have in the index.
+        Args:
+            parser (MarkdownParser): The parser of the files that were not imported by the last run.
+            file_path (str): The path of the file.
+            expected (dict[str, int]): The number of chunks of each file, updated in place.
+        """
+        if file_path in self.imported_chunks:
+            expected[file_path] = self.imported_chunks[file_path]
+            return
+        try:
+            expected[file_path] = sum(1 for _ in parser.iter_chunks(
+                file_path, repository=self.repository, chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap))
+        except Exception as e:
+            # Files that cannot be parsed cannot be imported either, their chunks are not expected
+            logging.debug(f"Not verifying markdown file {file_path}: {str(e)}")
+
+    def __end_run(self, start: float) -> None:
+        """
+        Records the metrics of a run and releases its budget slots and checkpoint journal.
+        Args:
+            start (float): The performance counter value at the start of the run.
+        """
+        self.run_seconds = time.perf_counter() - start
+        self.metrics.observe("import.run", self.run_seconds)
+        self.__record_metrics()
+        if self.shared.budget is not None:
+            for _ in range(len(self.__budgeted)):
+                self.shared.budget.release()
+        self.__budgeted.clear()
+        if self.owns_clients and self.checkpoint_journal is not None:
+            self.checkpoint_journal.close()
+
+    def __start_import(self) -> None:
+        """
+        Gets the pre-import statistics and starts the checkpoint journal over unless the import is resumed.
+        """
         logging.info("-----------------Getting Pre-import Statistics-----------------")
         self.pre_import_index_stats = self.document_manager.get_document_store_statistics()
+        if self.checkpoint_journal is not None and not self.resume:
+            self.checkpoint_journal.clear(self.repository)
         logging.info("-----------------Starting Importing Files-----------------")
-        for file_path in self.file_paths:
-            try:
-                logging.info(f"Loading document {self.repository}:{file_path}...")
-                docs = self.markdown_parser.parse(file_path, repository=self.repository,
-                                                  chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
-                page_contents = docs.get("page_contents")
-                page_metadatas = docs.get("page_metadatas")
-                if self.document_manager.clean_document(self.repository, file_path):
-                    self.succeed_cleaning += 1
-                self.vector_search.load_chunks(page_contents, page_metadatas)
-                self.succeed_files.append(file_path)
-                self.total_chunks += len(page_contents)
-            except Exception as e:
-                logging.error(f"Failed to load document {file_path}: {str(e)}")
-                self.failed_files.append(file_path)
+
+    def __finish_import(self, embedding_requests: int) -> None:
+        """
+        Removes the deleted files, saves the import state and reports the result of the import.
+        Args:
+            embedding_requests (int): The number of embedding requests sent by the import.
+        """
+        logging.info(f"Found {self.total_files} markdown files in directory {self.directory}...")
+        logging.info(f"Embedded {self.total_chunks} chunks with {embedding_requests} batched requests")
+        if self.changes is not None:
+            logging.info("-----------------Removing Deleted Files-----------------")
+            self.__remove_sources(self.changes.deleted)
+        elif self.import_state is not None:
+            logging.info("-----------------Removing Deleted Files-----------------")
+            # The files the discovery never reached, in pruned or excluded directories or no longer matching
+            # the include patterns, still exist and are kept in the index
+            missing_sources = self.import_state.sources(self.repository, self.directory) - self.found_sources
+            self.__remove_sources(sorted(source for source in missing_sources if not os.path.exists(source)))
+        # Shared state is saved once by SharedClients.close when every repository is imported
+        if self.owns_clients and self.import_state is not None:
+            self.import_state.save()
+        if self.checkpoint_journal is not None and len(self.failed_files) == 0:
+            # A completed import leaves nothing to resume, failed files stay journaled for the next --resume
+            self.checkpoint_journal.clear(self.repository)
+        if self.owns_clients and self.vector_search.local_store is not None:
+            self.vector_search.local_store.save()
         logging.info("-----------------Importing files completed-----------------")
         logging.info("-----------------Getting Post-import Statistics-----------------")
         self.post_import_index_stats = self.__report_result(self.pre_import_index_stats)
 
+    def __run(self) -> None:
+        """
+        Runs the import stages.
+        """
+        self.__start_import()
+        clean_batcher = CleanBatcher(lambda sources: self.document_manager.clean_documents(self.repository, sources),
+                                     batch_size=int(self.config.get("CLEAN_BATCH_SIZE") or 100))
+        embedding_batcher = EmbeddingBatcher(
+            self.vector_search.embed_chunks,
+            max_items=int(self.config.get("EMBEDDING_BATCH_MAX_ITEMS") or 16),
+            max_tokens=int(self.config.get("EMBEDDING_BATCH_MAX_TOKENS") or 32000),
+        )
+        upload_batcher = UploadBatcher(self.__build_documents, self.vector_search.bulk_index,
+                                       batch_size=self.vector_search.upload_batch_size)
+        clean_stage: BatchingStage = self.diff_batcher if self.upsert else clean_batcher
+        embed_stage: BatchingStage = embedding_batcher
+        if self.checkpoint_journal is not None:
+            cleaned = "diffed" if self.upsert else "cleaned"
+            clean_stage = CheckpointStage(clean_stage, lambda task: self.__checkpoint(task, cleaned))
+            embed_stage = CheckpointStage(embed_stage, lambda task: self.__checkpoint(task, "embedded"))
+        self.pipeline = pipeline = ImportPipeline([
+            ("parse", self.__parse_file, self.workers),
+            ("diff" if self.upsert else "clean", clean_stage, self.workers),
+            ("embed", embed_stage, self.workers),
+            ("upload", upload_batcher, self.workers),
+        ], queue_size=self.workers * 2)
+        tasks = self.__start_tasks()
+        try:
+            # The inline pipeline only flushes its batching stages at the end, it would hold budget slots forever
+            if self.workers > 1 or self.shared.budget is not None:
+                pipeline.run(tasks, on_success=self.__complete_file, on_failure=self.__fail_file)
+            else:
+                pipeline.run_inline(tasks, on_success=self.__complete_file, on_failure=self.__fail_file)
+        finally:
+            if self.parse_pool is not None:
+                self.parse_pool.close()
+                self.parse_pool = None
+        self.succeed_cleaning += clean_batcher.succeeded
+        self.__finish_import(embedding_batcher.requests)
+
+    async def __arun(self) -> None:
+        """
+        Runs the import of every file in its own coroutine, at most ASYNC_MAX_FILES files at a time.
+        """
+        await asyncio.to_thread(self.__start_import)
+        semaphore = asyncio.Semaphore(self.async_max_files)
+        running: set[asyncio.Task[None]] = set()
+        tasks = self.__start_tasks()
+        try:
+            while True:
+                await semaphore.acquire()
+                # Discovering a file may hash it or wait for a slot of the shared budget, it runs in a thread
+                task = await asyncio.to_thread(next, tasks, None)
+                if task is None:
+                    semaphore.release()
+                    break
+                coroutine = asyncio.create_task(self.__aimport_file(task))
+                running.add(coroutine)
+                coroutine.add_done_callback(running.discard)
+                coroutine.add_done_callback(lambda _: semaphore.release())
+            await asyncio.gather(*running)
+        finally:
+            if self.parse_pool is not None:
+                self.parse_pool.close()
+                self.parse_pool = None
+        await asyncio.to_thread(self.__finish_import, self.__embedding_batcher.requests)
+
+    async def __aimport_file(self, task: FileTask) -> None:
+        """
+        Imports a markdown file with the async clients, the failures are recorded instead of raised.
+        Args:
+            task (FileTask): The file to import.
+        """
+        try:
+            await self.__astage("parse", asyncio.to_thread(self.__parse_file, task))
+            if self.upsert:
+                indexed = await self.__astage("diff", self.__lookup_batcher.submit([task.file_path]))
+                self.diff_batcher.diff_task(task, indexed[0])
+            else:
+                cleaned = await self.__astage("clean", self.__clean_batcher.submit([task.file_path]))
+                if cleaned[0]:
+                    with self.__lock:
+                        self.succeed_cleaning += 1
+            if self.checkpoint_journal is not None:
+                self.__checkpoint(task, "diffed" if self.upsert else "cleaned")
+            chunks = chunks_to_embed(task)
+            vectors = await self.__astage("embed", self.__embedding_batcher.submit(
+                [(task.page_contents[index], tokens) for index, tokens in chunks]))
+            for (index, _), vector in zip(chunks, vectors):
+                task.vectors[index] = vector
+            if self.checkpoint_journal is not None:
+                self.__checkpoint(task, "embedded")
+            documents = self.__build_documents(task)
+            errors = [error for error in await self.__astage("upload", self.__upload_batcher.submit(documents))
+                      if error is not None]
+            if errors:
+                raise RuntimeError(f"Failed to upload {len(errors)}/{len(documents)} chunks: " + errors[0])
+        except Exception as e:
+            self.__fail_file(task, e)
+            return
+        self.__complete_file(task)
+
+    async def __astage(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        """
+        Awaits a stage of the async import of a file and records its duration.
+        Args:
+            name (str): The name of the stage.
+            awaitable: The stage to await.
+        Returns:
+            The result of the stage.
+        """
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.async_durations.setdefault(name, []).append(time.perf_counter() - start)
+
+    async def __aclean_sources(self, sources: list[str]) -> list[bool]:
+        """
+        Cleans the older documents of a batch of files with the async search client.
+        Args:
+            sources (list[str]): The sources of the files.
+        Returns:
+            list[bool]: Whether the documents of each file were cleaned.
+        """
+        cleaned = await self.document_manager.aclean_documents(self.repository, sources)
+        return [cleaned.get(source, False) for source in sources]
+
+    async def __alookup_sources(self, sources: list[str]) -> list[list[dict[str, Any]]]:
+        """
+        Retrieves the indexed chunks of a batch of files with the async search client.
+        Args:
+            sources (list[str]): The sources of the files.
+        Returns:
+            list[list[dict]]: The indexed chunks of each file.
+        """
+        indexed = await self.document_manager.aget_document_chunks(self.repository, sources,
+                                                                   select=["id", "metadata", *FIELD_KEYS])
+        return [indexed.get(source, []) for source in sources]
+
+    async def __aupload_documents(self, documents: list[dict[str, Any]]) -> list[str | None]:
+        """
+        Uploads a batch of documents with the async search client.
+        Args:
+            documents (list): The search documents, with their indexing action.
+        Returns:
+            list: The error message of each document, None when it was uploaded.
+        """
+        result = await self.vector_search.abulk_index(documents)
+        return [result.failed.get(key) for key in result.keys]
+
+    def __diff_batcher(self) -> DiffBatcher:
+        """
+        Creates the batcher diffing the chunks of the files with their indexed chunks.
+        Returns:
+            DiffBatcher: The diff batcher.
+        """
+        return DiffBatcher(
+            lambda sources: self.document_manager.get_document_chunks(self.repository, sources,
+                                                                      select=["id", "metadata", *FIELD_KEYS]),
+            batch_size=int(self.config.get("CLEAN_BATCH_SIZE") or 100),
+        )
+
+    def __start_tasks(self) -> Iterator[FileTask]:
+        """
+        Starts discovering the files to import, and parsing them in the parse pool when parse_workers is set.
+        Returns:
+            The iterator of the tasks of the files to import.
+        """
+        tasks = self.__get_tasks()
+        if self.parse_workers > 0:
+            self.parse_pool = ParsePool(self.parse_workers, self.repository, self.chunk_size, self.chunk_overlap,
+                                        metrics=self.metrics, tokenizer=self.chunk_tokenizer)
+            tasks = self.parse_pool.submit(tasks)
+        return tasks
+
+    def __get_tasks(self) -> Iterator[FileTask]:
+        """
+        Generator function that lazily yields a task for every markdown file that needs to be imported.
+        Yields:
+            The tasks of the files to import.
+        """
+        if self.changes is not None:
+            file_paths = self.discovery.filter_paths(self.directory, self.changes.changed,
+                                                     on_unmodified=self.__skip_unmodified,
+                                                     on_skipped=self.__skip_filtered)
+        else:
+            file_paths = self.discovery.iter_files(self.directory, on_unmodified=self.__skip_unmodified,
+                                                   on_skipped=self.__skip_filtered)
+        for file_path in file_paths:
+            self.total_files += 1
+            logging.debug(f"Found markdown file {file_path}")
+            task = FileTask(file_path)
+            if self.import_state is not None or self.checkpoint_journal is not None:
+                if self.import_state is not None:
+                    self.found_sources.add(file_path)
+                try:
+                    file_hash = ImportState.hash_file(file_path)
+                except Exception as e:
+                    self.__fail_file(task, e)
+                    continue
+                task.file_hash = file_hash
+                if self.import_state is not None and self.import_state.is_unchanged(
+                        self.repository, self.directory, file_path, file_hash, self.chunk_size, self.chunk_overlap,
+                        self.chunk_tokenizer):
+                    logging.info(f"Skipping unchanged document {self.repository}:{file_path}...")
+                    self.skipped_files.append(file_path)
+                    continue
+                if self.resume and self.checkpoint_journal is not None and self.checkpoint_journal.stage(
+                        self.repository, file_path, file_hash, self.chunk_size, self.chunk_overlap,
+                        self.chunk_tokenizer) == "uploaded":
+                    logging.info(f"Skipping document {self.repository}:{file_path} uploaded before the "
+                                 + "interruption...")
+                    self.resumed_files.append(file_path)
+                    continue
+            if self.shared.budget is not None:
+                self.shared.budget.acquire(self.repository)
+                with self.__lock:
+                    self.__budgeted.add(id(task))
+            yield task
+
+    def __skip_unmodified(self, file_path: str) -> None:
+        """
+        Records a markdown file skipped by discovery because it was not modified since the requested time.
+        Args:
+            file_path (str): The path of the file.
+        """
+        self.total_files += 1
+        # The file still exists, incremental imports must not remove it from the index
+        if self.import_state is not None:
+            self.found_sources.add(file_path)
+        self.skipped_files.append(file_path)
+
+    def __skip_filtered(self, file_path: str) -> None:
+        """
+        Records a markdown file skipped by discovery because it is excluded, ignored or too large.
+        Args:
+            file_path (str): The path of the file.
+        """
+        # The file still exists, incremental imports must not remove it from the index
+        if self.import_state is not None:
+            self.found_sources.add(file_path)
+
+    def __parse_file(self, task: FileTask) -> None:
+        """
+        Parses a markdown file into chunks.
+        Args:
+            task (FileTask): The file to parse.
+        """
+        logging.info(f"Loading document {self.repository}:{task.file_path}...")
+        if self.parse_pool is not None and task.parse_result is not None:
+            self.parse_pool.collect(task)
+        else:
+            docs = self.markdown_parser.parse(task.file_path, repository=self.repository,
+                                              chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+            task.page_contents = docs["page_contents"]
+            task.page_metadatas = docs["page_metadatas"]
+        if self.checkpoint_journal is not None:
+            if self.resume:
+                vectors = self.checkpoint_journal.get_vectors(self.repository, task.file_path, task.page_contents)
+                restored = sum(1 for vector in vectors if vector is not None)
+                if restored > 0:
+                    task.vectors = vectors
+                    with self.__lock:
+                        self.resumed_vectors += restored
+            self.__checkpoint(task, "parsed")
+
+    def __checkpoint(self, task: FileTask, stage: str) -> None:
+        """
+        Records the last stage a markdown file completed in the checkpoint journal.
+        Args:
+            task (FileTask): The file.
+            stage (str): The completed stage.
+        """
+        assert self.checkpoint_journal is not None and task.file_hash is not None, "Checkpointed files are hashed"
+        embedded = stage == "embedded"
+        try:
+            self.checkpoint_journal.record(self.repository, task.file_path, task.file_hash, self.chunk_size,
+                                           self.chunk_overlap, stage, texts=task.page_contents if embedded else None,
+                                           vectors=task.vectors if embedded else None, tokenizer=self.chunk_tokenizer)
+        except Exception as e:
+            # The file is only imported again from the start when the import is resumed
+            logging.warning(f"Failed to record the checkpoint of {task.file_path}: {str(e)}")
+
+    def __build_documents(self, task: FileTask) -> list[dict[str, Any]]:
+        """
+        Builds the search documents of an embedded markdown file.
+        Args:
+            task (FileTask): The embedded file.
+        Returns:
+            list: The search documents, with their indexing action.
+        """
+        return self.vector_search.build_documents(task.page_contents, task.page_metadatas, task.vectors,
+                                                  task.chunk_diff)
+
+    def __complete_file(self, task: FileTask) -> None:
+        """
+        Records a markdown file that was imported successfully.
+        Args:
+            task (FileTask): The imported file.
+        """
+        self.__release_budget(task)
+        with self.__lock:
+            self.succeed_files.append(task.file_path)
+            self.total_chunks += len(task.page_contents)
+            self.imported_chunks[task.file_path] = len(task.page_contents)
+            if self.import_state is not None and task.file_hash is not None:
+                self.import_state.record(self.repository, self.directory, task.file_path, task.file_hash,
+                                         self.chunk_size, self.chunk_overlap, self.chunk_tokenizer)
+        if self.checkpoint_journal is not None:
+            self.__checkpoint(task, "uploaded")
+
+    def __fail_file(self, task: FileTask, e: Exception) -> None:
+        """
+        Records a markdown file that failed to import.
+        Args:
+            task (FileTask): The failed file.
+            e (Exception): The cause of the failure.
+        """
+        logging.error(f"Failed to load document {task.file_path}: {str(e)}")
+        self.__release_budget(task)
+        with self.__lock:
+            self.failed_files.append(task.file_path)
+
+    def __release_budget(self, task: FileTask) -> None:
+        """
+        Frees the slot of the shared budget of files in flight held by a finished markdown file.
+        Args:
+            task (FileTask): The finished file.
+        """
+        with self.__lock:
+            if id(task) not in self.__budgeted:
+                return
+            self.__budgeted.discard(id(task))
+        if self.shared.budget is not None:
+            self.shared.budget.release()
+
     def __report_result(self, pre_import_index_stats):
         """
         Reports the import result.
@@ -76,14 +632,79 @@ class Importer:
             pre_import_index_stats: The pre-import index statistics.
         """
         if len(self.failed_files) > 0:
-            print(f"Failed to load {len(self.failed_files)}/{len(self.file_paths)}")
+            print(f"Failed to load {len(self.failed_files)}/{self.total_files}")
             logging.debug(f"Failed files load a total of {self.failed_files} markdown files.")
         if len(self.succeed_files) > 0:
-            print(f"Succeed to load {len(self.succeed_files)}/{len(self.file_paths)} markdown files "
+            print(f"Succeed to load {len(self.succeed_files)}/{self.total_files} markdown files "
                   + f"with a total of {self.total_chunks} chunks "
                   + f"and successful cleaned up {self.succeed_cleaning} older markdown files (if present).")
             logging.debug(f"Succeed files: {self.succeed_files}")
-        self.document_manager.get_document_store_statistics(pre_import_index_stats)
+        if self.import_state is not None:
+            print(f"Skipped {len(self.skipped_files)}/{self.total_files} unchanged markdown files "
+                  + f"and removed {len(self.deleted_files)} deleted markdown files.")
+        elif self.changes is not None:
+            print(f"Removed {len(self.deleted_files)}/{len(self.changes.deleted)} deleted or renamed markdown files.")
+        discovery = self.discovery
+        if discovery.unmodified_files or discovery.ignored_files or discovery.oversized_files:
+            print(f"Discovery skipped {discovery.unmodified_files} unmodified, {discovery.ignored_files} ignored "
+                  + f"and {discovery.oversized_files} oversized markdown files, "
+                  + f"and pruned {discovery.pruned_directories} directories.")
+        if self.resume:
+            print(f"Resumed the interrupted import: skipped {len(self.resumed_files)} markdown files already "
+                  + f"uploaded and reused {self.resumed_vectors} embedded chunks.")
+        if self.upsert:
+            print(f"Upserted chunks: {self.diff_batcher.added} added, {self.diff_batcher.updated} updated, "
+                  + f"{self.diff_batcher.removed} removed, {self.diff_batcher.unchanged} unchanged.")
+        if self.owns_clients:
+            self.shared.print_statistics()
+        return self.document_manager.get_document_store_statistics(pre_import_index_stats)
+
+    def __record_metrics(self) -> None:
+        """
+        Records the stage timings of the pipeline and the file counts in the metrics, and the HTTP requests of
+        the rate limiters and the embedding cache statistics when the clients are not shared.
+        """
+        durations_by_stage = self.pipeline.durations if self.pipeline is not None else self.async_durations
+        for name, durations in durations_by_stage.items():
+            self.metrics.observe_many(f"stage.{name}", durations)
+        self.metrics.increment("import.files", self.total_files)
+        self.metrics.increment("import.files_succeeded", len(self.succeed_files))
+        self.metrics.increment("import.files_failed", len(self.failed_files))
+        self.metrics.increment("import.files_skipped", len(self.skipped_files))
+        self.metrics.increment("import.files_deleted", len(self.deleted_files))
+        self.metrics.increment("import.chunks", self.total_chunks)
+        self.metrics.increment("discovery.directories_pruned", self.discovery.pruned_directories)
+        self.metrics.increment("discovery.files_ignored", self.discovery.ignored_files)
+        self.metrics.increment("discovery.files_oversized", self.discovery.oversized_files)
+        if self.resume:
+            self.metrics.increment("resume.files_skipped", len(self.resumed_files))
+            self.metrics.increment("resume.chunks_reused", self.resumed_vectors)
+        if self.upsert and self.diff_batcher is not None:
+            self.metrics.increment("upsert.chunks_added", self.diff_batcher.added)
+            self.metrics.increment("upsert.chunks_updated", self.diff_batcher.updated)
+            self.metrics.increment("upsert.chunks_removed", self.diff_batcher.removed)
+            self.metrics.increment("upsert.chunks_unchanged", self.diff_batcher.unchanged)
+        if self.owns_clients:
+            self.shared.record_metrics()
+
+    def __remove_sources(self, deleted_sources: list[str]) -> None:
+        """
+        Removes the chunks of deleted or renamed files, and their import state.
+        Args:
+            deleted_sources (list[str]): The sources of the files that no longer exist.
+        """
+        if len(deleted_sources) == 0:
+            return
+        try:
+            cleaned = self.document_manager.clean_documents(self.repository, deleted_sources)
+        except Exception as e:
+            logging.error(f"Failed to remove {len(deleted_sources)} deleted documents: {str(e)}")
+            return
+        for source in deleted_sources:
+            if cleaned.get(source):
+                if self.import_state is not None:
+                    self.import_state.remove(self.repository, self.directory, source)
+                self.deleted_files.append(source)
 
     def __check_environment_variable(self, environment_variable: str) -> None:
         """
@@ -95,16 +716,3 @@ class Importer:
         """
         if not self.config.get(environment_variable):
             raise ValueError(f"Required environment variable {environment_variable} is not set")
-
-    def __get_all_files(self, directory):
-        """
-        Generator function that yields all the markdown files in the specified directory and its subdirectories.
-        Args:
-            directory: The directory to search for markdown files.
-        Yields:
-            The file paths of the markdown files.
-        """
-        for dirpath, dirnames, filenames in os.walk(directory):
-            for filename in filenames:
-                if os.path.splitext(filename)[1] == '.md':
-                    yield os.path.join(dirpath, filename)
@@ -0,0 +1,94 @@
+import logging
+import time
+from typing import Any
+from azure.core.exceptions import HttpResponseError
+from document_importer.document_manager import DocumentManager
+
+
+def compare_chunk_counts(repository: str, expected: dict[str, int], indexed: dict[str, int],
+                         indexed_chunks: int | None = None) -> dict[str, Any]:
+    """
+    Compares the number of chunks of each source parsed locally with the number of chunks in the index.
+
+    Args:
+        repository (str): The repository name.
+        expected (dict[str, int]): The number of chunks of each source parsed locally.
+        indexed (dict[str, int]): The number of chunks of each source in the index.
+        indexed_chunks (int, optional): The number of chunks of the repository in the index, when the indexed
+            counts only cover the expected sources. Defaults to the sum of the indexed counts.
+
+    Returns:
+        dict: The verification report, with the missing sources, the orphaned sources and chunks, and the sources
+            whose number of chunks differs.
+    """
+    indexed_total = sum(indexed.values()) if indexed_chunks is None else indexed_chunks
+    orphaned_sources = sorted(source for source, count in indexed.items() if count and source not in expected)
+    counted_chunks = sum(indexed.get(source, 0) for source in expected)
+    report = {
+        "repository": repository,
+        "expected_sources": len(expected),
+        "indexed_sources": sum(1 for count in indexed.values() if count),
+        "expected_chunks": sum(expected.values()),
+        "indexed_chunks": indexed_total,
+        "missing_sources": sorted(source for source, count in expected.items() if count and not indexed.get(source)),
+        "orphaned_sources": orphaned_sources,
+        # Chunks of the repository that belong to no expected source, including sources the counts did not list
+        "orphaned_chunks": indexed_total - counted_chunks,
+        "mismatched_sources": {
+            source: {"expected": count, "indexed": indexed[source]}
+            for source, count in sorted(expected.items()) if indexed.get(source) and indexed[source] != count
+        },
+    }
+    report["consistent"] = not (report["missing_sources"] or report["orphaned_chunks"]
+                                or report["mismatched_sources"])
+    return report
+
+
+def verify_index(document_manager: DocumentManager, repository: str, expected: dict[str, int]) -> dict[str, Any]:
+    """
+    Verifies the chunks of a repository in the index with a facet query counting the chunks of each source,
+    without retrieving any document. Indexes whose source field is not facetable are verified with one count
+    query per source instead, which finds the orphaned chunks but not their sources.
+
+    Args:
+        document_manager (DocumentManager): The document manager of the index.
+        repository (str): The repository name.
+        expected (dict[str, int]): The number of chunks of each source parsed locally.
+
+    Returns:
+        dict: The verification report, see compare_chunk_counts, with the counting method and its duration.
+    """
+    start = time.perf_counter()
+    try:
+        report = compare_chunk_counts(repository, expected, document_manager.count_chunks("source", repository))
+        report["method"] = "facets"
+    except HttpResponseError as e:
+        logging.warning(f"Failed to count the chunks of {repository} with a facet query, counting them one "
+                        + f"source at a time (rebuild the index to make the source field facetable): {e.message}")
+        indexed = document_manager.count_source_chunks(repository, sorted(expected))
+        total = document_manager.count_documents(f"repository eq '{DocumentManager.escape(repository)}'")
+        report = compare_chunk_counts(repository, expected, indexed, indexed_chunks=total)
+        report["method"] = "counts"
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def print_verification(report: dict[str, Any]) -> None:
+    """
+    Prints a verification report.
+
+    Args:
+        report (dict): The verification report.
+    """
+    status = "consistent" if report["consistent"] else "INCONSISTENT"
+    print(f"Verified repository {report['repository']} with {report['method']} in {report['seconds']:.2f}s: "
+          + f"{status}, {report['indexed_chunks']}/{report['expected_chunks']} chunks of "
+          + f"{report['expected_sources']} markdown files in the index.")
+    if report["missing_sources"]:
+        print(f"Missing sources ({len(report['missing_sources'])}): {', '.join(report['missing_sources'])}")
+    if report["orphaned_sources"]:
+        print(f"Orphaned sources ({len(report['orphaned_sources'])}): {', '.join(report['orphaned_sources'])}")
+    elif report["orphaned_chunks"] > 0:
+        print(f"Orphaned chunks of unknown sources: {report['orphaned_chunks']}")
+    for source, counts in report["mismatched_sources"].items():
+        print(f"Mismatched source {source}: {counts['indexed']} chunks indexed, {counts['expected']} expected")
@@ -0,0 +1,429 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator
+import numpy as np
+from document_importer.search_filter import parse_filter, sort_key
+
+DEFAULT_PATH = ".vector_store"
+
+
+@dataclass
+class LocalIndexingResult:
+    """
+    The result of an indexing action, with the same attributes as the Azure AI Search IndexingResult.
+    """
+    key: str | None
+    succeeded: bool
+    status_code: int
+    error_message: str | None = None
+
+
+class LocalVectorStore:
+    """
+    A search index stored in a local directory, a stand-in for the Azure AI Search client to build and validate
+    indexes without network access.
+
+    The vectors are kept in a memory-mapped float32 array (vectors.f32) and the other fields in a columnar
+    JSON sidecar (columns.json), one list of values per field. Vector queries are answered with a brute-force
+    NumPy top-k, or with an HNSW index when the optional hnswlib package is installed and hnsw is enabled.
+
+    The store implements the subset of the SearchClient and SearchIndexClient methods used by the importer, so
+    it can replace them: index_documents, upload_documents, merge_documents, delete_documents, search,
+    get_document_count and get_index_statistics.
+    """
+    VERSION: int = 1
+    VECTORS_FILE: str = "vectors.f32"
+    COLUMNS_FILE: str = "columns.json"
+
+    def __init__(self, path: str, dimensions: int | None = None, key_field: str = "id",
+                 vector_field: str = "content_vector", hnsw: bool = False):
+        """
+        Initializes a new instance of the LocalVectorStore class and loads the store if it exists.
+
+        Args:
+            path (str): The directory of the store.
+            dimensions (int, optional): The number of dimensions of the vectors, read from the store or from the
+                first uploaded vector when not given.
+            key_field (str, optional): The key field of the documents. Defaults to "id".
+            vector_field (str, optional): The vector field of the documents. Defaults to "content_vector".
+            hnsw (bool, optional): Answer vector queries with an hnswlib index. Defaults to False.
+        """
+        self.path: str = path
+        self.key_field: str = key_field
+        self.vector_field: str = vector_field
+        self.dimensions: int | None = dimensions
+        self.hnsw: bool = hnsw
+        self.columns: dict[str, list[Any]] = {key_field: []}
+        self.__rows: dict[str, int] = {}
+        self.__free_rows: list[int] = []
+        self.__vectors: np.memmap | None = None
+        self.__norms: np.ndarray = np.zeros(0, dtype=np.float32)
+        self.__hnsw_index: Any = None
+        self.__lock = threading.RLock()
+        self.__load()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], dimensions: int | None = None) -> "LocalVectorStore":
+        """
+        Opens the local store of the INDEX_NAME index under the VECTOR_STORE_LOCAL_PATH directory.
+
+        Args:
+            config (dict): The configuration dictionary.
+            dimensions (int, optional): The number of dimensions of the vectors.
+
+        Returns:
+            LocalVectorStore: The store.
+        """
+        path = os.path.join(config.get("VECTOR_STORE_LOCAL_PATH") or DEFAULT_PATH,
+                            config.get("INDEX_NAME") or "default")
+        hnsw = str(config.get("VECTOR_STORE_HNSW") or "false").lower() == "true"
+        return cls(path, dimensions=dimensions, hnsw=hnsw)
+
+    def __len__(self) -> int:
+        return len(self.__rows)
+
+    def index_documents(self, batch, **kwargs) -> list[LocalIndexingResult]:
+        """
+        Applies a batch of upload, merge, mergeOrUpload and delete actions.
+
+        Args:
+            batch: The IndexDocumentsBatch, or the list of documents with their @search.action.
+
+        Returns:
+            list: The result of each action.
+        """
+        actions = batch.actions if hasattr(batch, "actions") else batch
+        with self.__lock:
+            return [self.__apply(dict(action)) for action in actions]
+
+    def upload_documents(self, documents: list[dict[str, Any]], **kwargs) -> list[LocalIndexingResult]:
+        return self.index_documents([{**document, "@search.action": "upload"} for document in documents])
+
+    def merge_documents(self, documents: list[dict[str, Any]], **kwargs) -> list[LocalIndexingResult]:
+        return self.index_documents([{**document, "@search.action": "merge"} for document in documents])
+
+    def delete_documents(self, documents: list[dict[str, Any]], **kwargs) -> list[LocalIndexingResult]:
+        return self.index_documents([{**document, "@search.action": "delete"} for document in documents])
+
+    def search(self, search_text: str | None = None, filter: str | None = None, select: list[str] | None = None,
+               top: int | None = None, skip: int = 0, vector_queries: list[Any] | None = None,
+               order_by: list[str] | None = None, **kwargs) -> list[dict[str, Any]]:
+        """
+        Searches the documents. Text queries match every document, in insertion order unless they are ordered
+        by fields. A vector query, such as a VectorizedQuery, ranks the documents by cosine similarity.
+
+        Args:
+            search_text (str, optional): Ignored, every document matches.
+            filter (str, optional): An OData filter of eq and search.in clauses.
+            select (list, optional): The fields to return. Defaults to all fields except the vector.
+            top (int, optional): The number of documents to return. Defaults to 50.
+            skip (int, optional): The number of documents to skip. Defaults to 0.
+            vector_queries (list, optional): The vector queries, only the first one is used.
+            order_by (list, optional): The fields the text query results are sorted by. Defaults to None.
+
+        Returns:
+            list[dict]: The documents with their @search.score.
+        """
+        top = 50 if top is None else top
+        if vector_queries:
+            query = vector_queries[0]
+            k = getattr(query, "k_nearest_neighbors", None) or top
+            found = self.vector_search(query.vector, k=skip + min(top, k), filter=filter, select=select)
+            return found[skip:]
+        order = sort_key(order_by)
+        with self.__lock:
+            rows = self.__filter_rows(filter)
+            if order is not None:
+                names = list(self.columns.keys())
+                key, descending = order
+                rows.sort(key=lambda row: key({name: self.columns[name][row] for name in names}), reverse=descending)
+            return [{"@search.score": 1.0, **self.__document(row, select)} for row in rows[skip:skip + top]]
+
+    def vector_search(self, vector: list[float], k: int = 3, filter: str | None = None,
+                      select: list[str] | None = None) -> list[dict[str, Any]]:
+        """
+        Finds the k documents closest to a vector by cosine similarity.
+
+        Args:
+            vector (list[float]): The query vector.
+            k (int, optional): The number of documents to return. Defaults to 3.
+            filter (str, optional): An OData filter of eq and search.in clauses.
+            select (list, optional): The fields to return. Defaults to all fields except the vector.
+
+        Returns:
+            list[dict]: The closest documents, with the Azure AI Search cosine score 1 / (1 + distance).
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        with self.__lock:
+            if self.__vectors is None or not self.__rows:
+                return []
+            rows = np.asarray(self.__filter_rows(filter), dtype=np.int64)
+            if len(rows) == 0:
+                return []
+            hnsw_index = self.__hnsw() if self.hnsw else None
+            if hnsw_index is not None:
+                allowed = set(rows.tolist()) if filter else None
+                labels, distances = hnsw_index.knn_query(query, k=min(k, len(rows)),
+                                                         filter=(lambda row: row in allowed) if allowed else None)
+                ranked = list(zip(labels[0].tolist(), distances[0].tolist()))
+            else:
+                norm = float(np.linalg.norm(query)) or 1.0
+                norms = self.__norms[rows]
+                similarities = (self.__vectors[rows] @ query) / np.where(norms > 0, norms * norm, 1.0)
+                count = min(k, len(rows))
+                best = np.argpartition(-similarities, count - 1)[:count]
+                best = best[np.argsort(-similarities[best], kind="stable")]
+                ranked = [(int(rows[index]), 1.0 - float(similarities[index])) for index in best]
+            return [{"@search.score": 1.0 / (1.0 + distance), **self.__document(row, select)}
+                    for row, distance in ranked]
+
+    def get_document_count(self, **kwargs) -> int:
+        return len(self)
+
+    def count(self, filter: str | None = None) -> int:
+        """
+        Counts the documents matching a filter.
+        """
+        with self.__lock:
+            return len(self.__filter_rows(filter))
+
+    def count_values(self, field: str, filter: str | None = None) -> dict[Any, int]:
+        """
+        Counts the documents matching a filter for each value of a field, like an Azure AI Search facet.
+        """
+        counts: dict[Any, int] = {}
+        with self.__lock:
+            column = self.columns.get(field)
+            if column is None:
+                return counts
+            for row in self.__filter_rows(filter):
+                if column[row] is not None:
+                    counts[column[row]] = counts.get(column[row], 0) + 1
+        return counts
+
+    def get_index_statistics(self, index_name: str | None = None, **kwargs) -> dict[str, int]:
+        """
+        Returns the statistics of the store in the shape of the Azure AI Search index statistics.
+        """
+        with self.__lock:
+            vector_bytes = len(self.__rows) * (self.dimensions or 0) * 4
+            return {"documentCount": len(self.__rows), "storageSize": self.__columns_size(),
+                    "vectorIndexSize": vector_bytes}
+
+    def iter_documents(self, batch_size: int = 1000) -> Iterator[list[dict[str, Any]]]:
+        """
+        Reads the complete documents of the store, with their vectors, to push them to another index.
+
+        Args:
+            batch_size (int, optional): The number of documents per batch. Defaults to 1000.
+
+        Yields:
+            list[dict]: The documents, with an upload action.
+        """
+        with self.__lock:
+            rows = sorted(self.__rows.values())
+        for start in range(0, len(rows), batch_size):
+            with self.__lock:
+                batch = []
+                for row in rows[start:start + batch_size]:
+                    if self.columns[self.key_field][row] is None:
+                        continue
+                    document = {"@search.action": "upload", **self.__document(row, None)}
+                    if self.__vectors is not None:
+                        document[self.vector_field] = self.__vectors[row].tolist()
+                    batch.append(document)
+            yield batch
+
+    def save(self) -> None:
+        """
+        Flushes the vectors and writes the columns. The columns file is replaced atomically, so an interrupted
+        run leaves the previous state of the store.
+        """
+        with self.__lock:
+            if self.__vectors is not None:
+                self.__vectors.flush()
+            os.makedirs(self.path, exist_ok=True)
+            columns_path = os.path.join(self.path, self.COLUMNS_FILE)
+            temporary_path = f"{columns_path}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as columns_file:
+                json.dump({"version": self.VERSION, "dimensions": self.dimensions, "key_field": self.key_field,
+                           "columns": self.columns}, columns_file)
+            os.replace(temporary_path, columns_path)
+        logging.info(f"Local vector store saved to {self.path}: {len(self)} documents")
+
+    def close(self) -> None:
+        self.save()
+
+    def __enter__(self) -> "LocalVectorStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __load(self) -> None:
+        """
+        Loads the columns and maps the vectors of an existing store.
+        """
+        columns_path = os.path.join(self.path, self.COLUMNS_FILE)
+        if not os.path.exists(columns_path):
+            return
+        with open(columns_path, "r", encoding="utf-8") as columns_file:
+            state = json.load(columns_file)
+        if state.get("version") != self.VERSION:
+            raise ValueError(f"Unsupported local vector store version {state.get('version')} in {self.path}")
+        if self.dimensions is not None and state.get("dimensions") not in (None, self.dimensions):
+            raise ValueError(f"The local vector store {self.path} has {state.get('dimensions')} dimensions, "
+                             + f"not {self.dimensions}")
+        self.dimensions = state.get("dimensions")
+        self.columns = state["columns"]
+        keys = self.columns[self.key_field]
+        self.__rows = {key: row for row, key in enumerate(keys) if key is not None}
+        self.__free_rows = [row for row, key in enumerate(keys) if key is None]
+        if self.dimensions and keys:
+            vectors = self.__map_vectors(len(keys))
+            self.__norms = np.linalg.norm(vectors[:len(keys)], axis=1).astype(np.float32)
+        logging.info(f"Local vector store loaded from {self.path}: {len(self)} documents")
+
+    def __map_vectors(self, capacity: int) -> np.memmap:
+        """
+        Maps the vectors file with room for at least capacity vectors, growing the file when needed.
+
+        Returns:
+            np.memmap: The mapped vectors.
+        """
+        assert self.dimensions is not None, "The dimensions are known before the vectors are mapped"
+        vectors_path = os.path.join(self.path, self.VECTORS_FILE)
+        row_bytes = self.dimensions * 4
+        current = os.path.getsize(vectors_path) // row_bytes if os.path.exists(vectors_path) else 0
+        if self.__vectors is not None and current >= capacity:
+            return self.__vectors
+        if current < capacity:
+            os.makedirs(self.path, exist_ok=True)
+            if self.__vectors is not None:
+                self.__vectors.flush()
+            # Grow geometrically so appends cost amortized constant time
+            current = max(capacity, current * 2, 1024)
+            with open(vectors_path, "ab") as vectors_file:
+                vectors_file.truncate(current * row_bytes)
+        self.__vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(current, self.dimensions))
+        return self.__vectors
+
+    def __apply(self, action: dict[str, Any]) -> LocalIndexingResult:
+        """
+        Applies an indexing action. Must be called while holding the lock.
+        """
+        kind = action.pop("@search.action", "upload")
+        key = action.get(self.key_field)
+        if key is None:
+            return LocalIndexingResult(key=key, succeeded=False, status_code=400,
+                                       error_message=f"The key field {self.key_field} is missing")
+        row = self.__rows.get(key)
+        if kind == "delete":
+            if row is not None:
+                for values in self.columns.values():
+                    values[row] = None
+                del self.__rows[key]
+                self.__free_rows.append(row)
+                self.__norms[row] = 0.0
+                self.__invalidate_hnsw()
+            return LocalIndexingResult(key=key, succeeded=True, status_code=200)
+        if kind == "merge" and row is None:
+            return LocalIndexingResult(key=key, succeeded=False, status_code=404,
+                                       error_message="Document not found")
+        vector = action.pop(self.vector_field, None)
+        if vector is not None and self.dimensions is not None and len(vector) != self.dimensions:
+            return LocalIndexingResult(key=key, succeeded=False, status_code=400,
+                                       error_message=f"Expected {self.dimensions} dimensions, got {len(vector)}")
+        if row is None:
+            row = self.__allocate_row(key)
+        elif kind == "upload":
+            # Upload replaces every field of the document
+            for name, values in self.columns.items():
+                if name != self.key_field:
+                    values[row] = None
+            if vector is None and self.__vectors is not None:
+                self.__vectors[row] = 0.0
+                self.__norms[row] = 0.0
+        for name, value in action.items():
+            if name not in self.columns:
+                self.columns[name] = [None] * len(self.columns[self.key_field])
+            self.columns[name][row] = value
+        if vector is not None:
+            if self.dimensions is None:
+                self.dimensions = len(vector)
+            vectors = self.__map_vectors(len(self.columns[self.key_field]))
+            vectors[row] = np.asarray(vector, dtype=np.float32)
+            self.__norms[row] = np.linalg.norm(vectors[row])
+            self.__invalidate_hnsw()
+        return LocalIndexingResult(key=key, succeeded=True, status_code=201)
+
+    def __allocate_row(self, key: str) -> int:
+        """
+        Reuses the row of a deleted document, or appends a row to every column.
+        """
+        if self.__free_rows:
+            row = self.__free_rows.pop()
+        else:
+            row = len(self.columns[self.key_field])
+            for values in self.columns.values():
+                values.append(None)
+            if len(self.__norms) <= row:
+                self.__norms = np.concatenate([self.__norms, np.zeros(max(1024, len(self.__norms)), np.float32)])
+        self.columns[self.key_field][row] = key
+        self.__rows[key] = row
+        return row
+
+    def __filter_rows(self, filter: str | None) -> list[int]:
+        """
+        Lists the rows of the documents matching a filter, in insertion order.
+        """
+        rows = sorted(self.__rows.values())
+        if not filter:
+            return rows
+        matches = parse_filter(filter)
+        names = list(self.columns.keys())
+        return [row for row in rows if matches({name: self.columns[name][row] for name in names})]
+
+    def __document(self, row: int, select: list[str] | None) -> dict[str, Any]:
+        """
+        Reads the fields of a row, without the vector unless it is selected.
+        """
+        names = select if select else list(self.columns.keys())
+        document = {name: self.columns[name][row] for name in names if name in self.columns}
+        if select and self.vector_field in select and self.__vectors is not None:
+            document[self.vector_field] = self.__vectors[row].tolist()
+        return document
+
+    def __columns_size(self) -> int:
+        """
+        Returns the size of the columns file in bytes, 0 before the first save.
+        """
+        columns_path = os.path.join(self.path, self.COLUMNS_FILE)
+        return os.path.getsize(columns_path) if os.path.exists(columns_path) else 0
+
+    def __hnsw(self) -> Any:
+        """
+        Builds the HNSW index of the live vectors on first use after a change, None if hnswlib is missing.
+        """
+        if self.__hnsw_index is not None:
+            return self.__hnsw_index
+        try:
+            import hnswlib
+        except ImportError:
+            logging.warning("hnswlib is not installed, the local vector store answers with a brute-force search")
+            self.hnsw = False
+            return None
+        assert self.__vectors is not None, "The HNSW index is built once the store holds vectors"
+        rows = np.asarray(sorted(self.__rows.values()), dtype=np.int64)
+        index = hnswlib.Index(space="cosine", dim=self.dimensions)
+        index.init_index(max_elements=max(1, len(rows)), ef_construction=200, M=16)
+        index.add_items(self.__vectors[rows], rows)
+        index.set_ef(64)
+        self.__hnsw_index = index
+        return index
+
+    def __invalidate_hnsw(self) -> None:
+        self.__hnsw_index = None
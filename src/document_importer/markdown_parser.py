@@ -1,7 +1,15 @@
-import frontmatter
+import os
+import re
+import yaml
 from langchain_text_splitters import RecursiveCharacterTextSplitter, MarkdownHeaderTextSplitter
 from datetime import datetime
-from frontmatter import Post
+from typing import Any, Callable, Iterator, Sequence, TextIO
+from document_importer.chunk_record import ChunkHeader, ChunkMetadata
+from document_importer.metrics import Metrics
+from document_importer.token_chunker import TokenChunker, tiktoken_offsets
+
+# Delimiter of the YAML frontmatter block, as recognised by python-frontmatter
+FRONT_MATTER_BOUNDARY = re.compile(r"^-{3,}\s*$")
 
 
 class MarkdownParser:
@@ -9,17 +17,34 @@ class MarkdownParser:
     A class that parses markdown documents and splits them into chunks.
 
     Args:
-        None
+        metrics (Metrics, optional): The metrics the files, bytes and chunks read are counted in.
+        tokenizer (str | Callable, optional): The tiktoken encoding, or the function returning the character
+            offset of each token of a text. When set, chunk sizes are measured in tokens, and the token count
+            of each chunk is added to its metadata. Defaults to None, chunk sizes are measured in characters.
 
     Attributes:
-        None
+        metrics (Metrics): The parse metrics.
 
     Methods:
         parse: Parses a markdown document and splits it into chunks.
+        iter_chunks: Parses a markdown document and yields its chunks one at a time.
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, metrics: Metrics | None = None, tokenizer: str | Callable[[str], list[int]] | None = None):
+        self.metrics: Metrics = metrics or Metrics()
+        self.token_offsets: Callable[[str], list[int]] | None = (
+            tiktoken_offsets(tokenizer) if isinstance(tokenizer, str) else tokenizer
+        )
+        self.__markdown_splitter = MarkdownHeaderTextSplitter(
+            headers_to_split_on=[
+                ("#", "Header 1"),
+                ("##", "Header 2"),
+                ("###", "Header 3"),
+            ],
+            strip_headers=False
+        )
+        # Text splitters are reused between documents, keyed by (chunk_size, chunk_overlap)
+        self.__text_splitters: dict[tuple[int, int], Callable[[str], Sequence[tuple[str, int | None]]]] = {}
 
     def parse(self, path: str, encoding: str = "utf-8",
               chunk_size: int = 1000, chunk_overlap: int = 0, repository: str = "") -> dict:
@@ -36,103 +61,176 @@ class MarkdownParser:
         Returns:
             dict: A dictionary containing the metadata and contents of the parsed chunks.
         """
-        # Load the documents
-        markdown_document = self.__load_markdown_document(path)
+        page_metadatas = []
+        page_contents = []
+        with self.metrics.timer("parse.file"):
+            for content, metadata in self.iter_chunks(path, encoding=encoding, chunk_size=chunk_size,
+                                                      chunk_overlap=chunk_overlap, repository=repository):
+                page_contents.append(content)
+                page_metadatas.append(metadata)
+
+        return {
+            "page_metadatas": page_metadatas,
+            "page_contents": page_contents,
+        }
 
-        # MD splits
-        splits = self.__spilt_markdown_document(chunk_size, chunk_overlap, markdown_document)
+    def iter_chunks(self, path: str, encoding: str = "utf-8", chunk_size: int = 1000,
+                    chunk_overlap: int = 0, repository: str = "") -> Iterator[tuple[str, ChunkMetadata]]:
+        """
+        Parses a markdown document and lazily yields its chunks. The document is read line by line and split
+        one top level section at a time, so only the current section is held in memory.
 
-        return self.__format_chunks(splits, metadata=markdown_document, repository=repository, path=path)
+        Args:
+            path (str): The path to the markdown document.
+            encoding (str, optional): The encoding of the markdown document. Defaults to "utf-8".
+            chunk_size (int, optional): The size of each chunk, in characters or tokens. Defaults to 1000.
+            chunk_overlap (int, optional): The overlap between chunks, in characters or tokens. Defaults to 0.
+            repository (str, optional): The repository name. Defaults to None.
 
-    def __spilt_markdown_document(self, chunk_size, chunk_overlap, markdown_document) -> list:
+        Yields:
+            tuple: The content and metadata of each chunk, the chunks of the document share one header.
         """
-        Splits a markdown document into chunks based on header levels.
+        split_text = self.__text_splitters.get((chunk_size, chunk_overlap))
+        if split_text is None:
+            split_text = self.__create_text_splitter(chunk_size, chunk_overlap)
+            self.__text_splitters[(chunk_size, chunk_overlap)] = split_text
+        chunk_number: int = 0
+        with open(path, "r", encoding=encoding) as markdown_file:
+            self.metrics.increment("parse.files")
+            self.metrics.increment("parse.bytes_read", os.fstat(markdown_file.fileno()).st_size)
+            try:
+                # Load and validate the frontmatter before any chunk is produced
+                metadata = self.__read_front_matter(markdown_file)
+                self.validate_front_matter(metadata, path)
+
+                header = ChunkHeader(title=metadata.get("title"), source=path, uri=metadata.get("uri"),
+                                     repository=repository, summary=metadata.get("summary"),
+                                     authors=metadata.get("authors"),
+                                     last_update=datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S-00:00"))
+                for section in self.__read_sections(markdown_file):
+                    # MD splits
+                    for header_split in self.__markdown_splitter.split_text(section):
+                        # Recursive character or token text splitter
+                        for content, token_count in split_text(header_split.page_content):
+                            chunk_number += 1
+                            yield content, ChunkMetadata(header, header_split.metadata, chunk_number, token_count)
+            finally:
+                self.metrics.increment("parse.chunks", chunk_number)
+
+    def __create_text_splitter(self, chunk_size: int,
+                               chunk_overlap: int) -> Callable[[str], Sequence[tuple[str, int | None]]]:
+        """
+        Creates the function splitting the text of a section into chunks with their token count.
 
         Args:
-            chunk_size (int): The size of each chunk.
-            chunk_overlap (int): The overlap between chunks.
-            markdown_document (str): The content of the markdown document.
+            chunk_size (int): The size of each chunk, in tokens if the parser has a tokenizer, else in characters.
+            chunk_overlap (int): The overlap between chunks, in the same unit.
 
         Returns:
-            list: A list of chunks.
+            Callable: The function returning the text and the token count, None without a tokenizer, of each chunk.
         """
-        headers_to_split_on = [
-            ("#", "Header 1"),
-            ("##", "Header 2"),
-            ("###", "Header 3"),
-        ]
-        markdown_splitter = MarkdownHeaderTextSplitter(
-            headers_to_split_on=headers_to_split_on, strip_headers=False
-        )
-        md_header_splits = markdown_splitter.split_text(markdown_document.content)
+        if self.token_offsets is not None:
+            return TokenChunker(self.token_offsets, chunk_tokens=chunk_size, overlap_tokens=chunk_overlap).split_text
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        return lambda text: [(content, None) for content in text_splitter.split_text(text)]
 
-        # Recursive character text splitter
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size, chunk_overlap=chunk_overlap
-        )
+    def read_front_matter(self, path: str, encoding: str = "utf-8") -> dict[str, Any]:
+        """
+        Reads the frontmatter of a markdown document without reading its body.
 
-        # Split
-        splits = text_splitter.split_documents(md_header_splits)
-        return splits
+        Args:
+            path (str): The path to the markdown document.
+            encoding (str, optional): The encoding of the markdown document. Defaults to "utf-8".
+
+        Returns:
+            dict: The frontmatter of the markdown document, empty if it has none.
+        """
+        with open(path, "r", encoding=encoding) as markdown_file:
+            return self.__read_front_matter(markdown_file)
 
-    def __load_markdown_document(self, path: str) -> Post:
+    @staticmethod
+    def validate_front_matter(metadata: dict[str, Any], path: str) -> None:
         """
-        Loads a markdown document and validates its frontmatter.
+        Validates the frontmatter of a markdown document.
 
         Args:
+            metadata (dict): The frontmatter of the markdown document.
             path (str): The path to the markdown document.
 
-        Returns:
-            dict: The loaded markdown document.
+        Raises:
+            ValueError: If the frontmatter or one of its required keys is missing or blank.
         """
-        markdown_document = frontmatter.load(path)
-        if len(markdown_document.keys()) == 0:
+        if len(metadata.keys()) == 0:
             raise ValueError(f"No frontmatter found in the markdown document at {path}...")
-        if not markdown_document.get("title") or markdown_document.get("title").strip() == "":
+        if not metadata.get("title") or str(metadata.get("title")).strip() == "":
             raise ValueError(f"No title found in the frontmatter of the markdown document at {path}...")
-        if not markdown_document.get("summary") or markdown_document.get("summary").strip() == "":
+        if not metadata.get("summary") or str(metadata.get("summary")).strip() == "":
             raise ValueError(f"No summary found in the frontmatter of the markdown document at {path}...")
-        if not markdown_document.get("uri") or markdown_document.get("uri").strip() == "":
+        if not metadata.get("uri") or str(metadata.get("uri")).strip() == "":
             raise ValueError(f"No uri found in the frontmatter of the markdown document at {path}...")
-        if markdown_document.get("authors") is None or markdown_document.get("authors") == []:
+        if metadata.get("authors") is None or metadata.get("authors") == []:
             raise ValueError(f"No authors found in the frontmatter of the markdown document at {path}...")
-        return markdown_document
 
-    def __format_chunks(self, chunks, metadata, repository: str, path: str) -> dict:
+    def __read_front_matter(self, markdown_file: TextIO) -> dict[str, Any]:
         """
-        Formats the chunks and returns a dictionary containing the metadata and contents.
+        Reads the YAML frontmatter block at the start of an open markdown document, leaving the file
+        positioned at the first line of the body.
 
         Args:
-            chunks (list): The list of chunks.
-            metadata (dict): The metadata of the markdown document.
-            repository (str): The repository name.
-            path (str): The path to the markdown document.
+            markdown_file: The open markdown document.
 
         Returns:
-            dict: A dictionary containing the metadata and contents of the chunks.
+            dict: The frontmatter, empty if the document has none.
         """
-        page_metadatas = []
-        page_contents = []
-        today = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S-00:00")
-        chunk_number: int = 0
-        for chunk in chunks:
-            chunk_number += 1
-            page_metadatas.append({
-                    "title": metadata.get("title"),
-                    "source": path,
-                    "uri": metadata.get("uri"),
-                    "repository": repository,
-                    "path": path,
-                    "summary": metadata.get("summary"),
-                    "authors": metadata.get("authors"),
-                    "last_update": today,
-                    "heading": chunk.metadata,
-                    "chunk_number": chunk_number,
-                }
-            )
-            page_contents.append(chunk.page_content)
+        first_line = markdown_file.readline().lstrip("\ufeff")
+        while first_line and first_line.strip() == "":
+            first_line = markdown_file.readline()
+        if not FRONT_MATTER_BOUNDARY.match(first_line):
+            markdown_file.seek(0)
+            return {}
+        front_matter_lines: list[str] = []
+        for line in markdown_file:
+            if FRONT_MATTER_BOUNDARY.match(line):
+                metadata = yaml.safe_load("".join(front_matter_lines))
+                return metadata if isinstance(metadata, dict) else {}
+            front_matter_lines.append(line)
+        # Without a closing delimiter the document has no frontmatter
+        markdown_file.seek(0)
+        return {}
+
+    def __read_sections(self, markdown_file) -> Iterator[str]:
+        """
+        Reads the body of a markdown document one top level (#) section at a time. The header splitter resets
+        its header stack at every top level header, so splitting each section separately gives the same
+        chunks as splitting the whole document.
 
-        return {
-            "page_metadatas": page_metadatas,
-            "page_contents": page_contents,
-        }
+        Args:
+            markdown_file: The open markdown document, positioned at the start of the body.
+
+        Yields:
+            str: The text of each section.
+        """
+        section: list[str] = []
+        in_code_block = False
+        opening_fence = ""
+        for line in markdown_file:
+            stripped_line = "".join(filter(str.isprintable, line.strip()))
+            # Follow code blocks the same way as the header splitter, headers inside them are ignored
+            if not in_code_block:
+                if stripped_line.startswith("```") and stripped_line.count("```") == 1:
+                    in_code_block = True
+                    opening_fence = "```"
+                elif stripped_line.startswith("~~~"):
+                    in_code_block = True
+                    opening_fence = "~~~"
+            elif stripped_line.startswith(opening_fence):
+                in_code_block = False
+                opening_fence = ""
+            is_top_level_header = (not in_code_block and stripped_line.startswith("#")
+                                   and (len(stripped_line) == 1 or stripped_line[1] == " "))
+            if is_top_level_header and section:
+                yield "".join(section)
+                section = []
+            section.append(line)
+        if section:
+            yield "".join(section)
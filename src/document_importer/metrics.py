@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
+
+# Prefix of the exported Prometheus and OpenTelemetry metric names
+METRIC_PREFIX = "document_importer"
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Computes a percentile with the nearest rank method.
+
+    Args:
+        values (list[float]): The measured values.
+        fraction (float): The percentile as a fraction, for example 0.99.
+
+    Returns:
+        float: The percentile, 0.0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(fraction * len(ordered) + 0.5) - 1))]
+
+
+class Metrics:
+    """
+    A thread-safe registry of the counters and timers of an import run.
+
+    Counters are monotonically increasing totals, such as bytes read or HTTP requests. Timers keep every
+    observed duration in seconds so the report can give exact percentiles.
+    """
+
+    def __init__(self):
+        """
+        Initializes a new instance of the Metrics class.
+        """
+        self.counters: dict[str, float] = {}
+        self.timers: dict[str, list[float]] = {}
+        self.__lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Adds a value to a counter.
+
+        Args:
+            name (str): The name of the counter, for example parse.bytes_read.
+            value (float, optional): The value to add. Defaults to 1.
+        """
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Records a duration.
+
+        Args:
+            name (str): The name of the timer, for example stage.embed.
+            seconds (float): The duration in seconds.
+        """
+        with self.__lock:
+            self.timers.setdefault(name, []).append(seconds)
+
+    def observe_many(self, name: str, durations: Iterable[float]) -> None:
+        """
+        Records several durations.
+
+        Args:
+            name (str): The name of the timer.
+            durations (Iterable[float]): The durations in seconds.
+        """
+        with self.__lock:
+            self.timers.setdefault(name, []).extend(durations)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Times the enclosed block, including blocks that raise an exception.
+
+        Args:
+            name (str): The name of the timer.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def merge(self, other: "Metrics") -> None:
+        """
+        Adds the counters and timers of another registry, for example to combine the metrics of several imports.
+
+        Args:
+            other (Metrics): The registry to add.
+        """
+        for name, value in list(other.counters.items()):
+            self.increment(name, value)
+        for name, durations in list(other.timers.items()):
+            self.observe_many(name, list(durations))
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Summarizes the counters and timers.
+
+        Returns:
+            dict: The value of each counter, and the count, total, p50, p95, p99 and maximum of each timer.
+        """
+        with self.__lock:
+            counters = dict(sorted(self.counters.items()))
+            timers = {name: list(durations) for name, durations in sorted(self.timers.items())}
+        return {
+            "counters": counters,
+            "timers": {
+                name: {
+                    "count": len(durations),
+                    "total_seconds": sum(durations),
+                    "p50_ms": percentile(durations, 0.50) * 1000,
+                    "p95_ms": percentile(durations, 0.95) * 1000,
+                    "p99_ms": percentile(durations, 0.99) * 1000,
+                    "max_ms": max(durations, default=0.0) * 1000,
+                }
+                for name, durations in timers.items()
+            },
+        }
+
+
+def metric_name(name: str) -> str:
+    """
+    Converts a metric name to the Prometheus and OpenTelemetry naming convention.
+
+    Args:
+        name (str): The metric name, for example stage.embed.
+
+    Returns:
+        str: The exported name, for example document_importer_stage_embed.
+    """
+    return f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+
+def write_json_report(path: str, report: dict[str, Any]) -> None:
+    """
+    Writes a run report as JSON, atomically replacing the previous report.
+
+    Args:
+        path (str): The path to the report file.
+        report (dict): The run report.
+    """
+    _write_atomically(path, json.dumps(report, indent=2, default=str))
+    logging.info(f"Run report written to {path}")
+
+
+def write_prometheus_textfile(path: str, metrics: Metrics, labels: dict[str, Any] | None = None) -> None:
+    """
+    Writes the metrics in the Prometheus text exposition format, for the node exporter textfile collector.
+    Counters are exported as counters and timers as summaries in seconds.
+
+    Args:
+        path (str): The path to the .prom file.
+        metrics (Metrics): The metrics of the run.
+        labels (dict, optional): The labels added to every sample, such as the repository. Defaults to None.
+    """
+    label_text = ",".join(f'{key}="{str(value)}"'.replace("\n", " ") for key, value in (labels or {}).items())
+    snapshot = metrics.snapshot()
+    lines: list[str] = []
+    for name, value in snapshot["counters"].items():
+        exported = f"{metric_name(name)}_total"
+        lines += [f"# TYPE {exported} counter", f"{exported}{{{label_text}}} {value}"]
+    for name, timer in snapshot["timers"].items():
+        exported = f"{metric_name(name)}_seconds"
+        lines.append(f"# TYPE {exported} summary")
+        for quantile in ("p50", "p95", "p99"):
+            quantile_labels = ",".join(filter(None, [label_text, f'quantile="0.{quantile[1:]}"']))
+            lines.append(f"{exported}{{{quantile_labels}}} {timer[quantile + '_ms'] / 1000}")
+        lines += [f"{exported}_sum{{{label_text}}} {timer['total_seconds']}",
+                  f"{exported}_count{{{label_text}}} {timer['count']}"]
+    _write_atomically(path, "\n".join(lines) + "\n")
+    logging.info(f"Prometheus metrics written to {path}")
+
+
+def export_opentelemetry(metrics: Metrics, attributes: dict[str, Any] | None = None) -> bool:
+    """
+    Records the metrics with the global OpenTelemetry meter provider, which exports them with the exporter
+    configured by the application, for example with opentelemetry-instrument and the OTEL_* variables.
+    The opentelemetry-api package is optional.
+
+    Args:
+        metrics (Metrics): The metrics of the run.
+        attributes (dict, optional): The attributes added to every measurement. Defaults to None.
+
+    Returns:
+        bool: True if the metrics were recorded, False if OpenTelemetry is not installed.
+    """
+    try:
+        from opentelemetry import metrics as otel_metrics
+    except ImportError:
+        logging.warning("OpenTelemetry export skipped, install the opentelemetry-api package to enable it")
+        return False
+    meter = otel_metrics.get_meter(METRIC_PREFIX)
+    with_attributes = {key: str(value) for key, value in (attributes or {}).items()}
+    for name, value in dict(metrics.counters).items():
+        meter.create_counter(metric_name(name)).add(value, with_attributes)
+    for name, durations in dict(metrics.timers).items():
+        histogram = meter.create_histogram(f"{metric_name(name)}_seconds", unit="s")
+        for duration in durations:
+            histogram.record(duration, with_attributes)
+    return True
+
+
+def _write_atomically(path: str, content: str) -> None:
+    """
+    Writes a file through a temporary file, so readers never see a partial report.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as report_file:
+        report_file.write(content)
+    os.replace(temporary_path, path)
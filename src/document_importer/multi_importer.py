@@ -0,0 +1,187 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+import yaml
+from document_importer.importer import Importer
+from document_importer.git_changes import git_changes
+from document_importer.shared_clients import SharedClients
+
+
+@dataclass
+class ManifestEntry:
+    """
+    A repository listed in an import manifest.
+    """
+    repository: str
+    directory: str
+    upsert: bool = False
+    git_range: str | None = None
+
+
+def load_manifest(path: str) -> list[ManifestEntry]:
+    """
+    Loads an import manifest. The manifest is a YAML file, or a JSON file when its name ends with .json, with a
+    list of repositories and optional defaults applied to every repository, for example:
+
+        defaults:
+          upsert: true
+        repositories:
+          - repository: org/repo
+            directory: repo/docs
+          - repository: org/other
+            directory: other/docs
+            git_range: HEAD~1..HEAD
+
+    Args:
+        path (str): The path to the manifest file.
+
+    Returns:
+        list[ManifestEntry]: The repositories to import, in the order of the manifest.
+
+    Raises:
+        ValueError: If a repository has no name or directory, has an unknown setting, or is listed twice.
+    """
+    with open(path, "r", encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file) if path.lower().endswith(".json") else yaml.safe_load(manifest_file)
+    if isinstance(manifest, list):
+        manifest = {"repositories": manifest}
+    defaults = manifest.get("defaults") or {}
+    entries: list[ManifestEntry] = []
+    for number, repository in enumerate(manifest.get("repositories") or [], start=1):
+        settings = {**defaults, **repository}
+        if not settings.get("repository") or not settings.get("directory"):
+            raise ValueError(f"Repository {number} of manifest {path} needs a repository and a directory")
+        unknown = set(settings) - set(ManifestEntry.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown settings {', '.join(sorted(unknown))} of repository {number} in {path}")
+        entries.append(ManifestEntry(**settings))
+    repositories = [entry.repository for entry in entries]
+    duplicates = sorted({repository for repository in repositories if repositories.count(repository) > 1})
+    if duplicates:
+        raise ValueError(f"Repositories listed more than once in manifest {path}: {', '.join(duplicates)}")
+    return entries
+
+
+class MultiImporter:
+    """
+    A class that imports the repositories of a manifest in one process. The importers share their embedding
+    and search clients, rate limiters and import state, several repositories are imported at the same time, and
+    a global budget of files in flight is shared between them in round-robin order.
+    """
+
+    def __init__(self, config: dict[str, Any], entries: list[ManifestEntry], parallel_repositories: int = 4,
+                 workers: int = 1, max_files_in_flight: int = 32, incremental: bool = False,
+                 state_path: str = ".import_state.json", checkpoint_path: str | None = None,
+                 resume: bool = False, verify: bool = False) -> None:
+        """
+        Initializes a new instance of the MultiImporter class.
+
+        Args:
+            config (dict): The configuration dictionary.
+            entries (list[ManifestEntry]): The repositories to import.
+            parallel_repositories (int): The number of repositories imported at the same time (default: 4).
+            workers (int): The number of concurrent workers of each import stage of a repository (default: 1).
+            max_files_in_flight (int): The number of files imported at the same time across all repositories
+                (default: 32).
+            incremental (bool): Only import new or changed files and remove deleted files (default: False).
+            state_path (str): The path to the import state file shared by the repositories.
+            checkpoint_path (str): The path to the checkpoint journal shared by the repositories (default: None).
+            resume (bool): Resume the imports recorded in the checkpoint journal (default: False).
+            verify (bool): Verify the chunk counts of every repository in the index after its import
+                (default: False).
+        """
+        self.config: dict[str, Any] = config
+        self.entries: list[ManifestEntry] = entries
+        self.parallel_repositories: int = max(1, parallel_repositories)
+        self.workers: int = workers
+        self.resume: bool = resume
+        self.verify: bool = verify
+        self.shared: SharedClients = SharedClients.from_config(
+            config, incremental=incremental, state_path=state_path, checkpoint_path=checkpoint_path,
+            max_files_in_flight=max_files_in_flight)
+        self.importers: dict[str, Importer] = {}
+        self.errors: dict[str, str] = {}
+        self.run_seconds: float = 0.0
+
+    def run(self) -> None:
+        """
+        Imports every repository of the manifest. A repository that fails to import is reported and does not
+        stop the import of the other repositories.
+        """
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.parallel_repositories,
+                                    thread_name_prefix="repository") as executor:
+                list(executor.map(self.__import, self.entries))
+        finally:
+            self.run_seconds = time.perf_counter() - start
+            for importer in self.importers.values():
+                self.shared.metrics.merge(importer.metrics)
+            self.shared.metrics.observe("import.run", self.run_seconds)
+            self.shared.record_metrics()
+            self.shared.close()
+        self.__report_result()
+
+    def run_report(self) -> dict[str, Any]:
+        """
+        Builds the machine-readable report of the last run.
+
+        Returns:
+            dict: The report of every repository, and the combined file counts and metrics.
+        """
+        repositories: list[dict[str, Any]] = []
+        for entry in self.entries:
+            importer = self.importers.get(entry.repository)
+            report = importer.run_report() if importer is not None else {"repository": entry.repository}
+            repositories.append({**report, "error": self.errors.get(entry.repository)})
+        files: dict[str, int] = {}
+        for repository_report in repositories:
+            for name, count in repository_report.get("files", {}).items():
+                files[name] = files.get(name, 0) + count
+        return {
+            "repositories": repositories,
+            "combined": {
+                "repositories": len(self.entries),
+                "failed_repositories": len(self.errors),
+                "seconds": self.run_seconds,
+                "files": files,
+                "chunks": sum(report.get("chunks", 0) for report in repositories),
+                "metrics": self.shared.metrics.snapshot(),
+            },
+        }
+
+    def __import(self, entry: ManifestEntry) -> None:
+        """
+        Imports one repository of the manifest.
+
+        Args:
+            entry (ManifestEntry): The repository to import.
+        """
+        logging.info(f"-----------------Importing repository {entry.repository}-----------------")
+        try:
+            changes = git_changes(entry.directory, entry.git_range) if entry.git_range else None
+            importer = Importer(self.config, repository=entry.repository, directory=entry.directory,
+                                workers=self.workers, upsert=entry.upsert, changes=changes, resume=self.resume,
+                                shared=self.shared)
+            self.importers[entry.repository] = importer
+            importer.run()
+            if self.verify:
+                importer.verify()
+        except Exception as e:
+            logging.error(f"Failed to import repository {entry.repository}: {str(e)}")
+            self.errors[entry.repository] = str(e)
+
+    def __report_result(self) -> None:
+        """
+        Prints the combined result of the imports.
+        """
+        report = self.run_report()["combined"]
+        print(f"Imported {report['repositories'] - report['failed_repositories']}/{report['repositories']} "
+              + f"repositories in {report['seconds']:.1f}s: {report['files'].get('succeeded', 0)}/"
+              + f"{report['files'].get('found', 0)} markdown files with a total of {report['chunks']} chunks.")
+        for repository, error in self.errors.items():
+            print(f"Failed to import repository {repository}: {error}")
+        self.shared.print_statistics()
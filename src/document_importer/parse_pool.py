@@ -0,0 +1,130 @@
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+from document_importer.chunk_record import ChunkMetadata
+from document_importer.markdown_parser import MarkdownParser
+from document_importer.metrics import Metrics
+from document_importer.pipeline import FileTask
+
+# Parser of the worker process, created once by the pool initializer so its splitters are reused
+_worker_parser: MarkdownParser | None = None
+
+
+def _initialize_worker(tokenizer: str | None = None) -> None:
+    """
+    Creates the markdown parser of a worker process.
+
+    Args:
+        tokenizer (str, optional): The tiktoken encoding measuring the chunk sizes, None to measure characters.
+    """
+    global _worker_parser
+    _worker_parser = MarkdownParser(tokenizer=tokenizer)
+
+
+def _parse_file(path: str, repository: str, chunk_size: int,
+                chunk_overlap: int) -> tuple[list[tuple[str, ChunkMetadata]], int, float]:
+    """
+    Parses a markdown document in a worker process.
+
+    Args:
+        path (str): The path to the markdown document.
+        repository (str): The repository name.
+        chunk_size (int): The size of each chunk.
+        chunk_overlap (int): The overlap between chunks.
+
+    Returns:
+        tuple: The content and metadata of each chunk, the size of the document in bytes and the parse time in
+            seconds. The chunks share the header of the document, which is pickled once.
+    """
+    assert _worker_parser is not None, "The pool initializer creates the parser of each worker"
+    start = time.perf_counter()
+    chunks = list(_worker_parser.iter_chunks(path, repository=repository, chunk_size=chunk_size,
+                                             chunk_overlap=chunk_overlap))
+    return chunks, os.path.getsize(path), time.perf_counter() - start
+
+
+class ParsePool:
+    """
+    A class that parses markdown documents in a pool of worker processes, so frontmatter validation and
+    chunking scale across cores. Workers return one compact record per document, expanded in the main process.
+    """
+
+    def __init__(self, workers: int, repository: str, chunk_size: int, chunk_overlap: int,
+                 metrics: Metrics | None = None, tokenizer: str | None = None):
+        """
+        Initializes a new instance of the ParsePool class.
+
+        Args:
+            workers (int): The number of worker processes.
+            repository (str): The repository name.
+            chunk_size (int): The size of each chunk.
+            chunk_overlap (int): The overlap between chunks.
+            metrics (Metrics, optional): The metrics the parsed files, bytes and chunks are counted in.
+            tokenizer (str, optional): The tiktoken encoding measuring the chunk sizes, None to measure characters.
+        """
+        self.workers: int = workers
+        self.metrics: Metrics = metrics or Metrics()
+        self.repository: str = repository
+        self.chunk_size: int = chunk_size
+        self.chunk_overlap: int = chunk_overlap
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker,
+                                            initargs=(tokenizer,))
+        logging.info(f"Parse pool started with {workers} worker processes")
+
+    def submit(self, tasks: Iterable[FileTask]) -> Iterator[FileTask]:
+        """
+        Submits the tasks to the worker processes ahead of the pipeline, keeping at most two tasks per worker
+        in flight.
+
+        Args:
+            tasks (Iterable[FileTask]): The files to parse.
+
+        Yields:
+            FileTask: The tasks, with their pending parse result attached.
+        """
+        window: deque[FileTask] = deque()
+        for task in tasks:
+            task.parse_result = self.executor.submit(_parse_file, task.file_path, self.repository,
+                                                     self.chunk_size, self.chunk_overlap)
+            window.append(task)
+            if len(window) >= self.workers * 2:
+                yield window.popleft()
+        while window:
+            yield window.popleft()
+
+    def collect(self, task: FileTask) -> None:
+        """
+        Waits for the parse result of a task and stores its chunk contents and metadatas.
+
+        Args:
+            task (FileTask): The submitted task.
+
+        Raises:
+            Exception: The error raised while parsing the document.
+        """
+        future = task.parse_result
+        if future is None:
+            raise ValueError(f"{task.file_path} was not submitted to the parse pool")
+        task.parse_result = None
+        self.metrics.increment("parse.files")
+        chunks, bytes_read, seconds = future.result()
+        self.metrics.increment("parse.bytes_read", bytes_read)
+        self.metrics.increment("parse.chunks", len(chunks))
+        self.metrics.observe("parse.file", seconds)
+        task.page_contents = [content for content, _ in chunks]
+        task.page_metadatas = [metadata for _, metadata in chunks]
+
+    def close(self) -> None:
+        """
+        Shuts the worker processes down.
+        """
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ParsePool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
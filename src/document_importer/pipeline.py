@@ -0,0 +1,294 @@
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+from document_importer.chunk_diff import ChunkDiff
+
+
+@dataclass
+class FileTask:
+    """
+    The state of a markdown file travelling through the import pipeline.
+    """
+    file_path: str
+    file_hash: str | None = None
+    page_contents: list[str] = field(default_factory=list)
+    page_metadatas: list[dict[str, Any]] = field(default_factory=list)
+    vectors: list[list[float] | None] = field(default_factory=list)
+    parse_result: Future[Any] | None = None
+    chunk_diff: ChunkDiff | None = None
+    stage_started: float = 0.0
+
+
+class BatchFailedError(Exception):
+    """
+    Raised by a batching stage that could not process a batch of the tasks it held back, with those tasks.
+    """
+
+    def __init__(self, tasks: list[FileTask], error: Exception):
+        """
+        Initializes a new instance of the BatchFailedError class.
+
+        Args:
+            tasks (list[FileTask]): The tasks of the failed batch.
+            error (Exception): The error that failed the batch.
+        """
+        super().__init__(str(error))
+        self.tasks: list[FileTask] = tasks
+        self.error: Exception = error
+
+
+class BatchingStage(ABC):
+    """
+    The base class of pipeline stages that hold tasks back to process several of them together.
+
+    Both methods return the (task, error) pairs of the tasks whose processing finished, with an error of None
+    for tasks that succeeded. A stage that cannot report the failure of a batch it held back this way raises a
+    BatchFailedError with the tasks of the batch, any other exception only fails the task being added.
+    """
+
+    @abstractmethod
+    def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Adds a task to the stage.
+
+        Args:
+            task (FileTask): The task to add.
+
+        Returns:
+            list: The tasks that finished processing.
+        """
+
+    @abstractmethod
+    def flush(self) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Processes all the tasks held back by the stage.
+
+        Returns:
+            list: The tasks that finished processing.
+        """
+
+
+class ImportPipeline:
+    """
+    A class that runs the import stages of many files concurrently.
+
+    Every stage has its own pool of worker threads and stages are joined by bounded queues, so a slow stage
+    applies backpressure to the stages before it. A file that fails in any stage is reported through the
+    failure callback and does not affect the other files.
+    """
+    _DONE = object()
+
+    def __init__(self, stages: list[tuple[str, Callable[[FileTask], None] | BatchingStage, int]],
+                 queue_size: int = 16, flush_interval: float = 0.5):
+        """
+        Initializes a new instance of the ImportPipeline class.
+
+        Args:
+            stages (list): The (name, function, workers) of each stage, in order. The function updates the task
+                in place and raises an exception if the file failed. A BatchingStage can be used instead of a
+                function, it is flushed whenever its input queue stays empty for flush_interval seconds.
+            queue_size (int, optional): The maximum number of files waiting in front of each stage. Defaults to 16.
+            flush_interval (float, optional): The idle time in seconds before a batching stage is flushed.
+                Defaults to 0.5.
+        """
+        self.stages = stages
+        self.flush_interval: float = flush_interval
+        self.queues: list[queue.Queue[Any]] = [queue.Queue(maxsize=queue_size) for _ in stages]
+        # Time in seconds each task spent in each stage, list appends are atomic so workers share the lists
+        self.durations: dict[str, list[float]] = {name: [] for name, _, _ in stages}
+
+    def run(self, tasks: Iterable[FileTask],
+            on_success: Callable[[FileTask], None],
+            on_failure: Callable[[FileTask, Exception], None]) -> None:
+        """
+        Runs the tasks through all stages and blocks until every task succeeded or failed.
+
+        Args:
+            tasks (Iterable[FileTask]): The files to import.
+            on_success (Callable): Called with each task that completed the last stage.
+            on_failure (Callable): Called with each task that failed, and the exception that caused the failure.
+        """
+        threads: list[list[threading.Thread]] = []
+        for index, (name, _, workers) in enumerate(self.stages):
+            stage_threads = [
+                threading.Thread(target=self.__work, args=(index, on_success, on_failure),
+                                 name=f"{name}-{worker}", daemon=True)
+                for worker in range(max(1, workers))
+            ]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+
+        for task in tasks:
+            self.queues[0].put(task)
+        # Shut the stages down in order once the previous stage has drained
+        for index, stage_threads in enumerate(threads):
+            for _ in stage_threads:
+                self.queues[index].put(self._DONE)
+            for thread in stage_threads:
+                thread.join()
+            logging.debug(f"Pipeline stage {self.stages[index][0]} completed")
+
+    def run_inline(self, tasks: Iterable[FileTask],
+                   on_success: Callable[[FileTask], None],
+                   on_failure: Callable[[FileTask, Exception], None]) -> None:
+        """
+        Runs the tasks through all stages one at a time in the calling thread, flushing the batching stages
+        in order once all tasks were added.
+
+        Args:
+            tasks (Iterable[FileTask]): The files to import.
+            on_success (Callable): Called with each task that completed the last stage.
+            on_failure (Callable): Called with each task that failed, and the exception that caused the failure.
+        """
+        for task in tasks:
+            self.__process_inline(0, [(task, None)], on_success, on_failure)
+        for index, (_, function, _) in enumerate(self.stages):
+            if isinstance(function, BatchingStage):
+                self.__process_inline(index + 1, self.__call_stage(index, function.flush), on_success, on_failure)
+
+    def __process_inline(self, index: int, tasks: list[tuple[FileTask, Exception | None]],
+                         on_success: Callable[[FileTask], None],
+                         on_failure: Callable[[FileTask, Exception], None]) -> None:
+        """
+        Runs tasks through the stages starting at the given index, in the calling thread.
+
+        Args:
+            index (int): The index of the first stage.
+            tasks (list): The (task, error) pairs coming out of the previous stage.
+            on_success (Callable): Called with each task that completed the last stage.
+            on_failure (Callable): Called with each task that failed.
+        """
+        for task, error in tasks:
+            if error is not None:
+                self.__notify(on_failure, task, error)
+                continue
+            if index == len(self.stages):
+                self.__notify(on_success, task)
+                continue
+            stage = self.stages[index][1]
+            if isinstance(stage, BatchingStage):
+                finished = self.__call_stage(index, stage.add, task)
+                self.__process_inline(index + 1, finished, on_success, on_failure)
+            else:
+                try:
+                    self.__timed(index, stage, task)
+                except Exception as e:
+                    self.__notify(on_failure, task, e)
+                    continue
+                self.__process_inline(index + 1, [(task, None)], on_success, on_failure)
+
+    def __work(self, index: int,
+               on_success: Callable[[FileTask], None],
+               on_failure: Callable[[FileTask, Exception], None]) -> None:
+        """
+        Processes the tasks of a stage until the stage is shut down.
+
+        Args:
+            index (int): The index of the stage.
+            on_success (Callable): Called with each task that completed the last stage.
+            on_failure (Callable): Called with each task that failed.
+        """
+        function = self.stages[index][1]
+        if isinstance(function, BatchingStage):
+            self.__work_batches(index, function, on_success, on_failure)
+            return
+        while True:
+            task = self.queues[index].get()
+            if task is self._DONE:
+                return
+            try:
+                self.__timed(index, function, task)
+            except Exception as e:
+                self.__forward(index, task, e, on_success, on_failure)
+                continue
+            self.__forward(index, task, None, on_success, on_failure)
+
+    def __work_batches(self, index: int, stage: BatchingStage,
+                       on_success: Callable[[FileTask], None],
+                       on_failure: Callable[[FileTask, Exception], None]) -> None:
+        """
+        Processes the tasks of a batching stage until the stage is shut down, flushing it when it is idle.
+
+        Args:
+            index (int): The index of the stage.
+            stage (BatchingStage): The batching stage.
+            on_success (Callable): Called with each task that completed the last stage.
+            on_failure (Callable): Called with each task that failed.
+        """
+        while True:
+            try:
+                task = self.queues[index].get(timeout=self.flush_interval)
+            except queue.Empty:
+                finished = self.__call_stage(index, stage.flush)
+            else:
+                if task is self._DONE:
+                    for finished_task, error in self.__call_stage(index, stage.flush):
+                        self.__forward(index, finished_task, error, on_success, on_failure)
+                    return
+                finished = self.__call_stage(index, stage.add, task)
+            for finished_task, error in finished:
+                self.__forward(index, finished_task, error, on_success, on_failure)
+
+    def __call_stage(self, index: int, method: Callable[..., list[tuple[FileTask, Exception | None]]],
+                     *args: FileTask) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Calls a batching stage method without letting its errors stop the worker. When the method raises, the
+        added task fails with the tasks of the failed batch, if the stage reported them.
+        """
+        for task in args:
+            task.stage_started = time.perf_counter()
+        try:
+            finished = method(*args)
+        except BatchFailedError as e:
+            logging.error(f"Pipeline batching stage {self.stages[index][0]} failed for {len(e.tasks)} files: "
+                          + f"{str(e)}")
+            failed = list(e.tasks)
+            failed.extend(task for task in args if all(task is not held for held in e.tasks))
+            return [(task, e.error) for task in failed]
+        except Exception as e:
+            logging.error(f"Pipeline batching stage {self.stages[index][0]} failed: {str(e)}")
+            return [(task, e) for task in args]
+        # Tasks held back by the stage are timed from the moment they were added until they come out
+        now = time.perf_counter()
+        for task, _ in finished:
+            self.durations[self.stages[index][0]].append(now - task.stage_started)
+        return finished
+
+    def __timed(self, index: int, function: Callable[[FileTask], None], task: FileTask) -> None:
+        """
+        Calls a stage function with a task and records its duration, including calls that fail.
+        """
+        start = time.perf_counter()
+        try:
+            function(task)
+        finally:
+            self.durations[self.stages[index][0]].append(time.perf_counter() - start)
+
+    def __forward(self, index: int, task: FileTask, error: Exception | None,
+                  on_success: Callable[[FileTask], None],
+                  on_failure: Callable[[FileTask, Exception], None]) -> None:
+        """
+        Passes a task processed by a stage on to the next stage, or reports it if it failed or is complete.
+        """
+        if error is not None:
+            logging.debug(f"Pipeline stage {self.stages[index][0]} failed for {task.file_path}")
+            self.__notify(on_failure, task, error)
+        elif index == len(self.stages) - 1:
+            self.__notify(on_success, task)
+        else:
+            self.queues[index + 1].put(task)
+
+    def __notify(self, callback: Callable[..., None], *args: Any) -> None:
+        """
+        Calls a result callback without letting its errors stop the worker.
+        """
+        try:
+            callback(*args)
+        except Exception as e:
+            logging.error(f"Pipeline callback failed: {str(e)}")
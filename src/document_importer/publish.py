@@ -0,0 +1,41 @@
+# Publishes an index built with the local vector store backend to Azure AI Search
+import sys
+import argparse
+import logging
+from dotenv import load_dotenv, dotenv_values
+from document_importer.local_vector_store import LocalVectorStore
+from document_importer.vector_search import VectorSearch
+
+
+def main(args: list[str] = sys.argv) -> None:
+    """
+    Main function that uploads every document of a local vector store, with its vector, to Azure AI Search.
+    """
+    parser = argparse.ArgumentParser(prog="python -m document_importer.publish")
+    parser.add_argument('--path', help='The directory of the local vector store, '
+                        + 'default=VECTOR_STORE_LOCAL_PATH/INDEX_NAME')
+    parser.add_argument('-l', '--loglevel', default='warning',
+                        help='Provide logging level. Example --loglevel debug, default=warning')
+    options = parser.parse_known_args(args[1:])[0]
+
+    logging.basicConfig(level=options.loglevel.upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    load_dotenv(override=True)
+    config = {
+        **dotenv_values(),
+    }
+    local_store = LocalVectorStore(options.path) if options.path else LocalVectorStore.from_config(config)
+    if len(local_store) == 0:
+        print(f"The local vector store {local_store.path} is empty, nothing to publish.")
+        return
+    vector_search = VectorSearch({**config, "VECTOR_STORE_BACKEND": "azure",
+                                  "EMBEDDING_DIMENSIONS": str(local_store.dimensions)})
+    result = vector_search.push_local_store(local_store)
+    print(f"Published {len(result.keys) - len(result.failed)}/{len(result.keys)} documents of {local_store.path} "
+          + f"to index {config.get('INDEX_NAME')}.")
+    if result.failed:
+        logging.error(f"Failed to publish {len(result.failed)} documents: {next(iter(result.failed.values()))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
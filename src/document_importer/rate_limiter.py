@@ -0,0 +1,434 @@
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, TypeVar
+
+# Status codes of requests that can succeed when sent again
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# Names of the connection error types raised by the openai, requests and azure-core clients
+RETRYABLE_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "ServiceRequestError", "ServiceResponseError"}
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously up to a per-minute capacity.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initializes a new instance of the TokenBucket class.
+
+        Args:
+            per_minute (float): The number of tokens added to the bucket per minute, which is also its capacity.
+        """
+        self.capacity: float = per_minute
+        self.rate: float = per_minute / 60.0
+        self.tokens: float = per_minute
+        self.updated: float = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Takes tokens from the bucket, waiting until enough tokens are available.
+
+        Args:
+            amount (float, optional): The number of tokens to take. Amounts above the capacity take the whole
+                bucket. Defaults to 1.
+
+        Returns:
+            float: The time in seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self.take(amount)
+            if delay == 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def aacquire(self, amount: float = 1) -> float:
+        """
+        Takes tokens from the bucket, waiting without blocking the event loop until enough tokens are available.
+
+        Args:
+            amount (float, optional): The number of tokens to take. Defaults to 1.
+
+        Returns:
+            float: The time in seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self.take(amount)
+            if delay == 0:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def take(self, amount: float = 1) -> float:
+        """
+        Takes tokens from the bucket if enough tokens are available.
+
+        Args:
+            amount (float, optional): The number of tokens to take. Amounts above the capacity take the whole
+                bucket. Defaults to 1.
+
+        Returns:
+            float: 0 if the tokens were taken, else the time in seconds until enough tokens are available.
+        """
+        amount = min(amount, self.capacity)
+        with self.__lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0
+            return (amount - self.tokens) / self.rate
+
+    def drain(self) -> None:
+        """
+        Empties the bucket, used when the service reports that the quota is exhausted.
+        """
+        with self.__lock:
+            self.tokens = 0
+            self.updated = time.monotonic()
+
+
+class RateLimiter:
+    """
+    A client-side rate limiter and retry scheduler shared by all the requests sent to a service.
+
+    Requests wait for the requests-per-minute and tokens-per-minute buckets and for a free concurrency slot.
+    Throttled and transient failures are retried after the delay requested by the service's Retry-After
+    headers, or after a jittered exponential backoff. The concurrency limit is halved on every throttled
+    request and grows back by one after a run of successful requests.
+    """
+
+    def __init__(self, requests_per_minute: float | None = None, tokens_per_minute: float | None = None,
+                 max_concurrency: int = 8, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 60.0, increase_after: int = 20):
+        """
+        Initializes a new instance of the RateLimiter class.
+
+        Args:
+            requests_per_minute (float, optional): The maximum number of requests per minute. Defaults to None.
+            tokens_per_minute (float, optional): The maximum number of tokens per minute. Defaults to None.
+            max_concurrency (int, optional): The maximum number of concurrent requests. Defaults to 8.
+            max_retries (int, optional): The maximum number of retries of a request. Defaults to 5.
+            base_delay (float, optional): The first backoff delay in seconds. Defaults to 1.0.
+            max_delay (float, optional): The longest backoff delay in seconds. Defaults to 60.0.
+            increase_after (int, optional): The number of consecutive successes before the concurrency limit
+                is increased. Defaults to 20.
+        """
+        self.request_bucket: TokenBucket | None = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket: TokenBucket | None = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency: int = max_concurrency
+        self.concurrency: int = max_concurrency
+        self.max_retries: int = max_retries
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.increase_after: int = increase_after
+        self.requests: int = 0
+        self.retries: int = 0
+        self.throttled: int = 0
+        self.__in_flight: int = 0
+        self.__successes: int = 0
+        self.__paused_until: float = 0.0
+        self.__condition = threading.Condition()
+        # Coroutines waiting for a concurrency slot, with the event loop they run in
+        self.__async_waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = deque()
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], prefix: str) -> "RateLimiter":
+        """
+        Creates a rate limiter from the {prefix}_REQUESTS_PER_MINUTE, {prefix}_TOKENS_PER_MINUTE,
+        {prefix}_MAX_CONCURRENCY and {prefix}_MAX_RETRIES configuration settings.
+
+        Args:
+            config (dict): The configuration dictionary.
+            prefix (str): The prefix of the settings, for example EMBEDDING or SEARCH.
+
+        Returns:
+            RateLimiter: The rate limiter.
+        """
+        requests_per_minute = config.get(f"{prefix}_REQUESTS_PER_MINUTE")
+        tokens_per_minute = config.get(f"{prefix}_TOKENS_PER_MINUTE")
+        return cls(
+            requests_per_minute=float(requests_per_minute) if requests_per_minute else None,
+            tokens_per_minute=float(tokens_per_minute) if tokens_per_minute else None,
+            max_concurrency=int(config.get(f"{prefix}_MAX_CONCURRENCY") or 8),
+            max_retries=int(config.get(f"{prefix}_MAX_RETRIES") or 5),
+        )
+
+    def call(self, function: Callable[..., T], *args, tokens: int = 0, **kwargs) -> T:
+        """
+        Calls a function sending a request to the service, waiting for the rate limits and retrying
+        throttled and transient failures.
+
+        Args:
+            function (Callable): The function sending the request.
+            *args: The positional arguments of the function.
+            tokens (int, optional): The number of tokens consumed by the request. Defaults to 0.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            The result of the function.
+
+        Raises:
+            Exception: The error of the last attempt, if the request could not be completed.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.__acquire(tokens)
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                self.__release(success=False)
+                if not self.is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = self.retry_after(e)
+                if self.status_code(e) == 429:
+                    self.__throttle(delay)
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                with self.__condition:
+                    self.retries += 1
+                logging.warning(f"Request failed ({type(e).__name__}: {self.status_code(e)}), "
+                                + f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})...")
+                time.sleep(delay)
+                continue
+            self.__release(success=True)
+            return result
+        # Only reached with a negative max_retries, when no attempt is made
+        raise ValueError(f"Invalid max_retries: {self.max_retries}")
+
+    async def acall(self, function: Callable[..., Awaitable[T]], *args, tokens: int = 0, **kwargs) -> T:
+        """
+        Awaits a coroutine function sending a request to the service, waiting for the rate limits and retrying
+        throttled and transient failures without blocking the event loop. Requests sent with call and acall
+        share the same limits.
+
+        Args:
+            function (Callable): The coroutine function sending the request.
+            *args: The positional arguments of the function.
+            tokens (int, optional): The number of tokens consumed by the request. Defaults to 0.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            The result of the function.
+
+        Raises:
+            Exception: The error of the last attempt, if the request could not be completed.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.__aacquire(tokens)
+            try:
+                result = await function(*args, **kwargs)
+            except Exception as e:
+                self.__release(success=False)
+                if not self.is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = self.retry_after(e)
+                if self.status_code(e) == 429:
+                    self.__throttle(delay)
+                if delay is None:
+                    delay = self.backoff_delay(attempt)
+                with self.__condition:
+                    self.retries += 1
+                logging.warning(f"Request failed ({type(e).__name__}: {self.status_code(e)}), "
+                                + f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})...")
+                await asyncio.sleep(delay)
+                continue
+            self.__release(success=True)
+            return result
+        # Only reached with a negative max_retries, when no attempt is made
+        raise ValueError(f"Invalid max_retries: {self.max_retries}")
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Computes the jittered exponential backoff delay of a retry.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 0.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        return random.uniform(0.5, 1.0) * min(self.max_delay, self.base_delay * 2.0 ** attempt)
+
+    def report_throttled(self, delay: float | None = None) -> None:
+        """
+        Reports a throttled operation that was not sent through call, such as a document rejected with 429
+        inside a successful batch request.
+
+        Args:
+            delay (float, optional): The delay requested by the service in seconds. Defaults to None.
+        """
+        self.__throttle(delay)
+
+    @staticmethod
+    def status_code(error: Exception) -> int | None:
+        """
+        Returns the HTTP status code of a request error, if any.
+
+        Args:
+            error (Exception): The request error.
+
+        Returns:
+            int | None: The status code.
+        """
+        status_code = getattr(error, "status_code", None)
+        if status_code is None:
+            status_code = getattr(getattr(error, "response", None), "status_code", None)
+        return status_code if isinstance(status_code, int) else None
+
+    @classmethod
+    def is_retryable(cls, error: Exception) -> bool:
+        """
+        Checks if a request error is transient.
+
+        Args:
+            error (Exception): The request error.
+
+        Returns:
+            bool: True if the request can be retried.
+        """
+        if cls.status_code(error) in RETRYABLE_STATUS_CODES:
+            return True
+        return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+    @staticmethod
+    def retry_after(error: Exception) -> float | None:
+        """
+        Reads the delay requested by the service from the headers of an error response.
+
+        Args:
+            error (Exception): The request error.
+
+        Returns:
+            float | None: The delay in seconds, or None if the response has no retry headers.
+        """
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if not headers:
+            return None
+        for name in ("retry-after-ms", "x-ms-retry-after-ms"):
+            value = headers.get(name)
+            if value:
+                try:
+                    return float(value) / 1000.0
+                except ValueError:
+                    pass
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+            try:
+                retry_date = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            return max(0.0, retry_date.timestamp() - time.time())
+        return None
+
+    def __acquire(self, tokens: int) -> None:
+        """
+        Waits for a concurrency slot, for a global pause to end and for the rate limit buckets.
+
+        Args:
+            tokens (int): The number of tokens consumed by the request.
+        """
+        with self.__condition:
+            while self.__in_flight >= self.concurrency:
+                self.__condition.wait()
+            self.__in_flight += 1
+            self.requests += 1
+            pause = self.__paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+        if self.request_bucket is not None:
+            self.request_bucket.acquire(1)
+        if self.token_bucket is not None and tokens > 0:
+            self.token_bucket.acquire(tokens)
+
+    async def __aacquire(self, tokens: int) -> None:
+        """
+        Waits for a concurrency slot, for a global pause to end and for the rate limit buckets without blocking
+        the event loop.
+
+        Args:
+            tokens (int): The number of tokens consumed by the request.
+        """
+        while True:
+            with self.__condition:
+                if self.__in_flight < self.concurrency:
+                    self.__in_flight += 1
+                    self.requests += 1
+                    pause = self.__paused_until - time.monotonic()
+                    break
+                loop = asyncio.get_running_loop()
+                waiter = loop.create_future()
+                self.__async_waiters.append((loop, waiter))
+            await waiter
+        if pause > 0:
+            await asyncio.sleep(pause)
+        if self.request_bucket is not None:
+            await self.request_bucket.aacquire(1)
+        if self.token_bucket is not None and tokens > 0:
+            await self.token_bucket.aacquire(tokens)
+
+    def __release(self, success: bool) -> None:
+        """
+        Frees a concurrency slot and grows the concurrency limit after a run of successful requests.
+
+        Args:
+            success (bool): True if the request succeeded.
+        """
+        with self.__condition:
+            self.__in_flight -= 1
+            if success:
+                self.__successes += 1
+                if self.__successes >= self.increase_after and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self.__successes = 0
+                    logging.debug(f"Rate limiter concurrency increased to {self.concurrency}")
+            self.__condition.notify_all()
+            # Waiting coroutines compete for the slot again, they may run in the event loop of another thread
+            waiters = list(self.__async_waiters)
+            self.__async_waiters.clear()
+        for loop, waiter in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self.__wake, waiter)
+
+    @staticmethod
+    def __wake(waiter: asyncio.Future[None]) -> None:
+        """
+        Wakes a coroutine waiting for a concurrency slot.
+
+        Args:
+            waiter (asyncio.Future): The future the coroutine waits for.
+        """
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def __throttle(self, delay: float | None) -> None:
+        """
+        Halves the concurrency limit and pauses all requests for the delay requested by the service.
+
+        Args:
+            delay (float | None): The delay requested by the service in seconds.
+        """
+        with self.__condition:
+            self.throttled += 1
+            self.__successes = 0
+            self.concurrency = max(1, self.concurrency // 2)
+            if delay is not None:
+                self.__paused_until = max(self.__paused_until, time.monotonic() + delay)
+        if self.token_bucket is not None:
+            self.token_bucket.drain()
+        logging.debug(f"Rate limiter throttled, concurrency decreased to {self.concurrency}")
@@ -0,0 +1,71 @@
+import re
+from typing import Any, Callable
+
+# The OData filter clauses used by the importer: field eq 'value', field gt 'value' and
+# search.in(field, 'values', 'separator')
+FILTER_CLAUSE = re.compile(
+    r"\s*(?:(\w+) (eq|gt) '((?:[^']|'')*)'|search\.in\((\w+), '((?:[^']|'')*)', '([^']*)'\))\s*(?:and\s+|$)"
+)
+
+
+def parse_filter(filter: str | None) -> Callable[[dict[str, Any]], bool]:
+    """
+    Parses an OData filter made of eq, gt and search.in clauses joined by and, the subset of the Azure AI Search
+    filter syntax used by the importer. The gt clauses compare strings, like the key range of paged searches.
+
+    Args:
+        filter (str | None): The filter.
+
+    Returns:
+        Callable: A function returning True for the documents matching the filter.
+
+    Raises:
+        ValueError: If the filter uses an unsupported expression.
+    """
+    clauses: list[tuple[str, set[str]]] = []
+    ranges: list[tuple[str, str]] = []
+    position = 0
+    while filter and position < len(filter):
+        match = FILTER_CLAUSE.match(filter, position)
+        if not match:
+            raise ValueError(f"Unsupported filter: {filter}")
+        if match.group(2) == "eq":
+            clauses.append((match.group(1), {match.group(3).replace("''", "'")}))
+        elif match.group(2) == "gt":
+            ranges.append((match.group(1), match.group(3).replace("''", "'")))
+        else:
+            values = match.group(5).replace("''", "'")
+            clauses.append((match.group(4), set(values.split(match.group(6) or ","))))
+        position = match.end()
+    return lambda document: (all(document.get(field_name) in values for field_name, values in clauses)
+                             and all(document.get(field_name) is not None and document[field_name] > value
+                                     for field_name, value in ranges))
+
+
+def sort_key(order_by: list[str] | str | None) -> tuple[Callable[[dict[str, Any]], tuple[Any, ...]], bool] | None:
+    """
+    Parses an OData order by clause of one or more fields sorted in the same direction, see parse_filter.
+
+    Args:
+        order_by (list[str] | str | None): The fields, optionally followed by asc or desc, as a list or a comma
+            separated string.
+
+    Returns:
+        tuple: The function returning the sort key of a document and whether the order is descending, None when
+            the order by clause is empty.
+
+    Raises:
+        ValueError: If the fields are sorted in different directions.
+    """
+    if isinstance(order_by, str):
+        order_by = order_by.split(",")
+    fields = [item.split() for item in order_by or () if item.strip()]
+    if not fields:
+        return None
+    directions = {parts[1].lower() if len(parts) > 1 else "asc" for parts in fields}
+    if len(directions) > 1 or not directions <= {"asc", "desc"}:
+        raise ValueError(f"Unsupported order by: {order_by}")
+    names = [parts[0] for parts in fields]
+    # Missing values sort first, like nulls in Azure AI Search
+    return (lambda document: tuple((document.get(name) is not None, document.get(name)) for name in names),
+            directions == {"desc"})
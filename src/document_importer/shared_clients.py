@@ -0,0 +1,155 @@
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+from document_importer.vector_search import VectorSearch
+from document_importer.document_manager import DocumentManager
+from document_importer.import_state import ImportState
+from document_importer.checkpoint_journal import CheckpointJournal
+from document_importer.rate_limiter import RateLimiter
+from document_importer.metrics import Metrics
+
+
+class FairBudget:
+    """
+    A global budget of files in flight shared by the importers of several repositories. Freed slots are granted
+    to the waiting repositories in round-robin order, so a large repository cannot starve the others.
+    """
+
+    def __init__(self, slots: int):
+        """
+        Initializes a new instance of the FairBudget class.
+
+        Args:
+            slots (int): The maximum number of files in flight across all repositories.
+        """
+        self.slots: int = max(1, slots)
+        self.__free: int = self.slots
+        # Repositories waiting for a slot in the order of their turn, with their number of waiting files
+        self.__turns: deque[str] = deque()
+        self.__waiting: dict[str, int] = {}
+        self.__granted: dict[str, int] = {}
+        self.__condition = threading.Condition()
+
+    def acquire(self, owner: str) -> None:
+        """
+        Waits for a slot.
+
+        Args:
+            owner (str): The repository the slot is used by.
+        """
+        with self.__condition:
+            if self.__free > 0 and not self.__turns:
+                self.__free -= 1
+                return
+            self.__waiting[owner] = self.__waiting.get(owner, 0) + 1
+            if owner not in self.__turns:
+                self.__turns.append(owner)
+            while self.__granted.get(owner, 0) == 0:
+                self.__condition.wait()
+            self.__granted[owner] -= 1
+
+    def release(self) -> None:
+        """
+        Frees a slot, granting it to the repository whose turn it is.
+        """
+        with self.__condition:
+            if not self.__turns:
+                self.__free += 1
+                return
+            owner = self.__turns.popleft()
+            self.__waiting[owner] -= 1
+            self.__granted[owner] = self.__granted.get(owner, 0) + 1
+            if self.__waiting[owner] > 0:
+                self.__turns.append(owner)
+            else:
+                del self.__waiting[owner]
+            self.__condition.notify_all()
+
+
+@dataclass
+class SharedClients:
+    """
+    The clients and state shared by the importers of several repositories imported by the same process, so the
+    embedding dimensions are probed once and the pooled HTTP connections and rate limiters are reused.
+    """
+    metrics: Metrics
+    search_rate_limiter: RateLimiter
+    vector_search: VectorSearch
+    document_manager: DocumentManager
+    import_state: ImportState | None = None
+    checkpoint_journal: CheckpointJournal | None = None
+    budget: FairBudget | None = None
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], incremental: bool = False, state_path: str = ".import_state.json",
+                    checkpoint_path: str | None = None, max_files_in_flight: int | None = None) -> "SharedClients":
+        """
+        Creates the shared clients.
+
+        Args:
+            config (dict): The configuration dictionary.
+            incremental (bool, optional): Share an import state for incremental imports. Defaults to False.
+            state_path (str, optional): The path to the import state file. Defaults to ".import_state.json".
+            checkpoint_path (str, optional): The path to the shared checkpoint journal. Defaults to None.
+            max_files_in_flight (int, optional): The global budget of files in flight, unlimited when None.
+                Defaults to None.
+
+        Returns:
+            SharedClients: The shared clients.
+        """
+        metrics = Metrics()
+        search_rate_limiter = RateLimiter.from_config(config, "SEARCH")
+        vector_search = VectorSearch(config, search_rate_limiter=search_rate_limiter, metrics=metrics)
+        document_manager = DocumentManager(config, rate_limiter=search_rate_limiter, metrics=metrics,
+                                           local_store=vector_search.local_store,
+                                           async_session=vector_search.async_session)
+        logging.info(f"Shared clients created (budget of files in flight: {max_files_in_flight or 'unlimited'})")
+        return cls(
+            metrics=metrics,
+            search_rate_limiter=search_rate_limiter,
+            vector_search=vector_search,
+            document_manager=document_manager,
+            import_state=ImportState(state_path) if incremental else None,
+            checkpoint_journal=CheckpointJournal(checkpoint_path) if checkpoint_path else None,
+            budget=FairBudget(max_files_in_flight) if max_files_in_flight else None,
+        )
+
+    def record_metrics(self) -> None:
+        """
+        Records the HTTP requests of the shared rate limiters and the embedding cache statistics in the metrics.
+        """
+        for name, rate_limiter in (("embedding", self.vector_search.embedding_rate_limiter),
+                                   ("search", self.search_rate_limiter)):
+            self.metrics.increment(f"{name}.http_requests", rate_limiter.requests)
+            self.metrics.increment(f"{name}.http_retries", rate_limiter.retries)
+            self.metrics.increment(f"{name}.http_throttled", rate_limiter.throttled)
+        embedding_cache = self.vector_search.embedding_cache
+        if embedding_cache is not None:
+            self.metrics.increment("embedding_cache.hits", embedding_cache.hits)
+            self.metrics.increment("embedding_cache.misses", embedding_cache.misses)
+
+    def print_statistics(self) -> None:
+        """
+        Prints the retried requests of the rate limiters and the embedding cache statistics.
+        """
+        for name, rate_limiter in (("Embedding", self.vector_search.embedding_rate_limiter),
+                                   ("Search", self.search_rate_limiter)):
+            if rate_limiter.retries > 0:
+                print(f"{name} requests: {rate_limiter.requests} sent, {rate_limiter.retries} retried, "
+                      + f"{rate_limiter.throttled} throttled.")
+        embedding_cache = self.vector_search.embedding_cache
+        if embedding_cache is not None:
+            print(f"Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} misses.")
+
+    def close(self) -> None:
+        """
+        Saves the shared state and closes the checkpoint journal.
+        """
+        if self.import_state is not None:
+            self.import_state.save()
+        if self.checkpoint_journal is not None:
+            self.checkpoint_journal.close()
+        if self.vector_search.local_store is not None:
+            self.vector_search.local_store.save()
@@ -0,0 +1,149 @@
+import math
+import re
+from typing import Callable
+
+# Boundary strength of the gap before a token, a chunk is cut at the strongest boundary near its target size
+PARAGRAPH, LINE, SENTENCE, WORD, NONE = 4, 3, 2, 1, 0
+SENTENCE_END = re.compile(r"[.!?:;]\s$|[.!?:;]$")
+
+
+def tiktoken_offsets(encoding_name: str = "cl100k_base") -> Callable[[str], list[int]]:
+    """
+    Creates a function tokenizing a text with a tiktoken BPE encoding and returning the character offset of
+    each token. The tiktoken package is imported on first use, its encoding files are read from the
+    TIKTOKEN_CACHE_DIR directory when set.
+
+    Args:
+        encoding_name (str, optional): The tiktoken encoding. Defaults to "cl100k_base", the encoding of the
+            Azure OpenAI embedding models.
+
+    Returns:
+        Callable: The function returning the start offset of each token of a text.
+    """
+    import tiktoken
+
+    encoding = tiktoken.get_encoding(encoding_name)
+
+    def offsets(text: str) -> list[int]:
+        return encoding.decode_with_offsets(encoding.encode(text, disallowed_special=()))[1]
+
+    return offsets
+
+
+class TokenChunker:
+    """
+    A class that splits text into chunks of a target number of tokens. Each text is tokenized once and cut
+    at paragraph, line, sentence or word boundaries using the character offsets of its tokens, so no chunk
+    is tokenized again. The chunks of a text are balanced to about the same size.
+    """
+
+    def __init__(self, token_offsets: Callable[[str], list[int]], chunk_tokens: int = 512,
+                 overlap_tokens: int = 0):
+        """
+        Initializes a new instance of the TokenChunker class.
+
+        Args:
+            token_offsets (Callable): The tokenizer, returning the character offset of each token of a text.
+            chunk_tokens (int, optional): The maximum number of tokens of a chunk. Defaults to 512.
+            overlap_tokens (int, optional): The number of tokens repeated at the start of the next chunk.
+                Defaults to 0.
+        """
+        if chunk_tokens <= 0 or overlap_tokens < 0 or overlap_tokens >= chunk_tokens:
+            raise ValueError(f"Invalid token chunk size {chunk_tokens} with overlap {overlap_tokens}")
+        self.token_offsets = token_offsets
+        self.chunk_tokens: int = chunk_tokens
+        self.overlap_tokens: int = overlap_tokens
+
+    def split_text(self, text: str) -> list[tuple[str, int]]:
+        """
+        Splits a text into chunks of at most chunk_tokens tokens.
+
+        Args:
+            text (str): The text, for example a section of a markdown document.
+
+        Returns:
+            list[tuple[str, int]]: The text and the number of tokens of each chunk, without the whitespace
+                at the edges of the chunk.
+        """
+        offsets = self.token_offsets(text)
+        if not offsets:
+            return []
+        # Sentinel offset after the last token
+        offsets = list(offsets) + [len(text)]
+        boundaries = [self.__boundary(text, offset) for offset in offsets]
+        token_count = len(offsets) - 1
+        chunks: list[tuple[str, int]] = []
+        start = 0
+        while start < token_count:
+            remaining = token_count - start
+            if remaining <= self.chunk_tokens:
+                end = token_count
+            else:
+                # Balance the remaining tokens over the fewest chunks that can hold them
+                chunk_count = math.ceil(remaining / (self.chunk_tokens - self.overlap_tokens))
+                target = start + math.ceil(remaining / chunk_count) + self.overlap_tokens
+                end = self.__cut(boundaries, start, min(target, start + self.chunk_tokens),
+                                 start + self.chunk_tokens)
+            chunk = self.__chunk(text, offsets, start, end)
+            if chunk is not None:
+                chunks.append(chunk)
+            if end >= token_count:
+                break
+            start = self.__next_start(boundaries, start, end)
+        return chunks
+
+    @staticmethod
+    def __boundary(text: str, offset: int) -> int:
+        """
+        Classifies the gap before the token starting at a character offset.
+        """
+        if offset <= 0 or offset >= len(text):
+            return PARAGRAPH
+        around = text[max(0, offset - 2):offset + 2]
+        if "\n\n" in around:
+            return PARAGRAPH
+        if "\n" in text[offset - 1:offset + 1]:
+            return LINE
+        if SENTENCE_END.search(text[max(0, offset - 2):offset]) and (text[offset - 1].isspace()
+                                                                     or text[offset].isspace()):
+            return SENTENCE
+        if text[offset - 1].isspace() or text[offset].isspace():
+            return WORD
+        return NONE
+
+    @staticmethod
+    def __cut(boundaries: list[int], start: int, target: int, limit: int) -> int:
+        """
+        Finds the end token of a chunk: the strongest boundary in the second half of the chunk, closest to
+        the target, or the limit if the chunk has no word boundary.
+        """
+        lowest = start + max(1, (target - start) // 2)
+        for strength in (PARAGRAPH, LINE, SENTENCE, WORD):
+            candidates = [index for index in range(lowest, limit + 1) if boundaries[index] >= strength]
+            if candidates:
+                return min(candidates, key=lambda index: (abs(index - target), -index))
+        return limit
+
+    def __next_start(self, boundaries: list[int], start: int, end: int) -> int:
+        """
+        Finds the start token of the next chunk, overlap_tokens before the end of the chunk at a word boundary.
+        """
+        if self.overlap_tokens == 0:
+            return end
+        for index in range(max(start + 1, end - self.overlap_tokens), end):
+            if boundaries[index] >= WORD:
+                return index
+        return end
+
+    @staticmethod
+    def __chunk(text: str, offsets: list[int], start: int, end: int) -> tuple[str, int] | None:
+        """
+        Slices the text of the tokens from start to end, dropping the whitespace tokens at its edges.
+        """
+        while start < end and text[offsets[start]:offsets[start + 1]].isspace():
+            start += 1
+        while end > start and text[offsets[end - 1]:offsets[end]].isspace():
+            end -= 1
+        if start == end:
+            return None
+        return text[offsets[start]:offsets[end]].strip(), end - start
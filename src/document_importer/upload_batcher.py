@@ -0,0 +1,117 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+from document_importer.pipeline import BatchingStage, FileTask
+
+if TYPE_CHECKING:
+    from document_importer.vector_search import BulkUploadResult
+
+
+class UploadBatcher(BatchingStage):
+    """
+    A class that collects the search documents of many files into bulk uploads of about batch_size documents,
+    and reports every file whose documents failed to upload.
+    """
+
+    def __init__(self, build_documents: Callable[[FileTask], list[dict[str, Any]]],
+                 upload: Callable[[list[dict[str, Any]]], "BulkUploadResult"],
+                 batch_size: int = 1000):
+        """
+        Initializes a new instance of the UploadBatcher class.
+
+        Args:
+            build_documents (Callable): The function building the search documents of an embedded file.
+            upload (Callable): The bulk upload function, called with the search documents of several files and
+                returning a BulkUploadResult.
+            batch_size (int, optional): The number of documents collected before uploading. Defaults to 1000.
+        """
+        self.build_documents = build_documents
+        self.upload = upload
+        self.batch_size: int = batch_size
+        self.uploads: int = 0
+        self.__lock = threading.Lock()
+        self.__pending: list[tuple[FileTask, list[dict[str, Any]]]] = []
+        self.__pending_documents: int = 0
+
+    def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Queues the chunks of an embedded file and uploads the pending files once the batch is full.
+
+        Args:
+            task (FileTask): The embedded file.
+
+        Returns:
+            list: The files that were uploaded, or that failed.
+        """
+        try:
+            documents = self.build_documents(task)
+        except Exception as e:
+            return [(task, e)]
+        if len(documents) == 0:
+            return [(task, None)]
+        with self.__lock:
+            self.__pending.append((task, documents))
+            self.__pending_documents += len(documents)
+            if self.__pending_documents < self.batch_size:
+                return []
+            tasks = self.__take_pending()
+        return self.__upload_tasks(tasks)
+
+    def flush(self) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Uploads the files still waiting for an upload.
+
+        Returns:
+            list: The files that were uploaded, or that failed.
+        """
+        with self.__lock:
+            if not self.__pending:
+                return []
+            tasks = self.__take_pending()
+        return self.__upload_tasks(tasks)
+
+    def __take_pending(self) -> list[tuple[FileTask, list[dict[str, Any]]]]:
+        """
+        Takes the pending files out of the batcher. Must be called while holding the lock.
+
+        Returns:
+            list: The pending files with their search documents.
+        """
+        tasks = self.__pending
+        self.__pending = []
+        self.__pending_documents = 0
+        return tasks
+
+    def __upload_tasks(self,
+                       tasks: list[tuple[FileTask, list[dict[str, Any]]]]) -> list[tuple[FileTask, Exception | None]]:
+        """
+        Uploads the search documents of several files with one bulk upload.
+
+        Args:
+            tasks (list): The files to upload with their search documents.
+
+        Returns:
+            list: The files that were uploaded, or that failed.
+        """
+        documents: list[dict[str, Any]] = []
+        for _, task_documents in tasks:
+            documents.extend(task_documents)
+        logging.debug(f"Uploading {len(documents)} documents of {len(tasks)} files...")
+        try:
+            result = self.upload(documents)
+        except Exception as e:
+            return [(task, e) for task, _ in tasks]
+        with self.__lock:
+            self.uploads += 1
+        finished: list[tuple[FileTask, Exception | None]] = []
+        offset = 0
+        for task, task_documents in tasks:
+            keys = result.keys[offset:offset + len(task_documents)]
+            offset += len(task_documents)
+            errors = [result.failed[key] for key in keys if key in result.failed]
+            if errors:
+                finished.append((task, RuntimeError(f"Failed to upload {len(errors)}/{len(keys)} chunks: "
+                                                    + errors[0])))
+            else:
+                finished.append((task, None))
+        return finished
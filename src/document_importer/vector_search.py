@@ -1,15 +1,63 @@
 
-from langchain_community.vectorstores.azuresearch import AzureSearch
-from langchain_openai import AzureOpenAIEmbeddings
-from langchain_community.document_loaders import TextLoader
-from langchain_text_splitters import CharacterTextSplitter
+# The langchain and openai modules take seconds to import, they are imported by the code paths that use them
+from typing import TYPE_CHECKING, Any, Sequence
+from document_importer.async_search import AsyncSearchSession
+from document_importer.chunk_diff import ChunkDiff, chunk_keys
+from document_importer.chunk_record import FIELD_KEYS, deserialize_metadata, serialize_metadata
+from document_importer.embedding_dimensions import resolve_embedding_dimensions
+from document_importer.embedding_batcher import estimate_tokens
+from document_importer.local_vector_store import LocalVectorStore
+from document_importer.metrics import Metrics
+from document_importer.rate_limiter import RateLimiter
+from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.search.documents import SearchClient
+from azure.search.documents.indexes import SearchIndexClient
+from azure.search.documents.models import IndexAction, IndexDocumentsBatch, VectorizedQuery
 from azure.search.documents.indexes.models import (
+    ExhaustiveKnnAlgorithmConfiguration,
+    ExhaustiveKnnParameters,
+    HnswAlgorithmConfiguration,
+    HnswParameters,
     SearchableField,
     SearchField,
     SearchFieldDataType,
+    SearchIndex,
     SimpleField,
+    VectorSearch as IndexVectorSearch,
+    VectorSearchAlgorithmMetric,
+    VectorSearchProfile,
 )
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from requests.adapters import HTTPAdapter
+if TYPE_CHECKING:
+    from document_importer.embedding_cache import EmbeddingCache
+import asyncio
+import json
 import logging
+import requests
+import threading
+import time
+
+FIELDS_ID = "id"
+FIELDS_CONTENT = "content"
+FIELDS_CONTENT_VECTOR = "content_vector"
+FIELDS_METADATA = "metadata"
+FIELDS_ACTION = "@search.action"
+# Indexing status codes of documents that can succeed when uploaded again
+RETRYABLE_STATUS_CODES = {409, 422, 429, 503}
+
+
+@dataclass
+class BulkUploadResult:
+    """
+    The result of a bulk upload: the key of every document, in input order, and the error of each failed key.
+    """
+    keys: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
 
 
 class VectorSearch:
@@ -17,44 +65,157 @@ class VectorSearch:
     A class for performing vector-based search using Azure OpenAI and Azure Search.
     """
 
-    def __init__(self, config: dict = {}):
+    def __init__(self, config: dict = {}, embedding_rate_limiter: RateLimiter | None = None,
+                 search_rate_limiter: RateLimiter | None = None, metrics: Metrics | None = None):
         """
         Initializes the VectorSearch object.
 
         Args:
             config (dict): A dictionary containing configuration parameters for Azure OpenAI and Azure Search.
+            embedding_rate_limiter (RateLimiter): The rate limiter of the embedding requests
+                (default: created from the EMBEDDING_* configuration).
+            search_rate_limiter (RateLimiter): The rate limiter of the search requests
+                (default: created from the SEARCH_* configuration).
+            metrics (Metrics): The metrics the embedding and upload timers and counters are recorded in
+                (default: a new Metrics).
         """
-        # Azure OpenAI
-        azure_endpoint: str = config.get("AZURE_OPENAI_ENDPOINT")
-        azure_openai_api_key: str = config.get("AZURE_OPENAI_API_KEY")
-        azure_openai_api_version: str = config.get("AZURE_OPENAI_API_VERSION")
-        azure_deployment: str = config.get("AZURE_DEPLOYMENT")
+        self.metrics: Metrics = metrics or Metrics()
+        self.embedding_rate_limiter: RateLimiter = (embedding_rate_limiter
+                                                    or RateLimiter.from_config(config, "EMBEDDING"))
+        self.search_rate_limiter: RateLimiter = search_rate_limiter or RateLimiter.from_config(config, "SEARCH")
 
         # Azure Search
         vector_store_address: str = config.get("VECTOR_STORE_ADDRESS")
         vector_store_password: str = config.get("VECTOR_STORE_PASSWORD")
         index_name: str = config.get("INDEX_NAME")
 
-        # Initialize the Azure OpenAI Embeddings
-        self.embeddings: AzureOpenAIEmbeddings = AzureOpenAIEmbeddings(
-            azure_deployment=azure_deployment,
-            openai_api_version=azure_openai_api_version,
-            azure_endpoint=azure_endpoint,
-            api_key=azure_openai_api_key,
-        )
-        logging.info(f"Embeddings initialized : {azure_deployment} (endpoint), {azure_deployment} (deployment)")
-
-        # Initialize the Azure Search Vector Store
-        self.vector_store: AzureSearch = AzureSearch(
-            azure_search_endpoint=vector_store_address,
-            azure_search_key=vector_store_password,
-            index_name=index_name,
-            embedding_function=self.embeddings.embed_query,
-            fields=self.__index_fields()
-        )
+        # The embeddings client and the langchain vector store are created on first use
+        self.config: dict[str, Any] = config
+        self.embedding_cache: "EmbeddingCache | None" = None
+        embedding_cache_path = config.get("EMBEDDING_CACHE_PATH")
+        if embedding_cache_path:
+            # The cache module imports langchain, it is only loaded when the cache is enabled
+            import document_importer.embedding_cache
+
+            self.embedding_cache = document_importer.embedding_cache.EmbeddingCache(
+                embedding_cache_path, max_entries=int(config.get("EMBEDDING_CACHE_MAX_ENTRIES") or 100000)
+            )
+        self.__embeddings: Any = None
+        self.__embedding_function: Any = None
+        self.__vector_store: Any = None
+        self.__clients_lock = threading.Lock()
+
+        # Initialize the Azure Search index, the vector dimension is only probed if it is not known
+        self.vector_search_dimensions: int = resolve_embedding_dimensions(
+            config, lambda: len(self.embedding_function.embed_query("Text")))
+        self.fields: list[SearchField] = self.__index_fields()
+        self.upload_batch_size: int = int(config.get("UPLOAD_BATCH_SIZE") or 1000)
+        self.upload_max_payload_bytes: int = int(config.get("UPLOAD_MAX_PAYLOAD_BYTES") or 16 * 1024 * 1024)
+        self.upload_parallelism: int = int(config.get("UPLOAD_PARALLELISM") or 4)
+        self.upload_max_retries: int = int(config.get("UPLOAD_MAX_RETRIES") or 3)
+        # Batched queries, see search_many
+        self.query_batch_size: int = int(config.get("EMBEDDING_BATCH_MAX_ITEMS") or 16)
+        self.query_parallelism: int = int(config.get("SEARCH_QUERY_PARALLELISM") or 8)
+        self.query_cache_size: int = int(config.get("SEARCH_QUERY_CACHE_SIZE") or 10000)
+        self.__query_vectors: OrderedDict[str, list[float]] = OrderedDict()
+        self.__query_vectors_lock = threading.Lock()
+
+        # The local backend keeps the index on disk and replaces both Azure Search clients
+        self.local_store: LocalVectorStore | None = None
+        self.async_session: AsyncSearchSession | None = None
+        self.index_client: SearchIndexClient | None = None
+        self.upload_client: SearchClient | LocalVectorStore
+        self.vector_store_address: str = vector_store_address
+        self.index_name: str = index_name
+        if (config.get("VECTOR_STORE_BACKEND") or "azure").lower() == "local":
+            self.local_store = LocalVectorStore.from_config(config, dimensions=self.vector_search_dimensions)
+            self.upload_client = self.local_store
+            logging.info(f"Vector store initialized: {self.local_store.path} (local), {index_name} (index)")
+            return
+
+        self.index_client = SearchIndexClient(vector_store_address, AzureKeyCredential(vector_store_password))
+        self.__ensure_index(self.index_client, index_name)
         logging.info(f"Vector store initialized: {vector_store_address} (endpoint), {index_name} (index)")
 
-    def search(self, query: str, k: int = 3, search_type: str = "similarity", filters: str = None):
+        # Initialize the bulk upload client, sharing one pooled HTTP session between the parallel uploads
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=max(10, self.upload_parallelism, self.query_parallelism))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self.upload_client = SearchClient(
+            vector_store_address, index_name, AzureKeyCredential(vector_store_password),
+            transport=RequestsTransport(session=session, session_owner=False),
+        )
+        # The async clients of aembed_chunks and abulk_index share one pooled aiohttp session
+        self.async_session = AsyncSearchSession(vector_store_address, vector_store_password,
+                                                connection_limit=max(100, self.search_rate_limiter.max_concurrency))
+
+    @property
+    def embeddings(self):
+        """
+        The Azure OpenAI embeddings client, created on first use.
+        """
+        with self.__clients_lock:
+            if self.__embeddings is None:
+                from langchain_openai import AzureOpenAIEmbeddings
+
+                azure_deployment: str = self.config.get("AZURE_DEPLOYMENT")
+                self.__embeddings = AzureOpenAIEmbeddings(
+                    azure_deployment=azure_deployment,
+                    openai_api_version=self.config.get("AZURE_OPENAI_API_VERSION"),
+                    azure_endpoint=self.config.get("AZURE_OPENAI_ENDPOINT"),
+                    api_key=self.config.get("AZURE_OPENAI_API_KEY"),
+                    # Sending raw text skips the client-side tiktoken tokenization of every chunk
+                    check_embedding_ctx_length=(str(self.config.get("EMBEDDING_CHECK_CONTEXT_LENGTH") or "true")
+                                                .lower() != "false"),
+                    # Retries are scheduled by the shared embedding rate limiter
+                    max_retries=0,
+                )
+                logging.info(f"Embeddings initialized : {self.config.get('AZURE_OPENAI_ENDPOINT')} (endpoint), "
+                             + f"{azure_deployment} (deployment)")
+            return self.__embeddings
+
+    @property
+    def embedding_function(self):
+        """
+        The embeddings used for chunks and queries, reading and filling the embedding cache when it is enabled.
+        """
+        embeddings = self.embeddings
+        with self.__clients_lock:
+            if self.__embedding_function is None:
+                if self.embedding_cache is not None:
+                    from document_importer.embedding_cache import CachedEmbeddings
+
+                    model = self.embedding_cache.model_key(self.config.get("AZURE_OPENAI_ENDPOINT") or "",
+                                                           self.config.get("AZURE_DEPLOYMENT") or "",
+                                                           self.vector_search_dimensions)
+                    self.__embedding_function = CachedEmbeddings(embeddings, self.embedding_cache, model)
+                else:
+                    self.__embedding_function = embeddings
+            return self.__embedding_function
+
+    @property
+    def vector_store(self):
+        """
+        The langchain AzureSearch vector store used by searches, created on first use.
+        """
+        embedding_function = self.embedding_function
+        with self.__clients_lock:
+            if self.__vector_store is None:
+                from langchain_community.vectorstores.azuresearch import AzureSearch
+
+                self.__vector_store = AzureSearch(
+                    azure_search_endpoint=self.vector_store_address,
+                    azure_search_key=self.config.get("VECTOR_STORE_PASSWORD"),
+                    index_name=self.index_name,
+                    embedding_function=embedding_function,
+                    fields=self.fields,
+                    vector_search_dimensions=self.vector_search_dimensions,
+                )
+            return self.__vector_store
+
+    def search(self, query: str, k: int = 3, search_type: str = "similarity", filters: str | None = None):
         """
         Performs a vector-based search.
 
@@ -67,7 +228,161 @@ class VectorSearch:
         Returns:
             list: A list of search results.
         """
-        return self.vector_store.similarity_search(query=query, k=k, search_type=search_type, filters=filters)
+        if self.local_store is not None:
+            return self.__search_local(query, k=k, filters=filters)
+        return self.search_rate_limiter.call(self.vector_store.similarity_search,
+                                             query=query, k=k, search_type=search_type, filters=filters)
+
+    def search_many(self, queries: list[str], k: int = 3, filters: str | None = None,
+                    cache: bool = True) -> list[list[Any]]:
+        """
+        Performs many vector searches. The queries are embedded with batched embedding requests, and searched
+        with up to SEARCH_QUERY_PARALLELISM concurrent requests over the pooled search client.
+
+        Args:
+            queries (list[str]): The search queries.
+            k (int): The number of results to retrieve per query (default: 3).
+            filters (str): The filters to apply to every search (default: None).
+            cache (bool): Reuse the embeddings of queries searched before, up to SEARCH_QUERY_CACHE_SIZE
+                queries (default: True).
+
+        Returns:
+            list[list]: The search results of each query, in the order of the queries.
+        """
+        if len(queries) == 0:
+            return []
+        vectors = self.embed_queries(queries, cache=cache)
+        self.metrics.increment("search.queries", len(queries))
+        with ThreadPoolExecutor(max_workers=min(self.query_parallelism, len(queries))) as executor:
+            return list(executor.map(lambda vector: self.__vector_query(vector, k, filters), vectors))
+
+    def embed_queries(self, queries: list[str], cache: bool = True) -> list[list[float]]:
+        """
+        Embeds search queries, sending each distinct query once in batches of EMBEDDING_BATCH_MAX_ITEMS queries.
+
+        Args:
+            queries (list[str]): The search queries.
+            cache (bool): Reuse and keep the embeddings of the queries in memory (default: True).
+
+        Returns:
+            list[list[float]]: The embedding vector of each query.
+        """
+        vectors: dict[str, list[float]] = {}
+        if cache:
+            with self.__query_vectors_lock:
+                for query in queries:
+                    if query in self.__query_vectors:
+                        self.__query_vectors.move_to_end(query)
+                        vectors[query] = self.__query_vectors[query]
+        missing = [query for query in dict.fromkeys(queries) if query not in vectors]
+        self.metrics.increment("search.query_cache_hits", len(queries) - len(missing))
+        batches = [missing[start:start + self.query_batch_size]
+                   for start in range(0, len(missing), self.query_batch_size)]
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.query_parallelism, len(batches))) as executor:
+                for batch, batch_vectors in zip(batches, executor.map(self.__embed_query_batch, batches)):
+                    vectors.update(zip(batch, batch_vectors))
+        if cache and missing and self.query_cache_size > 0:
+            with self.__query_vectors_lock:
+                for query in missing:
+                    self.__query_vectors[query] = vectors[query]
+                while len(self.__query_vectors) > self.query_cache_size:
+                    self.__query_vectors.popitem(last=False)
+        return [vectors[query] for query in queries]
+
+    def __embed_query_batch(self, queries: list[str]) -> list[list[float]]:
+        """
+        Embeds a batch of queries with a single request.
+
+        Args:
+            queries (list[str]): The search queries.
+
+        Returns:
+            list[list[float]]: The embedding vector of each query.
+        """
+        tokens = sum(estimate_tokens(query) for query in queries)
+        self.metrics.increment("search.embed_requests")
+        with self.metrics.timer("search.embed_request"):
+            return self.embedding_rate_limiter.call(self.embedding_function.embed_documents, queries, tokens=tokens)
+
+    def __vector_query(self, vector: list[float], k: int, filters: str | None = None) -> list[Any]:
+        """
+        Searches the documents closest to an embedded query.
+
+        Args:
+            vector (list[float]): The embedding vector of the query.
+            k (int): The number of results to retrieve.
+            filters (str): The filters to apply to the search (default: None).
+
+        Returns:
+            list: The search results, as langchain documents.
+        """
+        with self.metrics.timer("search.request"):
+            if self.local_store is not None:
+                results = self.local_store.vector_search(vector, k=k, filter=filters)
+            else:
+                query = VectorizedQuery(vector=vector, k_nearest_neighbors=k, fields=FIELDS_CONTENT_VECTOR)
+                results = self.search_rate_limiter.call(
+                    lambda: list(self.upload_client.search(search_text=None, vector_queries=[query], filter=filters,
+                                                           top=k, select=[FIELDS_ID, FIELDS_CONTENT, FIELDS_METADATA,
+                                                                          *FIELD_KEYS])))
+        return self.__to_documents(results)
+
+    @staticmethod
+    def __to_documents(results: list[dict[str, Any]]) -> list[Any]:
+        """
+        Converts search results to langchain documents, with the metadata, key and score of each result.
+
+        Args:
+            results (list): The search results.
+
+        Returns:
+            list: The langchain documents.
+        """
+        from langchain_core.documents import Document
+
+        return [
+            Document(page_content=result[FIELDS_CONTENT],
+                     metadata={**deserialize_metadata(result, FIELDS_METADATA), "id": result[FIELDS_ID],
+                               "score": result.get("@search.score")})
+            for result in results
+        ]
+
+    def __search_local(self, query: str, k: int, filters: str | None = None) -> list[Any]:
+        """
+        Performs a vector search in the local store, returning langchain documents like the AzureSearch store.
+
+        Args:
+            query (str): The search query.
+            k (int): The number of results to retrieve.
+            filters (str): The filters to apply to the search (default: None).
+
+        Returns:
+            list: A list of search results.
+        """
+        assert self.local_store is not None, "Only the local backend searches the local store"
+        vector = self.embedding_rate_limiter.call(self.embedding_function.embed_query, query,
+                                                  tokens=estimate_tokens(query))
+        return self.__to_documents(self.local_store.vector_search(vector, k=k, filter=filters))
+
+    def push_local_store(self, local_store: LocalVectorStore) -> BulkUploadResult:
+        """
+        Uploads every document of a local store, with its vector, to the Azure Search index, without
+        embedding the chunks again.
+
+        Args:
+            local_store (LocalVectorStore): The local store built offline.
+
+        Returns:
+            BulkUploadResult: The keys of the documents and the errors of the documents that failed to upload.
+        """
+        result = BulkUploadResult()
+        for documents in local_store.iter_documents(batch_size=self.upload_batch_size):
+            batch_result = self.bulk_index(documents)
+            result.keys.extend(batch_result.keys)
+            result.failed.update(batch_result.failed)
+            logging.info(f"Pushed {len(result.keys)}/{len(local_store)} documents of {local_store.path}")
+        return result
 
     def load_documents(self, path: str, encoding: str = "utf-8", chunk_size: int = 1000, chunk_overlap: int = 0):
         """
@@ -78,6 +393,9 @@ class VectorSearch:
             chunk_size (int): The size of each document chunk (default: 1000).
             chunk_overlap (int): The overlap between document chunks (default: 0).
         """
+        from langchain_community.document_loaders import TextLoader
+        from langchain_text_splitters import CharacterTextSplitter
+
         print("Loading documents: {path}")
         loader = TextLoader(path, encoding=encoding)
 
@@ -87,7 +405,7 @@ class VectorSearch:
 
         self.vector_store.add_documents(documents=docs)
 
-    def load_chunks(self, page_contents: list, page_metadatas: list):
+    def load_chunks(self, page_contents: list[str], page_metadatas: list[dict[str, Any]]):
         """
         Loads chunks of text and their corresponding metadata to the vector store.
 
@@ -95,7 +413,387 @@ class VectorSearch:
             page_contents (list): A list of text chunks.
             page_metadatas (list): A list of metadata corresponding to the text chunks.
         """
-        self.vector_store.add_texts(page_contents, page_metadatas)
+        with self.metrics.timer("vector_search.load_chunks"):
+            self.upload_chunks(page_contents, page_metadatas, self.embed_chunks(page_contents))
+
+    def embed_chunks(self, page_contents: list[str]) -> list[list[float]]:
+        """
+        Embeds chunks of text with a single batched embedding request.
+
+        Args:
+            page_contents (list): A list of text chunks.
+
+        Returns:
+            list: The embedding vector of each text chunk.
+        """
+        if len(page_contents) == 0:
+            return []
+        tokens = sum(estimate_tokens(content) for content in page_contents)
+        self.metrics.increment("embed.requests")
+        self.metrics.increment("embed.chunks", len(page_contents))
+        self.metrics.increment("embed.tokens", tokens)
+        with self.metrics.timer("embed.request"):
+            return self.embedding_rate_limiter.call(self.embedding_function.embed_documents, page_contents,
+                                                    tokens=tokens)
+
+    async def aembed_chunks(self, page_contents: list[str]) -> list[list[float]]:
+        """
+        Embeds chunks of text with a single batched embedding request sent by the async embeddings client.
+
+        Args:
+            page_contents (list): A list of text chunks.
+
+        Returns:
+            list: The embedding vector of each text chunk.
+        """
+        if len(page_contents) == 0:
+            return []
+        tokens = sum(estimate_tokens(content) for content in page_contents)
+        self.metrics.increment("embed.requests")
+        self.metrics.increment("embed.chunks", len(page_contents))
+        self.metrics.increment("embed.tokens", tokens)
+        with self.metrics.timer("embed.request"):
+            return await self.embedding_rate_limiter.acall(self.embedding_function.aembed_documents, page_contents,
+                                                           tokens=tokens)
+
+    def upload_chunks(self, page_contents: list[str], page_metadatas: list[dict[str, Any]],
+                      vectors: Sequence[list[float] | None]) -> list[str]:
+        """
+        Uploads chunks of text with their pre-computed embeddings and metadata to the vector store.
+
+        Args:
+            page_contents (list): A list of text chunks.
+            page_metadatas (list): A list of metadata corresponding to the text chunks.
+            vectors (list): A list of embedding vectors corresponding to the text chunks.
+
+        Returns:
+            list: The keys of the uploaded documents.
+
+        Raises:
+            RuntimeError: If any of the documents failed to upload.
+        """
+        result = self.bulk_upload(page_contents, page_metadatas, vectors)
+        if len(result.failed) > 0:
+            raise RuntimeError(f"Failed to upload {len(result.failed)}/{len(result.keys)} chunks: "
+                               + f"{next(iter(result.failed.values()))}")
+        return result.keys
+
+    def bulk_upload(self, page_contents: list[str], page_metadatas: list[dict[str, Any]],
+                    vectors: Sequence[list[float] | None]) -> BulkUploadResult:
+        """
+        Uploads many chunks with pre-computed embeddings, see bulk_index.
+
+        Args:
+            page_contents (list): A list of text chunks.
+            page_metadatas (list): A list of metadata corresponding to the text chunks.
+            vectors (list): A list of embedding vectors corresponding to the text chunks.
+
+        Returns:
+            BulkUploadResult: The keys of the documents and the errors of the documents that failed to upload.
+        """
+        return self.bulk_index(self.build_documents(page_contents, page_metadatas, vectors))
+
+    def build_documents(self, page_contents: list[str], page_metadatas: list[dict[str, Any]],
+                        vectors: Sequence[list[float] | None],
+                        chunk_diff: ChunkDiff | None = None) -> list[dict[str, Any]]:
+        """
+        Builds the indexing actions of the chunks of a file. Without a chunk diff every chunk is uploaded. With
+        a chunk diff, only the added chunks are uploaded, the metadata of the updated chunks is merged into
+        their documents and the removed chunks are deleted.
+
+        Args:
+            page_contents (list): A list of text chunks.
+            page_metadatas (list): A list of metadata corresponding to the text chunks.
+            vectors (list): A list of embedding vectors corresponding to the text chunks, None for the chunks
+                that are not uploaded.
+            chunk_diff (ChunkDiff, optional): The difference with the chunks in the index. Defaults to None.
+
+        Returns:
+            list: The search documents, with their indexing action.
+        """
+        if chunk_diff is None:
+            keys = chunk_keys(page_contents, page_metadatas)
+            return [self.__build_document(key, page_contents[index], page_metadatas[index], vectors[index])
+                    for index, key in enumerate(keys)]
+        documents = [self.__build_document(chunk_diff.keys[index], page_contents[index], page_metadatas[index],
+                                           vectors[index])
+                     for index in chunk_diff.added]
+        documents += [self.__build_metadata_document(chunk_diff.keys[index], page_metadatas[index])
+                      for index in chunk_diff.updated]
+        documents += [{FIELDS_ACTION: "delete", FIELDS_ID: key} for key in chunk_diff.removed]
+        return documents
+
+    def bulk_index(self, documents: list[dict[str, Any]]) -> BulkUploadResult:
+        """
+        Sends many indexing actions in batches of up to UPLOAD_BATCH_SIZE documents and UPLOAD_MAX_PAYLOAD_BYTES
+        bytes, running UPLOAD_PARALLELISM batches in parallel. Documents rejected with a transient error are
+        sent again, up to UPLOAD_MAX_RETRIES times.
+
+        Args:
+            documents (list): The search documents, with their indexing action.
+
+        Returns:
+            BulkUploadResult: The keys of the documents and the errors of the documents that failed to upload.
+        """
+        result = BulkUploadResult(keys=[document[FIELDS_ID] for document in documents])
+        batches = self.__split_batches(documents)
+        if len(batches) == 0:
+            return result
+        logging.debug(f"Uploading {len(documents)} documents in {len(batches)} batches...")
+        with self.metrics.timer("upload.bulk"):
+            with ThreadPoolExecutor(max_workers=min(self.upload_parallelism, len(batches))) as executor:
+                for failed in executor.map(self.__upload_batch, batches):
+                    result.failed.update(failed)
+        self.metrics.increment("upload.documents", len(documents))
+        self.metrics.increment("upload.documents_failed", len(result.failed))
+        return result
+
+    async def abulk_index(self, documents: list[dict[str, Any]]) -> BulkUploadResult:
+        """
+        Sends many indexing actions with the async search client, see bulk_index. All the batches are sent
+        concurrently, the number of requests in flight is only limited by the search rate limiter.
+
+        Args:
+            documents (list): The search documents, with their indexing action.
+
+        Returns:
+            BulkUploadResult: The keys of the documents and the errors of the documents that failed to upload.
+        """
+        if self.async_session is None:
+            # The local store is updated in memory, it has no I/O to wait for
+            return self.bulk_index(documents)
+        result = BulkUploadResult(keys=[document[FIELDS_ID] for document in documents])
+        batches = self.__split_batches(documents)
+        if len(batches) == 0:
+            return result
+        logging.debug(f"Uploading {len(documents)} documents in {len(batches)} async batches...")
+        with self.metrics.timer("upload.bulk"):
+            for failed in await asyncio.gather(*[self.__aupload_batch(batch) for batch in batches]):
+                result.failed.update(failed)
+        self.metrics.increment("upload.documents", len(documents))
+        self.metrics.increment("upload.documents_failed", len(result.failed))
+        return result
+
+    async def aclose(self) -> None:
+        """
+        Closes the async search clients and their pooled session.
+        """
+        if self.async_session is not None:
+            await self.async_session.close()
+
+    def __split_batches(self, documents: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+        """
+        Splits documents into batches that respect the upload batch size and payload size limits.
+
+        Args:
+            documents (list): The search documents.
+
+        Returns:
+            list: The batches of documents.
+        """
+        batches: list[list[dict[str, Any]]] = []
+        batch: list[dict[str, Any]] = []
+        batch_bytes = 0
+        for document in documents:
+            document_bytes = len(json.dumps(document))
+            if batch and (len(batch) >= self.upload_batch_size
+                          or batch_bytes + document_bytes > self.upload_max_payload_bytes):
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+            batch.append(document)
+            batch_bytes += document_bytes
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def __upload_batch(self, documents: list[dict[str, Any]]) -> dict[str, str]:
+        """
+        Uploads a batch of documents, retrying the documents that failed with a transient error.
+
+        Args:
+            documents (list): The search documents.
+
+        Returns:
+            dict: The error message of each document key that could not be uploaded.
+        """
+        failed: dict[str, str] = {}
+        pending = documents
+        for attempt in range(self.upload_max_retries + 1):
+            if attempt > 0:
+                self.metrics.increment("upload.documents_retried", len(pending))
+                time.sleep(self.search_rate_limiter.backoff_delay(attempt - 1))
+            try:
+                # Throttled and transient request failures are retried by the rate limiter
+                self.metrics.increment("upload.requests")
+                with self.metrics.timer("upload.request"):
+                    batch = IndexDocumentsBatch(actions=[IndexAction(document) for document in pending])
+                    results: list[Any] = self.search_rate_limiter.call(self.upload_client.index_documents, batch)
+            except HttpResponseError as e:
+                if e.status_code == 413 and len(pending) > 1:
+                    # Payload too large, upload each half separately
+                    middle = len(pending) // 2
+                    failed.update(self.__upload_batch(pending[:middle]))
+                    failed.update(self.__upload_batch(pending[middle:]))
+                    return failed
+                failed.update({document[FIELDS_ID]: str(e) for document in pending})
+                return failed
+            pending = self.__retryable_documents(pending, results, attempt, failed)
+            if not pending:
+                break
+            logging.warning(f"Retrying the upload of {len(pending)} documents...")
+        return failed
+
+    async def __aupload_batch(self, documents: list[dict[str, Any]]) -> dict[str, str]:
+        """
+        Uploads a batch of documents with the async search client, see __upload_batch.
+
+        Args:
+            documents (list): The search documents.
+
+        Returns:
+            dict: The error message of each document key that could not be uploaded.
+        """
+        assert self.async_session is not None, "Only the Azure AI Search backend uploads with the async client"
+        client = self.async_session.search_client(self.index_name)
+        failed: dict[str, str] = {}
+        pending = documents
+        for attempt in range(self.upload_max_retries + 1):
+            if attempt > 0:
+                self.metrics.increment("upload.documents_retried", len(pending))
+                await asyncio.sleep(self.search_rate_limiter.backoff_delay(attempt - 1))
+            try:
+                self.metrics.increment("upload.requests")
+                with self.metrics.timer("upload.request"):
+                    batch = IndexDocumentsBatch(actions=[IndexAction(document) for document in pending])
+                    results = await self.search_rate_limiter.acall(client.index_documents, batch)
+            except HttpResponseError as e:
+                if e.status_code == 413 and len(pending) > 1:
+                    middle = len(pending) // 2
+                    for half in await asyncio.gather(self.__aupload_batch(pending[:middle]),
+                                                     self.__aupload_batch(pending[middle:])):
+                        failed.update(half)
+                    return failed
+                failed.update({document[FIELDS_ID]: str(e) for document in pending})
+                return failed
+            pending = self.__retryable_documents(pending, results, attempt, failed)
+            if not pending:
+                break
+            logging.warning(f"Retrying the upload of {len(pending)} documents...")
+        return failed
+
+    def __retryable_documents(self, documents: list[dict[str, Any]], results: list[Any], attempt: int,
+                              failed: dict[str, str]) -> list[dict[str, Any]]:
+        """
+        Reads the indexing results of a batch, recording the documents that failed for good.
+
+        Args:
+            documents (list): The search documents of the batch.
+            results (list): The indexing result of each document.
+            attempt (int): The number of the attempt, starting at 0.
+            failed (dict): The error message of each document key that could not be uploaded, updated in place.
+
+        Returns:
+            list: The documents rejected with a transient error, to upload again.
+        """
+        documents_by_key = {document[FIELDS_ID]: document for document in documents}
+        pending = []
+        for result in results:
+            if result.succeeded:
+                continue
+            if result.status_code == 429:
+                self.search_rate_limiter.report_throttled()
+            if result.status_code in RETRYABLE_STATUS_CODES and attempt < self.upload_max_retries:
+                pending.append(documents_by_key[result.key])
+            else:
+                failed[result.key] = f"{result.status_code}: {result.error_message}"
+        return pending
+
+    def __build_document(self, key: str, content: str, metadata: dict[str, Any],
+                         vector: list[float] | None) -> dict[str, Any]:
+        """
+        Builds the upload action of a chunk, in the same shape as the langchain AzureSearch vector store.
+
+        Args:
+            key (str): The document key of the chunk.
+            content (str): The text of the chunk.
+            metadata (dict): The metadata of the chunk.
+            vector (list): The embedding vector of the chunk.
+
+        Returns:
+            dict: The search document.
+
+        Raises:
+            ValueError: If the chunk was not embedded.
+        """
+        if vector is None:
+            raise ValueError(f"The chunk {key} of {metadata.get('source')} has no embedding vector")
+        document = {
+            FIELDS_ACTION: "upload",
+            FIELDS_ID: key,
+            FIELDS_CONTENT: content,
+            FIELDS_CONTENT_VECTOR: [float(value) for value in vector],
+            FIELDS_METADATA: serialize_metadata(metadata),
+        }
+        for index_field in self.fields:
+            if index_field.name not in document and index_field.name in metadata:
+                document[index_field.name] = metadata[index_field.name]
+        return document
+
+    def __build_metadata_document(self, key: str, metadata: dict[str, Any]) -> dict[str, Any]:
+        """
+        Builds the merge action replacing the metadata of an indexed chunk, keeping its content and vector.
+
+        Args:
+            key (str): The document key of the chunk.
+            metadata (dict): The new metadata of the chunk.
+
+        Returns:
+            dict: The search document.
+        """
+        document: dict[str, Any] = {FIELDS_ACTION: "merge", FIELDS_ID: key,
+                                    FIELDS_METADATA: serialize_metadata(metadata)}
+        for index_field in self.fields:
+            # Fields missing from the new metadata are cleared
+            if index_field.name not in (FIELDS_ID, FIELDS_CONTENT, FIELDS_CONTENT_VECTOR, FIELDS_METADATA):
+                document[index_field.name] = metadata.get(index_field.name)
+        return document
+
+    def __ensure_index(self, index_client: SearchIndexClient, index_name: str) -> None:
+        """
+        Creates the search index if it does not exist, with the same vector search configuration as the
+        langchain AzureSearch vector store.
+
+        Args:
+            index_client (SearchIndexClient): The index client.
+            index_name (str): The name of the index.
+        """
+        try:
+            self.search_rate_limiter.call(index_client.get_index, index_name)
+            return
+        except ResourceNotFoundError:
+            pass
+        logging.info(f"Creating search index {index_name} ({self.vector_search_dimensions} dimensions)...")
+        vector_search = IndexVectorSearch(
+            algorithms=[
+                HnswAlgorithmConfiguration(
+                    name="default",
+                    parameters=HnswParameters(m=4, ef_construction=400, ef_search=500,
+                                              metric=VectorSearchAlgorithmMetric.COSINE),
+                ),
+                ExhaustiveKnnAlgorithmConfiguration(
+                    name="default_exhaustive_knn",
+                    parameters=ExhaustiveKnnParameters(metric=VectorSearchAlgorithmMetric.COSINE),
+                ),
+            ],
+            profiles=[
+                VectorSearchProfile(name="myHnswProfile", algorithm_configuration_name="default"),
+                VectorSearchProfile(name="myExhaustiveKnnProfile",
+                                    algorithm_configuration_name="default_exhaustive_knn"),
+            ],
+        )
+        self.search_rate_limiter.call(index_client.create_index,
+                                      SearchIndex(name=index_name, fields=self.fields, vector_search=vector_search))
 
     def __index_fields(self):
         """
@@ -110,6 +808,7 @@ class VectorSearch:
                 type=SearchFieldDataType.String,
                 key=True,
                 filterable=True,
+                sortable=True,
             ),
             SearchableField(
                 name="content",
@@ -120,7 +819,7 @@ class VectorSearch:
                 name="content_vector",
                 type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
                 searchable=True,
-                vector_search_dimensions=len(self.embeddings.embed_query("Text")),
+                vector_search_dimensions=self.vector_search_dimensions,
                 vector_search_profile_name="myHnswProfile",
             ),
             SearchableField(
@@ -134,11 +833,12 @@ class VectorSearch:
                 type=SearchFieldDataType.String,
                 searchable=True,
             ),
-            # Additional field for filtering on document source
+            # Additional field for filtering on document source, and counting the chunks of each source
             SimpleField(
                 name="source",
                 type=SearchFieldDataType.String,
                 filterable=True,
+                facetable=True,
             ),
             # Additional data field for last doc update
             SimpleField(
@@ -159,6 +859,7 @@ class VectorSearch:
                 type=SearchFieldDataType.String,
                 searchable=True,
                 filterable=True,
+                facetable=True,
             ),
             SimpleField(
                 name="summary",
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from src.document_importer.async_batcher import AsyncBatcher
+
+
+def test_async_batcher_merges_the_items_of_concurrent_coroutines() -> None:
+    # Arrange
+    calls: list[list[int]] = []
+
+    async def double(items: list[int]) -> list[int]:
+        calls.append(items)
+        await asyncio.sleep(0.01)
+        return [item * 2 for item in items]
+
+    batcher = AsyncBatcher(double, max_items=4, max_weight=10, weight=lambda item: item, linger=0.05)
+
+    async def submit_all() -> list[list[int]]:
+        return await asyncio.gather(batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([6, 1]))
+
+    # Act
+    results = asyncio.run(submit_all())
+
+    # Assert
+    assert results == [[2, 4], [6], [12, 2]]
+    assert calls == [[1, 2, 3], [6, 1]]
+    assert batcher.requests == 2
+
+
+def test_async_batcher_raises_the_error_of_the_batch() -> None:
+    # Arrange
+    async def fail(items: list[str]) -> list[str]:
+        raise ConnectionError("Embedding service unavailable")
+
+    batcher = AsyncBatcher(fail, max_items=2)
+
+    # Act & Assert
+    with pytest.raises(ConnectionError, match="Embedding service unavailable"):
+        asyncio.run(batcher.submit(["first", "second", "third"]))
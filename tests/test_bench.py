@@ -0,0 +1,134 @@
+import os
+
+from src.document_importer.bench import generate_corpus, run_benchmark
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+
+
+def test_generate_corpus_writes_documents_with_frontmatter(tmp_path) -> None:
+    """
+    Test case for the generate_corpus function.
+
+    This test case verifies that the generated documents are spread over subdirectories, start with a
+    frontmatter block, and that the same seed generates the same corpus.
+    """
+    # Arrange
+    first_directory, second_directory = tmp_path / "first", tmp_path / "second"
+
+    # Act
+    paths = generate_corpus(str(first_directory), 120, sections=2, paragraphs=2, words=10, seed=3)
+    generate_corpus(str(second_directory), 120, sections=2, paragraphs=2, words=10, seed=3)
+
+    # Assert
+    assert len(paths) == 120
+    assert sorted(os.listdir(first_directory)) == ["part_0000", "part_0001"]
+    with open(paths[0], encoding="utf-8") as markdown_file:
+        content = markdown_file.read()
+    assert content.startswith("---\ntitle: Document 0\n")
+    assert content == (second_directory / "part_0000" / "document_000000.md").read_text(encoding="utf-8")
+
+
+def test_fake_search_service_applies_the_importer_filters() -> None:
+    """
+    Test case for the FakeSearchService class.
+
+    This test case verifies that the eq and search.in clauses are combined with and, and that escaped quotes
+    are matched.
+    """
+    # Arrange
+    matches = FakeSearchService.parse_filter("repository eq 'it''s' and search.in(source, 'a.md|b.md', '|')")
+
+    # Act & Assert
+    assert matches({"repository": "it's", "source": "b.md"})
+    assert not matches({"repository": "it's", "source": "c.md"})
+    assert not matches({"repository": "other", "source": "a.md"})
+
+
+def test_run_benchmark_imports_the_corpus_into_the_fake_services(tmp_path) -> None:
+    """
+    Test case for the run_benchmark function.
+
+    This test case verifies that the importer runs against the local fake services, that every chunk is
+    uploaded to the fake search index and that the report contains the throughput and stage latencies.
+    """
+    # Arrange
+    generate_corpus(str(tmp_path), 6, sections=2, paragraphs=2, words=20)
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    search_service = FakeSearchService()
+
+    # Act
+    with embedding_service, search_service:
+        report = run_benchmark(str(tmp_path), embedding_service, search_service, workers=2,
+                               settings={"EMBEDDING_CHECK_CONTEXT_LENGTH": "false"})
+
+    # Assert
+    assert report["files"] == 6
+    assert report["succeeded"] == 6
+    assert report["failed"] == 0
+    assert report["chunks"] == len(search_service.documents["benchmark"])
+    assert report["chunks_per_second"] > 0
+    assert set(report["stages"].keys()) == {"parse", "clean", "embed", "upload"}
+    assert all(stage["count"] == 6 for stage in report["stages"].values())
+    assert report["embedding_service"]["requests"] > 0
+    assert report["metrics"]["counters"]["upload.documents"] == report["chunks"]
+
+
+def test_run_benchmark_upsert_only_sends_the_changed_chunks(tmp_path) -> None:
+    """
+    Test case for the run_benchmark function with upsert.
+
+    This test case verifies that a second upsert of a corpus with one edited document embeds only the added
+    chunks, deletes the removed chunks and keeps the other documents of the index.
+    """
+    # Arrange
+    paths = generate_corpus(str(tmp_path), 4, sections=2, paragraphs=2, words=20)
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    search_service = FakeSearchService()
+    settings = {"EMBEDDING_CHECK_CONTEXT_LENGTH": "false"}
+
+    with embedding_service, search_service:
+        first = run_benchmark(str(tmp_path), embedding_service, search_service, upsert=True, settings=settings)
+        keys = set(search_service.documents["benchmark"])
+        with open(paths[0], "a", encoding="utf-8") as markdown_file:
+            markdown_file.write("\n# Appendix\n\nA new section.\n")
+
+        # Act
+        second = run_benchmark(str(tmp_path), embedding_service, search_service, upsert=True, settings=settings)
+
+    # Assert
+    counters = second["metrics"]["counters"]
+    assert first["metrics"]["counters"]["upsert.chunks_added"] == first["chunks"]
+    assert set(second["stages"].keys()) == {"parse", "diff", "embed", "upload"}
+    assert counters["upsert.chunks_added"] >= 1
+    assert (counters["upsert.chunks_added"] + counters["upsert.chunks_updated"]
+            + counters["upsert.chunks_unchanged"]) == second["chunks"]
+    assert counters["upsert.chunks_unchanged"] > 0
+    assert counters["embed.chunks"] == counters["upsert.chunks_added"]
+    assert len(search_service.documents["benchmark"]) == second["chunks"]
+    assert len(keys & set(search_service.documents["benchmark"])) == counters["upsert.chunks_unchanged"]
+
+
+def test_run_benchmark_async_batches_the_chunks_of_concurrent_files(tmp_path) -> None:
+    """
+    Test case for the run_benchmark function with the asyncio engine.
+
+    This test case verifies that Importer.arun uploads every chunk to the fake search index, and that the
+    chunks of the files imported at the same time are merged into fewer embedding requests than files.
+    """
+    # Arrange
+    generate_corpus(str(tmp_path), 8, sections=2, paragraphs=2, words=20)
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    search_service = FakeSearchService()
+    settings = {"EMBEDDING_CHECK_CONTEXT_LENGTH": "false", "EMBEDDING_BATCH_MAX_ITEMS": "64"}
+
+    # Act
+    with embedding_service, search_service:
+        report = run_benchmark(str(tmp_path), embedding_service, search_service, settings=settings,
+                               asynchronous=True)
+
+    # Assert
+    assert report["succeeded"] == 8
+    assert report["failed"] == 0
+    assert report["chunks"] == len(search_service.documents["benchmark"])
+    assert set(report["stages"].keys()) == {"parse", "clean", "embed", "upload"}
+    assert report["metrics"]["counters"]["embed.chunks"] == report["chunks"]
+    assert report["embedding_service"]["requests"] < report["succeeded"]
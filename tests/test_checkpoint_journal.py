@@ -0,0 +1,93 @@
+import sqlite3
+
+from src.document_importer.bench import generate_corpus
+from src.document_importer.checkpoint_journal import CheckpointJournal
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from src.document_importer.import_state import ImportState
+from src.document_importer.importer import Importer
+from src.document_importer.markdown_parser import MarkdownParser
+
+
+def test_checkpoint_journal_records_stages_and_vectors(tmp_path) -> None:
+    # Arrange
+    path = str(tmp_path / "checkpoint.sqlite")
+    journal = CheckpointJournal(path)
+    journal.record("org/repo", "a.md", "hash-a", 1000, 0, "embedded", texts=["one", "two", "three"],
+                   vectors=[[1.0, 2.0], None, [3.0, 4.0]])
+    journal.record("org/repo", "b.md", "hash-b", 1000, 0, "embedded", texts=["four"], vectors=[[5.0, 6.0]])
+    journal.record("org/repo", "b.md", "hash-b", 1000, 0, "uploaded")
+    journal.close()
+
+    # Act
+    reopened = CheckpointJournal(path)
+
+    # Assert
+    assert reopened.stage("org/repo", "a.md", "hash-a", 1000, 0) == "embedded"
+    assert reopened.stage("org/repo", "a.md", "changed", 1000, 0) is None
+    assert reopened.stage("org/repo", "a.md", "hash-a", 500, 0) is None
+    assert reopened.stage("org/repo", "b.md", "hash-b", 1000, 0) == "uploaded"
+    assert reopened.get_vectors("org/repo", "a.md", ["three", "two", "one"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+    assert reopened.get_vectors("org/repo", "b.md", ["four"]) == [None]
+    reopened.clear("org/repo")
+    assert len(reopened) == 0
+
+
+def test_checkpoint_journal_compares_the_tokenizer_and_migrates_older_journals(tmp_path) -> None:
+    # Arrange
+    path = str(tmp_path / "checkpoint.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE files (repository TEXT NOT NULL, source TEXT NOT NULL, hash TEXT NOT NULL, "
+                       "chunk_size INTEGER NOT NULL, chunk_overlap INTEGER NOT NULL, stage TEXT NOT NULL, "
+                       "updated_at REAL NOT NULL, PRIMARY KEY (repository, source))")
+    connection.execute("INSERT INTO files VALUES ('org/repo', 'legacy.md', 'hash-l', 512, 0, 'uploaded', 0)")
+    connection.commit()
+    connection.close()
+
+    # Act
+    journal = CheckpointJournal(path)
+    journal.record("org/repo", "a.md", "hash-a", 512, 0, "uploaded", tokenizer="cl100k_base")
+    journal.record("org/repo", "b.md", "hash-b", 1000, 0, "uploaded")
+
+    # Assert
+    assert journal.stage("org/repo", "a.md", "hash-a", 512, 0, "cl100k_base") == "uploaded"
+    assert journal.stage("org/repo", "a.md", "hash-a", 512, 0, "o200k_base") is None
+    assert journal.stage("org/repo", "a.md", "hash-a", 512, 0) is None
+    assert journal.stage("org/repo", "b.md", "hash-b", 1000, 0) == "uploaded"
+    assert journal.stage("org/repo", "legacy.md", "hash-l", 512, 0) is None
+    journal.close()
+
+
+def test_resumed_import_skips_uploaded_files_and_reuses_journaled_vectors(tmp_path) -> None:
+    # Arrange
+    paths = generate_corpus(str(tmp_path / "corpus"), 3, sections=2, paragraphs=2, words=20)
+    checkpoint_path = str(tmp_path / "checkpoint.sqlite")
+    embedded_chunks = MarkdownParser().parse(paths[1], repository="org/repo", chunk_size=1000)["page_contents"]
+    # The interrupted run uploaded the first file and embedded the second file
+    journal = CheckpointJournal(checkpoint_path)
+    journal.record("org/repo", paths[0], ImportState.hash_file(paths[0]), 1000, 0, "uploaded")
+    journal.record("org/repo", paths[1], ImportState.hash_file(paths[1]), 1000, 0, "embedded",
+                   texts=embedded_chunks, vectors=[[0.5] * 8 for _ in embedded_chunks])
+    journal.close()
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    search_service = FakeSearchService()
+
+    with embedding_service, search_service:
+        importer = Importer({
+            "AZURE_OPENAI_ENDPOINT": embedding_service.url, "AZURE_OPENAI_API_KEY": "test",
+            "AZURE_OPENAI_API_VERSION": "2024-02-01", "AZURE_DEPLOYMENT": "test", "EMBEDDING_DIMENSIONS": "8",
+            "EMBEDDING_CHECK_CONTEXT_LENGTH": "false", "VECTOR_STORE_ADDRESS": search_service.url,
+            "VECTOR_STORE_PASSWORD": "test", "INDEX_NAME": "resumed",
+        }, repository="org/repo", directory=str(tmp_path / "corpus"), checkpoint_path=checkpoint_path, resume=True)
+
+        # Act
+        importer.run()
+
+    # Assert
+    documents = search_service.documents["resumed"].values()
+    assert importer.resumed_files == [paths[0]]
+    assert importer.succeed_files == paths[1:]
+    assert importer.resumed_vectors == len(embedded_chunks)
+    assert embedding_service.embedded == importer.total_chunks - len(embedded_chunks)
+    assert sorted({document["source"] for document in documents}) == paths[1:]
+    assert all(document["content_vector"] == [0.5] * 8 for document in documents if document["source"] == paths[1])
+    assert len(CheckpointJournal(checkpoint_path)) == 0
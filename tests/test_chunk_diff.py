@@ -0,0 +1,80 @@
+import json
+
+from src.document_importer.chunk_diff import chunk_keys, diff_chunks
+from src.document_importer.chunk_record import serialize_metadata
+from src.document_importer.diff_batcher import DiffBatcher
+from src.document_importer.pipeline import FileTask
+
+
+def create_metadata(source: str, title: str = "Title", last_update: str = "2024-01-01") -> dict:
+    return {"repository": "org/repo", "source": source, "title": title, "last_update": last_update}
+
+
+def test_chunk_keys_are_stable_and_distinguish_repeated_chunks() -> None:
+    # Arrange
+    metadatas = [create_metadata("a.md"), create_metadata("a.md"), create_metadata("b.md")]
+
+    # Act
+    keys = chunk_keys(["same", "same", "same"], metadatas)
+
+    # Assert
+    assert len(set(keys)) == 3
+    assert keys == chunk_keys(["same", "same", "same"], metadatas)
+    assert keys[0] == chunk_keys(["same"], [create_metadata("a.md", title="Other")])[0]
+
+
+def test_diff_chunks_classifies_added_updated_removed_and_unchanged_chunks() -> None:
+    # Arrange
+    old_contents = ["kept", "retitled", "removed"]
+    old_metadatas = [create_metadata("a.md") for _ in old_contents]
+    indexed = [{"id": key, "source": "a.md", "metadata": json.dumps(metadata)}
+               for key, metadata in zip(chunk_keys(old_contents, old_metadatas), old_metadatas)]
+    new_contents = ["kept", "retitled", "added"]
+    new_metadatas = [create_metadata("a.md", last_update="2024-02-01"),
+                     create_metadata("a.md", title="New title"), create_metadata("a.md")]
+
+    # Act
+    diff = diff_chunks(new_contents, new_metadatas, indexed)
+
+    # Assert
+    assert diff.added == [2]
+    assert diff.updated == [1]
+    assert diff.unchanged == 1
+    assert diff.removed == [indexed[2]["id"]]
+
+
+def test_diff_chunks_rebuilds_the_metadata_of_the_indexed_fields() -> None:
+    # Arrange
+    metadatas = [{**create_metadata("a.md"), "chunk_number": number} for number in (1, 2)]
+    indexed = [{"id": key, "metadata": serialize_metadata(metadata), "title": metadata["title"],
+                "source": "a.md", "repository": "org/repo", "last_update": "2024-01-01T00:00:00Z"}
+               for key, metadata in zip(chunk_keys(["first", "second"], metadatas), metadatas)]
+
+    # Act
+    diff = diff_chunks(["first", "second"], [metadatas[0], {**metadatas[1], "title": "New title"}], indexed)
+
+    # Assert
+    assert diff.unchanged == 1
+    assert diff.updated == [1]
+
+
+def test_diff_batcher_looks_up_several_files_with_one_call() -> None:
+    # Arrange
+    calls: list[list[str]] = []
+
+    def lookup(sources: list[str]) -> dict:
+        calls.append(sources)
+        return {source: [] for source in sources}
+
+    batcher = DiffBatcher(lookup, batch_size=2)
+    tasks = [FileTask(source, page_contents=["text"], page_metadatas=[create_metadata(source)])
+             for source in ("a.md", "b.md", "c.md")]
+
+    # Act
+    finished = batcher.add(tasks[0]) + batcher.add(tasks[1]) + batcher.add(tasks[2]) + batcher.flush()
+
+    # Assert
+    assert calls == [["a.md", "b.md"], ["c.md"]]
+    assert [(task.file_path, error) for task, error in finished] == [("a.md", None), ("b.md", None), ("c.md", None)]
+    assert all(task.chunk_diff.added == [0] for task in tasks)
+    assert batcher.added == 3
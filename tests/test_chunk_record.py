@@ -0,0 +1,38 @@
+import json
+
+from src.document_importer.chunk_diff import comparable_metadata
+from src.document_importer.chunk_record import FIELD_KEYS, deserialize_metadata, serialize_metadata
+from src.document_importer.markdown_parser import MarkdownParser
+
+
+def test_chunks_of_a_document_share_one_header() -> None:
+    # Arrange
+    parser = MarkdownParser()
+
+    # Act
+    metadatas = parser.parse("example_docs/example_1/index.md", repository="adp/example1")["page_metadatas"]
+
+    # Assert
+    assert len({id(metadata.header) for metadata in metadatas}) == 1
+    assert not hasattr(metadatas[0], "__dict__")
+    assert list(dict(metadatas[0]).keys()) == ["title", "source", "uri", "repository", "summary", "authors",
+                                               "last_update", "heading", "chunk_number"]
+    assert metadatas[1]["chunk_number"] == 2
+    assert metadatas[1].get("token_count") is None
+
+
+def test_serialize_metadata_writes_compact_json_without_the_path_and_the_field_keys() -> None:
+    # Arrange
+    metadata = MarkdownParser().parse("example_docs/example_1/index.md", repository="adp/example1")["page_metadatas"][0]
+    legacy = json.dumps({**dict(metadata), "path": metadata["source"]})
+
+    # Act
+    serialized = serialize_metadata(metadata)
+
+    # Assert
+    assert json.loads(serialized) == {"authors": ["Logan Talbot"], "heading": metadata["heading"], "chunk_number": 1}
+    assert ", " not in serialized
+    assert len(serialized) < len(legacy)
+    fields = {key: metadata[key] for key in FIELD_KEYS}
+    assert deserialize_metadata({"metadata": serialized, **fields}) == dict(metadata)
+    assert comparable_metadata(deserialize_metadata({"metadata": serialized, **fields})) == comparable_metadata(legacy)
@@ -0,0 +1,41 @@
+from src.document_importer.clean_batcher import CleanBatcher
+from src.document_importer.pipeline import FileTask
+
+
+def test_clean_batcher_cleans_several_files_with_one_call() -> None:
+    # Arrange
+    calls: list[list[str]] = []
+
+    def clean(sources: list[str]) -> dict:
+        calls.append(sources)
+        return {source: source != "failed.md" for source in sources}
+
+    batcher = CleanBatcher(clean, batch_size=2)
+
+    # Act
+    finished = batcher.add(FileTask("first.md"))
+    finished += batcher.add(FileTask("failed.md"))
+    finished += batcher.add(FileTask("third.md"))
+    finished += batcher.flush()
+
+    # Assert
+    assert calls == [["first.md", "failed.md"], ["third.md"]]
+    assert [(task.file_path, error) for task, error in finished] == [
+        ("first.md", None), ("failed.md", None), ("third.md", None)
+    ]
+    assert batcher.succeeded == 2
+
+
+def test_clean_batcher_fails_the_batch_when_the_clean_raises() -> None:
+    # Arrange
+    def clean(sources: list[str]) -> dict:
+        raise ConnectionError("Search service unavailable")
+
+    batcher = CleanBatcher(clean, batch_size=10)
+    batcher.add(FileTask("first.md"))
+
+    # Act
+    finished = batcher.flush()
+
+    # Assert
+    assert [(task.file_path, str(error)) for task, error in finished] == [("first.md", "Search service unavailable")]
@@ -1,7 +1,9 @@
 from ast import Dict
 import pytest
 import sys
+from azure.core.exceptions import HttpResponseError
 from src.document_importer.document_manager import DocumentManager
+from src.document_importer.search_filter import parse_filter
 
 
 def test_document_manager():
@@ -14,4 +16,70 @@ def test_document_manager():
     assert document_manager is not None
 
 def test_empty_dm():
-    assert 1 == 1
\ No newline at end of file
+    assert 1 == 1
+
+class FakeIndexingResult:
+    def __init__(self, key: str, succeeded: bool = True):
+        self.key = key
+        self.succeeded = succeeded
+
+
+class FakeSearchClient:
+    def __init__(self, documents: list, sortable: bool = True):
+        self.documents = documents
+        self.sortable = sortable
+        self.searches: list = []
+        self.deleted: list = []
+
+    def search(self, search_text: str, filter: str, select: list, top: int, skip: int = 0,
+               order_by: list | None = None) -> list:
+        if order_by and not self.sortable:
+            error = HttpResponseError(message="Field 'id' is not sortable")
+            error.status_code = 400
+            raise error
+        self.searches.append(filter)
+        documents = [document for document in self.documents if parse_filter(filter)(document)]
+        if order_by:
+            documents.sort(key=lambda document: document["id"])
+        return [{key: document[key] for key in select} for document in documents[skip:skip + top]]
+
+    def delete_documents(self, documents: list) -> list:
+        self.deleted.append(documents)
+        return [FakeIndexingResult(document["id"]) for document in documents]
+
+
+def test_clean_documents_pages_keys_and_deletes_in_bulk():
+    config: Dict = {
+        "VECTOR_STORE_ADDRESS": "https://vectorstore",
+        "VECTOR_STORE_PASSWORD": "password",
+        "INDEX_NAME": "indexname"
+    }
+    document_manager = DocumentManager(config=config)
+    documents = [{"id": f"key-{i}", "repository": "adp/example1", "source": "docs/a.md" if i % 2 else "docs/b.md"}
+                 for i in range(2500)]
+    document_manager.search_client = FakeSearchClient(documents)
+
+    cleaned = document_manager.clean_documents("adp/example1", ["docs/a.md", "docs/b.md", "docs/c.md"])
+
+    assert cleaned == {"docs/a.md": True, "docs/b.md": True, "docs/c.md": True}
+    assert len(document_manager.search_client.searches) == 3
+    assert "search.in(source, 'docs/a.md|docs/b.md|docs/c.md', '|')" in document_manager.search_client.searches[0]
+    assert document_manager.search_client.searches[1].endswith(" and id gt 'key-1898'")
+    assert [len(batch) for batch in document_manager.search_client.deleted] == [1000, 1000, 500]
+
+
+def test_get_document_chunks_pages_with_skip_when_the_key_is_not_sortable():
+    config: Dict = {
+        "VECTOR_STORE_ADDRESS": "https://vectorstore",
+        "VECTOR_STORE_PASSWORD": "password",
+        "INDEX_NAME": "indexname"
+    }
+    document_manager = DocumentManager(config=config)
+    documents = [{"id": f"key-{i}", "repository": "adp/example1", "source": "docs/a.md"} for i in range(1500)]
+    document_manager.search_client = FakeSearchClient(documents, sortable=False)
+
+    chunks = document_manager.get_document_chunks("adp/example1", ["docs/a.md"])
+
+    assert [chunk["id"] for chunk in chunks["docs/a.md"]] == [document["id"] for document in documents]
+    assert not document_manager.ordered_paging
+    assert len(document_manager.search_client.searches) == 2
@@ -0,0 +1,60 @@
+from src.document_importer.embedding_batcher import EmbeddingBatcher
+from src.document_importer.pipeline import FileTask
+
+
+class FakeEmbeddingEndpoint:
+    def __init__(self, fail_on: str = None):
+        self.requests: list[list[str]] = []
+        self.fail_on = fail_on
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        self.requests.append(texts)
+        if self.fail_on in texts:
+            raise RuntimeError("429 Too Many Requests")
+        return [[float(len(text))] for text in texts]
+
+
+def test_batcher_combines_chunks_of_several_files_into_full_requests() -> None:
+    # Arrange
+    endpoint = FakeEmbeddingEndpoint()
+    batcher = EmbeddingBatcher(endpoint.embed, max_items=4)
+    first = FileTask("first.md", page_contents=["a", "bb"])
+    second = FileTask("second.md", page_contents=["ccc", "dddd", "eeeee"])
+
+    # Act
+    finished = batcher.add(first) + batcher.add(second) + batcher.flush()
+
+    # Assert
+    assert endpoint.requests == [["a", "bb", "ccc", "dddd"], ["eeeee"]]
+    assert [(task.file_path, error) for task, error in finished] == [("first.md", None), ("second.md", None)]
+    assert first.vectors == [[1.0], [2.0]]
+    assert second.vectors == [[3.0], [4.0], [5.0]]
+
+
+def test_batcher_respects_token_limit() -> None:
+    # Arrange
+    endpoint = FakeEmbeddingEndpoint()
+    batcher = EmbeddingBatcher(endpoint.embed, max_items=100, max_tokens=10, count_tokens=len)
+
+    # Act
+    batcher.add(FileTask("first.md", page_contents=["aaaaaa", "bbbbbb", "cc"]))
+    batcher.flush()
+
+    # Assert
+    assert endpoint.requests == [["aaaaaa"], ["bbbbbb", "cc"]]
+
+
+def test_batcher_fails_only_the_files_of_a_failed_request() -> None:
+    # Arrange
+    endpoint = FakeEmbeddingEndpoint(fail_on="bad")
+    batcher = EmbeddingBatcher(endpoint.embed, max_items=2)
+
+    # Act
+    finished = batcher.add(FileTask("good.md", page_contents=["a", "b"]))
+    finished += batcher.add(FileTask("bad.md", page_contents=["bad", "c", "d"]))
+    finished += batcher.flush()
+    finished += batcher.add(FileTask("empty.md"))
+
+    # Assert
+    results = [(task.file_path, error is None) for task, error in finished]
+    assert results == [("good.md", True), ("bad.md", False), ("empty.md", True)]
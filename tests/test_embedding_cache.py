@@ -0,0 +1,89 @@
+import pytest
+from langchain_core.embeddings import Embeddings
+from src.document_importer.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.embedded_texts: list[str] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.embedded_texts.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def cache(tmp_path) -> EmbeddingCache:
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=3)
+
+
+def test_cache_counts_hits_and_misses(cache: EmbeddingCache) -> None:
+    # Arrange
+    cache.put_many("ada", ["first"], [[1.0, 2.0]])
+
+    # Act
+    vectors = cache.get_many("ada", ["first", "second"])
+
+    # Assert
+    assert vectors == [[1.0, 2.0], None]
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.get_many("other-deployment", ["first"]) == [None]
+
+
+def test_cache_evicts_least_recently_used_entries(cache: EmbeddingCache) -> None:
+    # Arrange
+    cache.put_many("ada", ["a", "b", "c"], [[1.0], [2.0], [3.0]])
+    cache.get_many("ada", ["a"])
+
+    # Act
+    cache.put_many("ada", ["d"], [[4.0]])
+
+    # Assert
+    assert len(cache) == 3
+    assert cache.get_many("ada", ["a", "b", "c", "d"]) == [[1.0], None, [3.0], [4.0]]
+
+
+def test_cached_embeddings_only_embeds_cache_misses(cache: EmbeddingCache) -> None:
+    # Arrange
+    embeddings = CountingEmbeddings()
+    cached_embeddings = CachedEmbeddings(embeddings, cache, "ada")
+    cached_embeddings.embed_documents(["first"])
+
+    # Act
+    vectors = cached_embeddings.embed_documents(["first", "second", "second"])
+
+    # Assert
+    assert vectors == [[5.0, 1.0], [6.0, 1.0], [6.0, 1.0]]
+    assert embeddings.embedded_texts == ["first", "second"]
+
+
+def test_cache_keeps_the_entry_count_when_embeddings_are_stored_again(tmp_path) -> None:
+    # Arrange
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(path, max_entries=3)
+    cache.put_many("ada", ["a", "b"], [[1.0], [2.0]])
+
+    # Act
+    cache.put_many("ada", ["b", "c"], [[5.0], [3.0]])
+    cache.put_many("ada", ["d"], [[4.0]])
+    cache.close()
+    reopened = EmbeddingCache(path, max_entries=3)
+
+    # Assert
+    assert len(cache) == 3
+    assert len(reopened) == 3
+    assert reopened.get_many("ada", ["a", "b", "c", "d"]) == [None, [5.0], [3.0], [4.0]]
+
+
+def test_model_key_tells_the_endpoints_and_dimensions_apart() -> None:
+    # Act
+    keys = {EmbeddingCache.model_key("https://first.openai.azure.com/", "ada", 1536),
+            EmbeddingCache.model_key("https://second.openai.azure.com/", "ada", 1536),
+            EmbeddingCache.model_key("https://first.openai.azure.com/", "ada", 256)}
+
+    # Assert
+    assert len(keys) == 3
@@ -0,0 +1,49 @@
+import json
+
+from src.document_importer.embedding_dimensions import resolve_embedding_dimensions
+
+
+def failing_probe() -> int:
+    raise AssertionError("The dimension should not be probed")
+
+
+def test_dimension_is_read_from_the_configuration_or_the_known_models() -> None:
+    """
+    Test case for the resolve_embedding_dimensions function.
+
+    This test case verifies that the configured dimension, the model setting and a deployment named after its
+    model are used without an embedding request.
+    """
+    # Act & Assert
+    assert resolve_embedding_dimensions({"EMBEDDING_DIMENSIONS": "256"}, failing_probe) == 256
+    assert resolve_embedding_dimensions({"AZURE_DEPLOYMENT": "embeddings", "EMBEDDING_MODEL": "text-embedding-3-large"},
+                                        failing_probe) == 3072
+    assert resolve_embedding_dimensions({"AZURE_DEPLOYMENT": "text-embedding-ada-002"}, failing_probe) == 1536
+
+
+def test_probed_dimension_is_cached_per_deployment(tmp_path) -> None:
+    """
+    Test case for the resolve_embedding_dimensions function.
+
+    This test case verifies that an unknown deployment is probed once, and that the next lookups of the same
+    deployment read the dimension from the cache file.
+    """
+    # Arrange
+    cache_path = tmp_path / "dimensions.json"
+    config = {"AZURE_OPENAI_ENDPOINT": "https://example.openai.azure.com/", "AZURE_DEPLOYMENT": "custom",
+              "EMBEDDING_DIMENSIONS_CACHE_PATH": str(cache_path)}
+    probes = []
+
+    def probe() -> int:
+        probes.append(1)
+        return 768
+
+    # Act
+    first = resolve_embedding_dimensions(config, probe)
+    second = resolve_embedding_dimensions(config, failing_probe)
+
+    # Assert
+    assert first == 768
+    assert second == 768
+    assert len(probes) == 1
+    assert json.loads(cache_path.read_text(encoding="utf-8")) == {"https://example.openai.azure.com/|custom": 768}
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from src.document_importer.bench import generate_corpus, run_benchmark
+from src.document_importer.evaluate import compare_with_baseline, evaluate, load_queries
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from src.document_importer.local_vector_store import LocalVectorStore
+from src.document_importer.vector_search import VectorSearch
+
+
+def test_evaluate_reports_recall_mrr_and_latency_against_a_local_index(tmp_path) -> None:
+    # Arrange
+    generate_corpus(str(tmp_path / "corpus"), 4, sections=2, paragraphs=2, words=20)
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    settings = {"EMBEDDING_CHECK_CONTEXT_LENGTH": "false", "VECTOR_STORE_BACKEND": "local",
+                "VECTOR_STORE_LOCAL_PATH": str(tmp_path / "store")}
+    with embedding_service, FakeSearchService() as search_service:
+        run_benchmark(str(tmp_path / "corpus"), embedding_service, search_service, settings=settings)
+        chunks = LocalVectorStore(str(tmp_path / "store" / "benchmark")).search(search_text="*",
+                                                                               select=["content", "source"])
+        queries_path = tmp_path / "queries.jsonl"
+        queries_path.write_text("\n".join(json.dumps({"query": chunk["content"], "expected": chunk["source"]})
+                                          for chunk in chunks[:5])
+                                + "\n" + json.dumps({"query": "unrelated", "expected": ["missing.md"]}) + "\n",
+                                encoding="utf-8")
+        vector_search = VectorSearch({
+            "AZURE_OPENAI_ENDPOINT": embedding_service.url, "AZURE_OPENAI_API_KEY": "test",
+            "AZURE_OPENAI_API_VERSION": "2024-02-01", "AZURE_DEPLOYMENT": "test", "EMBEDDING_DIMENSIONS": "8",
+            "INDEX_NAME": "benchmark", **settings,
+        })
+
+        # Act
+        report = evaluate(vector_search.search, load_queries(str(queries_path)), k=3)
+
+    # Assert
+    assert report["queries"] == 6
+    assert report["recall_at_k"] == pytest.approx(5 / 6)
+    assert report["mrr"] == pytest.approx(5 / 6)
+    assert [result["rank"] for result in report["results"]] == [1, 1, 1, 1, 1, None]
+    assert 0 < report["latency_ms"]["p50"] <= report["latency_ms"]["p95"]
+
+
+def test_compare_with_baseline_reports_regressions() -> None:
+    # Arrange
+    baseline = {"recall_at_k": 1.0, "mrr": 0.75, "latency_ms": {"p50": 10.0, "p95": 20.0},
+                "results": [{"query": "a", "rank": 1}, {"query": "b", "rank": 2}]}
+    report = {"recall_at_k": 0.5, "mrr": 0.5, "latency_ms": {"p50": 12.0, "p95": 22.0},
+              "results": [{"query": "a", "rank": 1}, {"query": "b", "rank": None}]}
+
+    # Act
+    comparison = compare_with_baseline(report, baseline)
+
+    # Assert
+    assert comparison["deltas"] == {"recall_at_k": -0.5, "mrr": -0.25, "latency_p50_ms": 2.0,
+                                    "latency_p95_ms": 2.0}
+    assert comparison["regressions"] == ["recall_at_k", "mrr"]
+    assert comparison["lost_queries"] == ["b"]
@@ -0,0 +1,97 @@
+import os
+from src.document_importer.file_discovery import FileDiscovery, iter_markdown_files
+
+
+def test_iter_markdown_files_finds_markdown_files_recursively() -> None:
+    # Act
+    file_paths = sorted(iter_markdown_files("example_docs/example_1"))
+
+    # Assert
+    assert file_paths == sorted([
+        os.path.join("example_docs/example_1", "index.md"),
+        os.path.join("example_docs/example_1/news", "mynews.md"),
+        os.path.join("example_docs/example_1/news/oldnews", "oldnews.md"),
+    ])
+
+
+def test_iter_markdown_files_is_lazy(tmp_path) -> None:
+    # Arrange
+    for index in range(3):
+        (tmp_path / f"doc_{index}.md").write_text("# Title")
+    (tmp_path / "notes.txt").write_text("Not markdown")
+
+    # Act
+    file_paths = iter_markdown_files(str(tmp_path))
+    first = next(file_paths)
+
+    # Assert
+    assert first.endswith(".md")
+    assert len(list(file_paths)) == 2
+
+
+def test_file_discovery_applies_globs_gitignore_and_pruning(tmp_path) -> None:
+    # Arrange
+    for relative_path in ("docs/guide.md", "docs/drafts/draft.md", "docs/build/generated.md", "docs/keep.md",
+                          "docs/notes.txt", "node_modules/package/readme.md", "docs/api/reference.md",
+                          "docs/api/internal.md"):
+        (tmp_path / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative_path).write_text("# Title")
+    (tmp_path / ".gitignore").write_text("*.md\n!docs/**\n# Generated\nbuild/\n")
+    (tmp_path / "docs/api/.gitignore").write_text("internal.md\n")
+    discovery = FileDiscovery(include=("docs/**/*.md",), exclude=("drafts/",), gitignore=True,
+                              prune=("node_modules",))
+
+    # Act
+    file_paths = sorted(os.path.relpath(path, tmp_path) for path in discovery.iter_files(str(tmp_path)))
+
+    # Assert
+    assert file_paths == [os.path.join("docs", "api", "reference.md"), os.path.join("docs", "guide.md"),
+                          os.path.join("docs", "keep.md")]
+    assert discovery.pruned_directories == 3
+    assert discovery.ignored_files == 1
+
+
+def test_file_discovery_skips_oversized_and_unmodified_files(tmp_path) -> None:
+    # Arrange
+    for name, size, modified in (("old.md", 10, 1000), ("large.md", 5000, 3000), ("new.md", 10, 3000)):
+        (tmp_path / name).write_text("x" * size)
+        os.utime(tmp_path / name, (modified, modified))
+    discovery = FileDiscovery(max_file_bytes=1000, modified_after=2000)
+    unmodified: list[str] = []
+    skipped: list[str] = []
+
+    # Act
+    file_paths = list(discovery.iter_files(str(tmp_path), on_unmodified=unmodified.append,
+                                           on_skipped=skipped.append))
+
+    # Assert
+    assert file_paths == [str(tmp_path / "new.md")]
+    assert unmodified == [str(tmp_path / "old.md")]
+    assert skipped == [str(tmp_path / "large.md")]
+    assert (discovery.oversized_files, discovery.unmodified_files) == (1, 1)
+
+
+def test_file_discovery_filters_listed_paths_like_the_directory_walk(tmp_path) -> None:
+    # Arrange
+    for relative_path in ("docs/guide.md", "docs/drafts/draft.md", "docs/build/generated.md", "docs/keep.md",
+                          "docs/notes.txt", "node_modules/package/readme.md", "docs/api/reference.md",
+                          "docs/api/internal.md", "docs/large.md"):
+        (tmp_path / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative_path).write_text("x" * 5000 if relative_path == "docs/large.md" else "# Title")
+    (tmp_path / ".gitignore").write_text("*.md\n!docs/**\n# Generated\nbuild/\n")
+    (tmp_path / "docs/api/.gitignore").write_text("internal.md\n")
+    options = dict(include=("docs/**/*.md",), exclude=("drafts/",), gitignore=True, prune=("node_modules",),
+                   max_file_bytes=1000)
+    walked = FileDiscovery(**options)
+    listed = FileDiscovery(**options)
+    paths = [os.path.join(root, name) for root, _, names in os.walk(tmp_path) for name in names]
+    skipped: list[str] = []
+
+    # Act
+    file_paths = list(listed.filter_paths(str(tmp_path), paths, on_skipped=skipped.append))
+
+    # Assert
+    assert sorted(file_paths) == sorted(walked.iter_files(str(tmp_path)))
+    assert (listed.ignored_files, listed.oversized_files) == (3, 1)
+    assert len(skipped) == 4
+    assert str(tmp_path / "docs/large.md") in skipped
@@ -0,0 +1,106 @@
+import glob
+import json
+import subprocess
+
+import pytest
+
+from src.document_importer import __main__
+from src.document_importer.__main__ import main
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from src.document_importer.front_matter_validation import validate_files
+
+
+def test_validate_files_reports_every_invalid_file_in_order() -> None:
+    # Arrange
+    paths = ["example_docs/example_1/index.md", *sorted(glob.glob("example_docs/bad_example_1/*.md"))]
+
+    # Act
+    report = validate_files(paths, batch_size=3)
+    pooled_report = validate_files(paths, workers=2, batch_size=3)
+
+    # Assert
+    assert (report["files"], report["valid"], report["invalid"]) == (10, 1, 9)
+    assert [invalid["path"] for invalid in report["invalid_files"]] == paths[1:]
+    assert report["invalid_files"][0]["error"].startswith("No authors found in the frontmatter")
+    assert pooled_report["invalid_files"] == report["invalid_files"]
+
+
+def test_main_validate_only_exits_without_any_service_configuration(tmp_path) -> None:
+    # Arrange
+    (tmp_path / "valid.md").write_text("---\ntitle: T\nsummary: S\nuri: https://example.com\nauthors: [A]\n---\n# Body")
+    (tmp_path / "invalid.md").write_text("---\ntitle: T\n---\n# Body")
+    report_path = tmp_path / "report.json"
+
+    # Act
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(tmp_path), "--validate-only", "--validate-workers", "1", "--report-json", str(report_path)])
+
+    # Assert
+    assert exc_info.value.code == 1
+    report = json.loads(report_path.read_text())["validation"]
+    assert (report["files"], report["invalid"]) == (2, 1)
+    assert report["invalid_files"][0]["path"].endswith("invalid.md")
+
+
+def test_main_validate_first_does_not_double_the_discovery_counts(tmp_path, monkeypatch) -> None:
+    # Arrange
+    docs = tmp_path / "docs"
+    (docs / "node_modules").mkdir(parents=True)
+    (docs / "valid.md").write_text("---\ntitle: T\nsummary: S\nuri: https://example.com\nauthors: [A]\n---\n# Body")
+    (docs / "draft.md").write_text("---\ntitle: T\n---\n# Draft")
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    search_service = FakeSearchService()
+    monkeypatch.setattr(__main__, "load_dotenv", lambda override: None)
+    monkeypatch.setattr(__main__, "dotenv_values", lambda: {
+        "AZURE_OPENAI_ENDPOINT": embedding_service.url, "AZURE_OPENAI_API_KEY": "test",
+        "AZURE_OPENAI_API_VERSION": "2024-02-01", "AZURE_DEPLOYMENT": "test", "EMBEDDING_DIMENSIONS": "8",
+        "EMBEDDING_CHECK_CONTEXT_LENGTH": "false", "VECTOR_STORE_ADDRESS": search_service.url,
+        "VECTOR_STORE_PASSWORD": "test", "INDEX_NAME": "validation",
+    })
+    counters = []
+
+    with embedding_service, search_service:
+        for validate_first in ([], ["--validate-first", "--validate-workers", "0"]):
+            report_path = tmp_path / f"report_{len(counters)}.json"
+
+            # Act
+            main(["-r", "org/docs", "-d", str(docs), "--exclude", "draft.md", "--report-json", str(report_path),
+                  *validate_first])
+            counters.append(json.loads(report_path.read_text())["metrics"]["counters"])
+
+    # Assert
+    for counter in counters:
+        assert (counter["discovery.directories_pruned"], counter["discovery.files_ignored"]) == (1, 1)
+        assert counter["import.files_succeeded"] == 1
+
+
+def test_main_validate_only_checks_the_changed_files_of_manifest_git_ranges(tmp_path) -> None:
+    # Arrange
+    valid = "---\ntitle: T\nsummary: S\nuri: https://example.com\nauthors: [A]\n---\n# Body"
+    for name in ("ranged", "walked"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "unchanged.md").write_text("---\ntitle: T\n---\n# Invalid")
+        (tmp_path / name / "changed.md").write_text(valid)
+    git = ["git", "-C", str(tmp_path), "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run([*git, "init", "-q"], check=True)
+    subprocess.run([*git, "add", "."], check=True)
+    subprocess.run([*git, "commit", "-q", "-m", "first"], check=True)
+    (tmp_path / "ranged" / "changed.md").write_text(valid + "\nChanged")
+    subprocess.run([*git, "commit", "-q", "-a", "-m", "second"], check=True)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({"repositories": [
+        {"repository": "org/ranged", "directory": str(tmp_path / "ranged"), "git_range": "HEAD~1..HEAD"},
+        {"repository": "org/walked", "directory": str(tmp_path / "walked")},
+    ]}))
+    report_path = tmp_path / "report.json"
+
+    # Act
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--manifest", str(manifest), "--validate-only", "--validate-workers", "1",
+              "--report-json", str(report_path)])
+
+    # Assert
+    assert exc_info.value.code == 1
+    report = json.loads(report_path.read_text())["validation"]
+    assert (report["files"], report["invalid"]) == (3, 1)
+    assert report["invalid_files"][0]["path"] == str(tmp_path / "walked" / "unchanged.md")
@@ -0,0 +1,87 @@
+import io
+import os
+import subprocess
+
+from src.document_importer.bench import generate_corpus
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from src.document_importer.file_discovery import FileDiscovery
+from src.document_importer.git_changes import FileChanges, git_changes, read_change_list
+from src.document_importer.importer import Importer
+
+
+def git(directory, *args: str) -> None:
+    subprocess.run(["git", "-C", str(directory), "-c", "user.name=test", "-c", "user.email=test@example.com",
+                    *args], check=True, capture_output=True)
+
+
+def test_git_changes_lists_added_modified_renamed_and_deleted_markdown_files(tmp_path) -> None:
+    # Arrange
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "modified.md").write_text("# Modified\n", encoding="utf-8")
+    (docs / "renamed.md").write_text("# Renamed\n\nA long enough paragraph to be detected as a rename.\n",
+                                     encoding="utf-8")
+    (docs / "deleted.md").write_text("# Deleted\n", encoding="utf-8")
+    (tmp_path / "outside.md").write_text("# Outside\n", encoding="utf-8")
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "first")
+    (docs / "modified.md").write_text("# Modified again\n", encoding="utf-8")
+    (docs / "sub").mkdir()
+    git(tmp_path, "mv", "docs/renamed.md", "docs/sub/moved.md")
+    git(tmp_path, "rm", "-q", "docs/deleted.md")
+    (docs / "added.md").write_text("# Added\n", encoding="utf-8")
+    (docs / "notes.txt").write_text("Not markdown\n", encoding="utf-8")
+    (tmp_path / "outside.md").write_text("# Outside again\n", encoding="utf-8")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "second")
+
+    # Act
+    changes = git_changes(str(docs), "HEAD~1..HEAD")
+
+    # Assert
+    assert sorted(changes.changed) == sorted([os.path.join(str(docs), "added.md"),
+                                              os.path.join(str(docs), "modified.md"),
+                                              os.path.join(str(docs), "sub", "moved.md")])
+    assert sorted(changes.deleted) == sorted([os.path.join(str(docs), "deleted.md"),
+                                              os.path.join(str(docs), "renamed.md")])
+
+
+def test_read_change_list_accepts_name_status_lines_and_plain_paths(tmp_path) -> None:
+    # Arrange
+    (tmp_path / "kept.md").write_text("# Kept\n", encoding="utf-8")
+    stream = io.StringIO("M\tchanged.md\nR087\told.md\tnew.md\nD\tgone.md\nkept.md\nmissing.md\nA\timage.png\n")
+
+    # Act
+    changes = read_change_list(stream, str(tmp_path))
+
+    # Assert
+    assert changes.changed == [os.path.join(str(tmp_path), name) for name in ("changed.md", "new.md", "kept.md")]
+    assert changes.deleted == [os.path.join(str(tmp_path), name) for name in ("old.md", "gone.md", "missing.md")]
+
+
+def test_importer_applies_the_discovery_filters_to_the_changed_files(tmp_path) -> None:
+    # Arrange
+    docs = tmp_path / "docs"
+    generate_corpus(str(docs / "drafts"), 2, sections=1, paragraphs=1, words=10)
+    generate_corpus(str(docs), 2, sections=1, paragraphs=1, words=10)
+    changed = sorted(str(path) for path in docs.rglob("*.md"))
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    search_service = FakeSearchService()
+
+    with embedding_service, search_service:
+        importer = Importer({
+            "AZURE_OPENAI_ENDPOINT": embedding_service.url, "AZURE_OPENAI_API_KEY": "test",
+            "AZURE_OPENAI_API_VERSION": "2024-02-01", "AZURE_DEPLOYMENT": "test", "EMBEDDING_DIMENSIONS": "8",
+            "EMBEDDING_CHECK_CONTEXT_LENGTH": "false", "VECTOR_STORE_ADDRESS": search_service.url,
+            "VECTOR_STORE_PASSWORD": "test", "INDEX_NAME": "changes",
+        }, repository="org/docs", directory=str(docs), changes=FileChanges(changed=changed),
+            discovery=FileDiscovery(exclude=("drafts/",)))
+
+        # Act
+        importer.run()
+
+    # Assert
+    assert len(changed) == 4
+    assert sorted(importer.succeed_files) == [path for path in changed if os.sep + "drafts" + os.sep not in path]
+    assert importer.discovery.ignored_files == 2
@@ -0,0 +1,104 @@
+import json
+import pytest
+from src.document_importer.import_state import ImportState
+
+
+@pytest.fixture
+def state_path(tmp_path) -> str:
+    return str(tmp_path / "state.json")
+
+
+def test_hash_file_is_stable_and_content_based(tmp_path) -> None:
+    # Arrange
+    first = tmp_path / "first.md"
+    second = tmp_path / "second.md"
+    first.write_text("# Title")
+    second.write_text("# Title")
+
+    # Act and Assert
+    assert ImportState.hash_file(str(first)) == ImportState.hash_file(str(second))
+    second.write_text("# Other title")
+    assert ImportState.hash_file(str(first)) != ImportState.hash_file(str(second))
+
+
+def test_is_unchanged_compares_hash_and_chunking_parameters(state_path: str) -> None:
+    # Arrange
+    state = ImportState(state_path)
+
+    # Act
+    state.record("adp/example1", "docs", "docs/index.md", "abc", 1000, 0)
+
+    # Assert
+    assert state.is_unchanged("adp/example1", "docs", "docs/index.md", "abc", 1000, 0)
+    assert not state.is_unchanged("adp/example1", "docs", "docs/index.md", "def", 1000, 0)
+    assert not state.is_unchanged("adp/example1", "docs", "docs/index.md", "abc", 500, 0)
+    assert not state.is_unchanged("adp/example2", "docs", "docs/index.md", "abc", 1000, 0)
+
+
+def test_state_is_persisted_between_runs(state_path: str) -> None:
+    # Arrange
+    state = ImportState(state_path)
+    state.record("adp/example1", "docs", "docs/index.md", "abc", 1000, 0)
+    state.record("adp/example1", "docs", "docs/news.md", "def", 1000, 0)
+    state.remove("adp/example1", "docs", "docs/news.md")
+
+    # Act
+    state.save()
+    reloaded = ImportState(state_path)
+
+    # Assert
+    assert reloaded.sources("adp/example1", "docs") == {"docs/index.md"}
+    assert reloaded.is_unchanged("adp/example1", "docs", "docs/index.md", "abc", 1000, 0)
+
+
+def test_is_unchanged_compares_the_tokenizer(state_path: str) -> None:
+    # Arrange
+    state = ImportState(state_path)
+    state.files[ImportState.scope("adp/example1", "docs")] = {
+        "docs/legacy.md": {"hash": "abc", "chunk_size": 512, "chunk_overlap": 0}}
+
+    # Act
+    state.record("adp/example1", "docs", "docs/index.md", "abc", 512, 0, "cl100k_base")
+
+    # Assert
+    assert state.is_unchanged("adp/example1", "docs", "docs/index.md", "abc", 512, 0, "cl100k_base")
+    assert not state.is_unchanged("adp/example1", "docs", "docs/index.md", "abc", 512, 0, "o200k_base")
+    assert not state.is_unchanged("adp/example1", "docs", "docs/index.md", "abc", 512, 0)
+    assert not state.is_unchanged("adp/example1", "docs", "docs/legacy.md", "abc", 512, 0)
+
+
+def test_files_are_recorded_per_directory(state_path: str) -> None:
+    # Arrange
+    state = ImportState(state_path)
+
+    # Act
+    state.record("adp/example1", "./docs", "docs/index.md", "abc", 1000, 0)
+    state.record("adp/example1", "blog", "blog/news.md", "def", 1000, 0)
+
+    # Assert
+    assert state.is_unchanged("adp/example1", "docs/", "docs/index.md", "abc", 1000, 0)
+    assert not state.is_unchanged("adp/example1", "blog", "docs/index.md", "abc", 1000, 0)
+    assert state.sources("adp/example1", "docs") == {"docs/index.md"}
+    assert state.sources("adp/example1", "blog") == {"blog/news.md"}
+
+
+def test_version_1_files_are_adopted_by_the_directory_they_are_under(state_path: str) -> None:
+    # Arrange
+    with open(state_path, "w", encoding="utf-8") as state_file:
+        json.dump({"version": 1, "files": {"adp/example1": {
+            "docs/index.md": {"hash": "abc", "chunk_size": 1000, "chunk_overlap": 0, "tokenizer": None},
+            "blog/news.md": {"hash": "def", "chunk_size": 1000, "chunk_overlap": 0, "tokenizer": None},
+        }}}, state_file)
+    state = ImportState(state_path)
+
+    # Act
+    state.record("adp/example1", "docs", "docs/index.md", "abc", 1000, 0)
+    state.save()
+    reloaded = ImportState(state_path)
+
+    # Assert
+    assert reloaded.sources("adp/example1", "docs") == {"docs/index.md"}
+    assert reloaded.sources("adp/example1", "blog") == {"blog/news.md"}
+    assert reloaded.is_unchanged("adp/example1", "blog", "blog/news.md", "def", 1000, 0)
+    assert reloaded.legacy_files == {"adp/example1": {
+        "blog/news.md": {"hash": "def", "chunk_size": 1000, "chunk_overlap": 0, "tokenizer": None}}}
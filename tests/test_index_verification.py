@@ -0,0 +1,73 @@
+from src.document_importer.bench import generate_corpus
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from src.document_importer.importer import Importer
+
+
+def create_config(embedding_service: FakeEmbeddingService, search_service: FakeSearchService) -> dict:
+    return {
+        "AZURE_OPENAI_ENDPOINT": embedding_service.url,
+        "AZURE_OPENAI_API_KEY": "test",
+        "AZURE_OPENAI_API_VERSION": "2024-02-01",
+        "AZURE_DEPLOYMENT": "test",
+        "VECTOR_STORE_ADDRESS": search_service.url,
+        "VECTOR_STORE_PASSWORD": "test",
+        "INDEX_NAME": "verify",
+        "EMBEDDING_DIMENSIONS": str(embedding_service.dimensions),
+        "EMBEDDING_CHECK_CONTEXT_LENGTH": "false",
+    }
+
+
+def damage_index(search_service: FakeSearchService, paths: list[str]) -> None:
+    documents = search_service.documents["verify"]
+    for key in [key for key, document in documents.items() if document["source"] == paths[0]]:
+        del documents[key]
+    del documents[next(key for key, document in documents.items() if document["source"] == paths[1])]
+    documents["orphan"] = {"id": "orphan", "repository": "org/repo", "source": "deleted.md"}
+
+
+def test_verify_counts_the_chunks_of_each_source_with_a_facet_query(tmp_path) -> None:
+    # Arrange
+    paths = generate_corpus(str(tmp_path), 4, sections=2, paragraphs=2, words=20)
+    with FakeEmbeddingService(dimensions=8) as embedding_service, FakeSearchService() as search_service:
+        config = create_config(embedding_service, search_service)
+        importer = Importer(config, repository="org/repo", directory=str(tmp_path))
+        importer.run()
+        consistent = importer.verify()
+        damage_index(search_service, paths)
+        requests = search_service.requests
+
+        # Act
+        report = Importer(config, repository="org/repo", directory=str(tmp_path)).verify()
+        requests = search_service.requests - requests
+
+    # Assert
+    assert consistent["consistent"]
+    assert consistent["indexed_chunks"] == consistent["expected_chunks"] == importer.total_chunks
+    assert not report["consistent"]
+    assert report["method"] == "facets"
+    assert report["missing_sources"] == [paths[0]]
+    assert report["orphaned_sources"] == ["deleted.md"]
+    assert list(report["mismatched_sources"]) == [paths[1]]
+    assert report["mismatched_sources"][paths[1]]["indexed"] == report["mismatched_sources"][paths[1]]["expected"] - 1
+    assert requests <= 3
+
+
+def test_verify_counts_each_source_when_the_source_field_is_not_facetable(tmp_path) -> None:
+    # Arrange
+    paths = generate_corpus(str(tmp_path), 3, sections=2, paragraphs=2, words=20)
+    with FakeEmbeddingService(dimensions=8) as embedding_service, FakeSearchService() as search_service:
+        config = create_config(embedding_service, search_service)
+        Importer(config, repository="org/repo", directory=str(tmp_path)).run()
+        for index_field in search_service.indexes["verify"]["fields"]:
+            index_field["facetable"] = False
+        damage_index(search_service, paths)
+
+        # Act
+        report = Importer(config, repository="org/repo", directory=str(tmp_path)).verify()
+
+    # Assert
+    assert report["method"] == "counts"
+    assert report["missing_sources"] == [paths[0]]
+    assert report["orphaned_sources"] == []
+    assert report["orphaned_chunks"] == 1
+    assert list(report["mismatched_sources"]) == [paths[1]]
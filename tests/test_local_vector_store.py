@@ -0,0 +1,95 @@
+import pytest
+
+from src.document_importer.bench import generate_corpus, run_benchmark
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from src.document_importer.local_vector_store import LocalVectorStore
+from src.document_importer.vector_search import VectorSearch
+
+
+def create_documents(count: int) -> list[dict]:
+    return [{"id": f"key-{index}", "content": f"chunk {index}", "source": "a.md" if index % 2 else "b.md",
+             "content_vector": [1.0, float(index), 0.0]} for index in range(count)]
+
+
+def test_local_vector_store_ranks_filtered_documents_by_cosine_similarity(tmp_path) -> None:
+    # Arrange
+    store = LocalVectorStore(str(tmp_path))
+    store.upload_documents(create_documents(20))
+
+    # Act
+    results = store.vector_search([1.0, 5.0, 0.0], k=3, filter="source eq 'a.md'", select=["id"])
+
+    # Assert
+    assert [result["id"] for result in results] == ["key-5", "key-7", "key-9"]
+    assert results[0]["@search.score"] == pytest.approx(1.0)
+
+
+def test_local_vector_store_pages_ordered_results_by_key_range(tmp_path) -> None:
+    # Arrange
+    store = LocalVectorStore(str(tmp_path))
+    store.upload_documents(create_documents(12))
+
+    # Act
+    first_page = store.search(search_text="*", filter="source eq 'b.md'", select=["id"], order_by=["id"], top=4)
+    last_key = first_page[-1]["id"]
+    second_page = store.search(search_text="*", filter=f"source eq 'b.md' and id gt '{last_key}'", select=["id"],
+                               order_by=["id desc"], top=4)
+
+    # Assert
+    assert [result["id"] for result in first_page] == ["key-0", "key-10", "key-2", "key-4"]
+    assert [result["id"] for result in second_page] == ["key-8", "key-6"]
+
+
+def test_local_vector_store_persists_indexing_actions(tmp_path) -> None:
+    # Arrange
+    store = LocalVectorStore(str(tmp_path))
+    store.upload_documents(create_documents(4))
+    results = store.index_documents([
+        {"@search.action": "delete", "id": "key-1"},
+        {"@search.action": "merge", "id": "key-2", "title": "Merged"},
+        {"@search.action": "merge", "id": "missing", "title": "Missing"},
+    ])
+
+    # Act
+    store.save()
+    reloaded = LocalVectorStore(str(tmp_path))
+
+    # Assert
+    assert [result.succeeded for result in results] == [True, True, False]
+    assert len(reloaded) == 3
+    assert reloaded.dimensions == 3
+    assert reloaded.search(search_text="*", filter="search.in(source, 'b.md', '|')", select=["id", "title"]) == [
+        {"@search.score": 1.0, "id": "key-0", "title": None},
+        {"@search.score": 1.0, "id": "key-2", "title": "Merged"},
+    ]
+    assert reloaded.vector_search([1.0, 3.0, 0.0], k=1)[0]["id"] == "key-3"
+
+
+def test_local_index_is_built_offline_and_pushed_to_the_search_service(tmp_path) -> None:
+    # Arrange
+    generate_corpus(str(tmp_path / "corpus"), 3, sections=2, paragraphs=2, words=20)
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    search_service = FakeSearchService()
+    settings = {"EMBEDDING_CHECK_CONTEXT_LENGTH": "false", "VECTOR_STORE_BACKEND": "local",
+                "VECTOR_STORE_LOCAL_PATH": str(tmp_path / "store")}
+
+    with embedding_service, search_service:
+        report = run_benchmark(str(tmp_path / "corpus"), embedding_service, search_service, settings=settings)
+        local_store = LocalVectorStore(str(tmp_path / "store" / "benchmark"))
+        vector_search = VectorSearch({
+            "AZURE_OPENAI_ENDPOINT": embedding_service.url, "AZURE_OPENAI_API_KEY": "test",
+            "AZURE_OPENAI_API_VERSION": "2024-02-01", "AZURE_DEPLOYMENT": "test", "EMBEDDING_DIMENSIONS": "8",
+            "VECTOR_STORE_ADDRESS": search_service.url, "VECTOR_STORE_PASSWORD": "test", "INDEX_NAME": "published",
+        })
+
+        # Act
+        result = vector_search.push_local_store(local_store)
+
+    # Assert
+    assert report["succeeded"] == 3
+    assert search_service.documents.get("benchmark") is None
+    assert len(local_store) == report["chunks"]
+    assert result.failed == {}
+    published = search_service.documents["published"]
+    assert sorted(published) == sorted(result.keys)
+    assert all(len(document["content_vector"]) == 8 for document in published.values())
@@ -1,6 +1,7 @@
 from ast import Dict
 from dotenv import load_dotenv, dotenv_values
 import pytest
+from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
 
 from src.document_importer.markdown_parser import MarkdownParser
 
@@ -59,8 +60,8 @@ def test_markdown_parser_convert_markdown_file_into_chucks_correctly() -> None:
         assert metadata.get("uri") == "https://defra.github.io/adp-documentation/"
         assert "repository" in metadata
         assert metadata.get("repository") == repository
-        assert "path" in metadata
-        assert metadata.get("path") == path
+        assert "path" not in metadata
+        assert metadata.get("source") == path
         assert "heading" in metadata
         assert "chunk_number" in metadata
         assert metadata.get("chunk_number") == chuck_number
@@ -131,5 +132,42 @@ def test_throw_exception_when_frontmatter_are_not_present() -> None:
         assert str(exc_info.value) == f"No frontmatter found in the markdown document at {path}"
 
 
+def test_iter_chunks_splits_the_body_like_the_langchain_splitters() -> None:
+    """
+    Test case to verify that streaming the document one section at a time yields the chunks of the langchain
+    header and recursive character splitters applied to the whole body.
+    """
+    # Arrange
+    mdp: MarkdownParser = MarkdownParser()
+    path: str = "example_docs/example_1/index.md"
+    with open(path, "r", encoding="utf-8") as markdown_file:
+        body = markdown_file.read().split("---\n", 2)[2]
+    header_splitter = MarkdownHeaderTextSplitter(
+        headers_to_split_on=[("#", "Header 1"), ("##", "Header 2"), ("###", "Header 3")], strip_headers=False)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+    expected = [(content, header_split.metadata) for header_split in header_splitter.split_text(body)
+                for content in text_splitter.split_text(header_split.page_content)]
 
-    
+    # Act
+    chunks = list(mdp.iter_chunks(path=path, repository="adp/example1"))
+
+    # Assert
+    assert len(chunks) == 9
+    assert [(content, metadata["heading"]) for content, metadata in chunks] == expected
+    assert [metadata["chunk_number"] for _, metadata in chunks] == list(range(1, 10))
+
+
+def test_read_front_matter_reads_only_the_header_block() -> None:
+    """
+    Test case to verify that the frontmatter can be read without parsing the document.
+    """
+    # Arrange
+    mdp: MarkdownParser = MarkdownParser()
+
+    # Act
+    metadata: dict = mdp.read_front_matter("example_docs/example_1/index.md")
+
+    # Assert
+    assert metadata.get("title") == "Why ADP"
+    assert metadata.get("authors") == ["Logan Talbot"]
+    assert mdp.read_front_matter("example_docs/bad_example_1/index_no_front_matter.md") == {}
@@ -0,0 +1,78 @@
+import json
+import pytest
+
+from src.document_importer.metrics import (
+    Metrics,
+    percentile,
+    write_json_report,
+    write_prometheus_textfile,
+)
+
+
+def test_percentile_uses_the_nearest_rank() -> None:
+    """
+    Test case for the percentile function.
+    """
+    # Arrange
+    values = [float(value) for value in range(1, 101)]
+
+    # Act & Assert
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.99) == 0.0
+
+
+def test_metrics_summarizes_counters_and_timers() -> None:
+    """
+    Test case for the Metrics class.
+
+    This test case verifies that counters are summed, that the timer context manager records durations of
+    blocks that raise, and that the snapshot summarizes the timers.
+    """
+    # Arrange
+    metrics = Metrics()
+
+    # Act
+    metrics.increment("parse.files")
+    metrics.increment("parse.bytes_read", 1024)
+    metrics.increment("parse.files")
+    metrics.observe_many("stage.embed", [0.010, 0.020, 0.030, 0.040])
+    with pytest.raises(ValueError):
+        with metrics.timer("stage.parse"):
+            raise ValueError("Parse failed")
+    snapshot = metrics.snapshot()
+
+    # Assert
+    assert snapshot["counters"] == {"parse.bytes_read": 1024, "parse.files": 2}
+    assert snapshot["timers"]["stage.embed"]["count"] == 4
+    assert snapshot["timers"]["stage.embed"]["p50_ms"] == pytest.approx(20.0)
+    assert snapshot["timers"]["stage.embed"]["max_ms"] == pytest.approx(40.0)
+    assert snapshot["timers"]["stage.parse"]["count"] == 1
+
+
+def test_reports_are_written_as_json_and_prometheus_text(tmp_path) -> None:
+    """
+    Test case for the report writers.
+
+    This test case verifies that the JSON report is readable and that counters and timers are exported as
+    Prometheus counters and summaries with the given labels.
+    """
+    # Arrange
+    metrics = Metrics()
+    metrics.increment("embed.requests", 3)
+    metrics.observe("stage.upload", 0.5)
+    json_path = tmp_path / "report.json"
+    prometheus_path = tmp_path / "metrics.prom"
+
+    # Act
+    write_json_report(str(json_path), {"repository": "adp/example1", "metrics": metrics.snapshot()})
+    write_prometheus_textfile(str(prometheus_path), metrics, labels={"repository": "adp/example1"})
+
+    # Assert
+    report = json.loads(json_path.read_text(encoding="utf-8"))
+    assert report["metrics"]["counters"]["embed.requests"] == 3
+    lines = prometheus_path.read_text(encoding="utf-8").splitlines()
+    assert "# TYPE document_importer_embed_requests_total counter" in lines
+    assert 'document_importer_embed_requests_total{repository="adp/example1"} 3' in lines
+    assert 'document_importer_stage_upload_seconds{repository="adp/example1",quantile="0.99"} 0.5' in lines
+    assert 'document_importer_stage_upload_seconds_count{repository="adp/example1"} 1' in lines
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from src.document_importer.bench import generate_corpus
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from src.document_importer.multi_importer import ManifestEntry, MultiImporter, load_manifest
+from src.document_importer.shared_clients import FairBudget
+
+
+def test_load_manifest_applies_the_defaults_and_rejects_duplicates(tmp_path) -> None:
+    # Arrange
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text("defaults:\n  upsert: true\nrepositories:\n"
+                        + "  - repository: org/a\n    directory: a/docs\n"
+                        + "  - repository: org/b\n    directory: b/docs\n    upsert: false\n", encoding="utf-8")
+    duplicated = tmp_path / "duplicated.json"
+    duplicated.write_text('[{"repository": "org/a", "directory": "a"}, {"repository": "org/a", "directory": "b"}]',
+                          encoding="utf-8")
+
+    # Act
+    entries = load_manifest(str(manifest))
+
+    # Assert
+    assert entries == [ManifestEntry("org/a", "a/docs", upsert=True), ManifestEntry("org/b", "b/docs")]
+    with pytest.raises(ValueError, match="org/a"):
+        load_manifest(str(duplicated))
+
+
+def test_fair_budget_grants_freed_slots_in_round_robin_order() -> None:
+    # Arrange
+    budget = FairBudget(1)
+    budget.acquire("large")
+    granted: list[str] = []
+    threads = []
+    for owner in ("large", "large", "small"):
+        thread = threading.Thread(target=lambda owner=owner: (budget.acquire(owner), granted.append(owner)))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+
+    # Act
+    for expected in range(1, 4):
+        budget.release()
+        while len(granted) < expected:
+            time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert granted == ["large", "small", "large"]
+
+
+def test_multi_importer_imports_every_repository_with_shared_clients(tmp_path) -> None:
+    # Arrange
+    generate_corpus(str(tmp_path / "a"), 6, sections=2, paragraphs=2, words=20)
+    generate_corpus(str(tmp_path / "b"), 2, sections=2, paragraphs=2, words=20)
+    entries = [ManifestEntry("org/a", str(tmp_path / "a")), ManifestEntry("org/b", str(tmp_path / "b")),
+               ManifestEntry("org/missing", str(tmp_path / "missing"), git_range="HEAD~1..HEAD")]
+    embedding_service = FakeEmbeddingService(dimensions=8)
+    search_service = FakeSearchService()
+
+    with embedding_service, search_service:
+        multi_importer = MultiImporter({
+            "AZURE_OPENAI_ENDPOINT": embedding_service.url, "AZURE_OPENAI_API_KEY": "test",
+            "AZURE_OPENAI_API_VERSION": "2024-02-01", "AZURE_DEPLOYMENT": "test", "EMBEDDING_DIMENSIONS": "8",
+            "EMBEDDING_CHECK_CONTEXT_LENGTH": "false", "VECTOR_STORE_ADDRESS": search_service.url,
+            "VECTOR_STORE_PASSWORD": "test", "INDEX_NAME": "manifest",
+        }, entries, parallel_repositories=2, workers=2, max_files_in_flight=2)
+
+        # Act
+        multi_importer.run()
+
+    # Assert
+    report = multi_importer.run_report()
+    documents = search_service.documents["manifest"].values()
+    assert [repository["files"]["succeeded"] for repository in report["repositories"][:2]] == [6, 2]
+    assert report["repositories"][2]["error"] is not None
+    assert report["combined"]["failed_repositories"] == 1
+    assert report["combined"]["files"]["succeeded"] == 8
+    assert report["combined"]["chunks"] == len(documents)
+    assert {document["repository"] for document in documents} == {"org/a", "org/b"}
+    assert report["combined"]["metrics"]["counters"]["import.files_succeeded"] == 8
@@ -0,0 +1,55 @@
+import pytest
+
+from src.document_importer.markdown_parser import MarkdownParser
+from src.document_importer.parse_pool import ParsePool
+from src.document_importer.pipeline import FileTask
+
+
+def test_parse_pool_returns_the_same_chunks_as_the_parser(tmp_path) -> None:
+    """
+    Test case for the ParsePool class.
+
+    This test case verifies that documents parsed by the worker processes are expanded into the same chunk
+    contents and metadatas as the in-process parser, in the order of the submitted tasks.
+    """
+    # Arrange
+    short_path = tmp_path / "short.md"
+    short_path.write_text("---\ntitle: Short\nsummary: A short page\nuri: https://example.com/short\n"
+                          + "authors:\n  - author\n---\n# Short\n\nOne paragraph.\n", encoding="utf-8")
+    paths: list[str] = ["example_docs/example_1/index.md", str(short_path)]
+    expected: list[dict] = [MarkdownParser().parse(path=path, repository="adp/example1") for path in paths]
+
+    # Act
+    with ParsePool(2, repository="adp/example1", chunk_size=1000, chunk_overlap=0) as pool:
+        tasks: list[FileTask] = list(pool.submit(FileTask(file_path=path) for path in paths))
+        for task in tasks:
+            pool.collect(task)
+
+    # Assert
+    assert [task.file_path for task in tasks] == paths
+    for task, docs in zip(tasks, expected):
+        assert task.parse_result is None
+        assert task.page_contents == docs["page_contents"]
+        for metadata, expected_metadata in zip(task.page_metadatas, docs["page_metadatas"]):
+            assert list(metadata.keys()) == list(expected_metadata.keys())
+            assert {**metadata, "last_update": None} == {**expected_metadata, "last_update": None}
+
+
+def test_parse_pool_raises_the_parse_error_of_a_document() -> None:
+    """
+    Test case for the ParsePool class.
+
+    This test case verifies that a frontmatter error raised in a worker process is raised again when the
+    result of the document is collected.
+    """
+    # Arrange
+    path: str = "example_docs/bad_example_1/index_no_front_matter.md"
+
+    # Act
+    with ParsePool(1, repository="adp/example1", chunk_size=1000, chunk_overlap=0) as pool:
+        task: FileTask = next(pool.submit([FileTask(file_path=path)]))
+
+        # Assert
+        with pytest.raises(ValueError) as exc_info:
+            pool.collect(task)
+    assert "No frontmatter found" in str(exc_info.value)
@@ -0,0 +1,154 @@
+import threading
+from src.document_importer.pipeline import ImportPipeline, FileTask, BatchingStage, BatchFailedError
+
+
+def test_pipeline_runs_every_task_through_all_stages() -> None:
+    # Arrange
+    visited: list[tuple[str, str]] = []
+    lock = threading.Lock()
+
+    def stage(name: str):
+        def process(task: FileTask) -> None:
+            with lock:
+                visited.append((name, task.file_path))
+        return process
+
+    pipeline = ImportPipeline([("parse", stage("parse"), 2), ("upload", stage("upload"), 3)], queue_size=1)
+    succeeded: list[str] = []
+
+    # Act
+    pipeline.run((FileTask(f"file_{i}.md") for i in range(20)),
+                 on_success=lambda task: succeeded.append(task.file_path),
+                 on_failure=lambda task, e: None)
+
+    # Assert
+    assert sorted(succeeded) == sorted(f"file_{i}.md" for i in range(20))
+    assert len(visited) == 40
+
+
+def test_pipeline_fails_files_independently() -> None:
+    # Arrange
+    def parse(task: FileTask) -> None:
+        if task.file_path == "bad.md":
+            raise ValueError("No frontmatter found")
+        task.page_contents = ["chunk"]
+
+    pipeline = ImportPipeline([("parse", parse, 2), ("upload", lambda task: None, 2)])
+    succeeded: list[str] = []
+    failed: list[tuple[str, str]] = []
+
+    # Act
+    pipeline.run([FileTask("good.md"), FileTask("bad.md"), FileTask("other.md")],
+                 on_success=lambda task: succeeded.append(task.file_path),
+                 on_failure=lambda task, e: failed.append((task.file_path, str(e))))
+
+    # Assert
+    assert sorted(succeeded) == ["good.md", "other.md"]
+    assert failed == [("bad.md", "No frontmatter found")]
+
+
+def test_pipeline_flushes_batching_stages() -> None:
+    # Arrange
+    class CollectingStage(BatchingStage):
+        def __init__(self):
+            self.held: list[FileTask] = []
+            self.lock = threading.Lock()
+
+        def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+            with self.lock:
+                self.held.append(task)
+            return []
+
+        def flush(self) -> list[tuple[FileTask, Exception | None]]:
+            with self.lock:
+                held, self.held = self.held, []
+            return [(task, None) for task in held]
+
+    pipeline = ImportPipeline([("parse", lambda task: None, 2), ("embed", CollectingStage(), 2)],
+                              flush_interval=0.01)
+    succeeded: list[str] = []
+
+    # Act
+    pipeline.run([FileTask(f"file_{i}.md") for i in range(5)],
+                 on_success=lambda task: succeeded.append(task.file_path),
+                 on_failure=lambda task, e: None)
+
+    # Assert
+    assert sorted(succeeded) == [f"file_{i}.md" for i in range(5)]
+
+
+def test_pipeline_runs_inline_and_flushes_batching_stages_in_order() -> None:
+    # Arrange
+    class HoldAllStage(BatchingStage):
+        def __init__(self):
+            self.held: list[FileTask] = []
+
+        def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+            self.held.append(task)
+            return []
+
+        def flush(self) -> list[tuple[FileTask, Exception | None]]:
+            held, self.held = self.held, []
+            return [(task, None) for task in held]
+
+    def parse(task: FileTask) -> None:
+        if task.file_path == "bad.md":
+            raise ValueError("No title found")
+
+    pipeline = ImportPipeline([("parse", parse, 1), ("clean", HoldAllStage(), 1), ("embed", HoldAllStage(), 1)])
+    succeeded: list[str] = []
+    failed: list[str] = []
+
+    # Act
+    pipeline.run_inline([FileTask("first.md"), FileTask("bad.md"), FileTask("second.md")],
+                        on_success=lambda task: succeeded.append(task.file_path),
+                        on_failure=lambda task, e: failed.append(task.file_path))
+
+    # Assert
+    assert succeeded == ["first.md", "second.md"]
+    assert failed == ["bad.md"]
+
+
+def test_pipeline_fails_the_tasks_of_a_failed_batching_stage() -> None:
+    # Arrange
+    class FailingStage(BatchingStage):
+        def __init__(self):
+            self.held: list[FileTask] = []
+            self.failed_batch: list[str] = []
+            self.lock = threading.Lock()
+
+        def add(self, task: FileTask) -> list[tuple[FileTask, Exception | None]]:
+            if task.file_path == "bad.md":
+                raise ValueError("Batch rejected")
+            with self.lock:
+                self.held.append(task)
+                if len(self.held) < 2:
+                    return []
+                batch, self.held = self.held, []
+                if not self.failed_batch:
+                    self.failed_batch = [held.file_path for held in batch]
+                    raise BatchFailedError(batch, ConnectionError("Service unavailable"))
+            return [(held, None) for held in batch]
+
+        def flush(self) -> list[tuple[FileTask, Exception | None]]:
+            with self.lock:
+                batch, self.held = self.held, []
+            return [(held, None) for held in batch]
+
+    file_paths = ["first.md", "bad.md", "second.md", "third.md", "fourth.md"]
+    for run, workers in (("run", 2), ("run_inline", 1)):
+        stage = FailingStage()
+        pipeline = ImportPipeline([("parse", lambda task: None, 1), ("embed", stage, workers)], flush_interval=0.01)
+        succeeded: list[str] = []
+        failed: list[tuple[str, str]] = []
+
+        # Act
+        getattr(pipeline, run)([FileTask(file_path) for file_path in file_paths],
+                               on_success=lambda task: succeeded.append(task.file_path),
+                               on_failure=lambda task, e: failed.append((task.file_path, str(e))))
+
+        # Assert
+        assert len(stage.failed_batch) == 2
+        assert sorted(failed) == sorted([("bad.md", "Batch rejected")]
+                                        + [(file_path, "Service unavailable") for file_path in stage.failed_batch])
+        assert sorted(succeeded + [file_path for file_path, _ in failed]) == sorted(file_paths)
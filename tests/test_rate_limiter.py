@@ -0,0 +1,98 @@
+import pytest
+from src.document_importer.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code, headers)
+
+
+class FlakyService:
+    def __init__(self, errors: list[Exception]):
+        self.errors = errors
+        self.calls = 0
+
+    def send(self, value: str) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return value
+
+
+def test_rate_limiter_retries_throttled_requests_and_reduces_concurrency() -> None:
+    # Arrange
+    rate_limiter = RateLimiter(max_concurrency=8, max_retries=3, base_delay=0)
+    service = FlakyService([FakeHttpError(429, {"retry-after-ms": "1"}), FakeHttpError(503)])
+
+    # Act
+    result = rate_limiter.call(service.send, "embedding")
+
+    # Assert
+    assert result == "embedding"
+    assert service.calls == 3
+    assert rate_limiter.retries == 2
+    assert rate_limiter.throttled == 1
+    assert rate_limiter.concurrency == 4
+
+
+def test_rate_limiter_does_not_retry_client_errors() -> None:
+    # Arrange
+    rate_limiter = RateLimiter(max_retries=3, base_delay=0)
+    service = FlakyService([FakeHttpError(400)])
+
+    # Act and Assert
+    with pytest.raises(FakeHttpError):
+        rate_limiter.call(service.send, "embedding")
+    assert service.calls == 1
+
+
+def test_rate_limiter_gives_up_after_max_retries() -> None:
+    # Arrange
+    rate_limiter = RateLimiter(max_retries=2, base_delay=0)
+    service = FlakyService([ConnectionError("reset"), ConnectionError("reset"), ConnectionError("reset")])
+
+    # Act and Assert
+    with pytest.raises(ConnectionError):
+        rate_limiter.call(service.send, "embedding")
+    assert service.calls == 3
+
+
+def test_rate_limiter_increases_concurrency_after_successes() -> None:
+    # Arrange
+    rate_limiter = RateLimiter(max_concurrency=4, increase_after=2, base_delay=0)
+    rate_limiter.report_throttled()
+
+    # Act
+    for _ in range(4):
+        rate_limiter.call(str, "ok")
+
+    # Assert
+    assert rate_limiter.concurrency == 4
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after-ms": "1500"}, 1.5),
+    ({"retry-after": "2"}, 2.0),
+    ({}, None),
+])
+def test_retry_after_reads_response_headers(headers: dict, expected: float) -> None:
+    assert RateLimiter.retry_after(FakeHttpError(429, headers)) == expected
+
+
+def test_token_bucket_waits_for_tokens() -> None:
+    # Arrange
+    bucket = TokenBucket(per_minute=6000)
+    bucket.acquire(6000)
+
+    # Act
+    waited = bucket.acquire(10)
+
+    # Assert
+    assert 0 < waited < 1
@@ -0,0 +1,61 @@
+import re
+
+from src.document_importer.markdown_parser import MarkdownParser
+from src.document_importer.token_chunker import TokenChunker
+
+
+def word_offsets(text: str) -> list[int]:
+    """
+    A tokenizer with one token per word, punctuation mark or run of whitespace.
+    """
+    return [match.start() for match in re.finditer(r"\w+|[^\w\s]|\s+", text)]
+
+
+def test_token_chunker_cuts_balanced_chunks_at_paragraph_boundaries() -> None:
+    # Arrange
+    paragraphs = [" ".join(f"word{index}" for index in range(count)) + "." for count in (30, 30, 30, 30)]
+    text = "\n\n".join(paragraphs)
+    chunker = TokenChunker(word_offsets, chunk_tokens=150)
+
+    # Act
+    chunks = chunker.split_text(text)
+
+    # Assert
+    assert [content for content, _ in chunks] == ["\n\n".join(paragraphs[:2]), "\n\n".join(paragraphs[2:])]
+    assert all(token_count == len(word_offsets(content)) for content, token_count in chunks)
+    assert all(token_count <= 150 for _, token_count in chunks)
+
+
+def test_token_chunker_cuts_long_paragraphs_at_sentences_and_words() -> None:
+    # Arrange
+    text = "First sentence is here. " * 20 + "unbroken" * 5
+    chunker = TokenChunker(word_offsets, chunk_tokens=25, overlap_tokens=4)
+
+    # Act
+    chunks = chunker.split_text(text)
+
+    # Assert
+    assert all(token_count <= 25 for _, token_count in chunks)
+    assert chunks[0][0].endswith(".")
+    assert chunks[-1][0].endswith("unbroken" * 5)
+    assert chunks[1][0].split()[0] in chunks[0][0]
+
+
+def test_markdown_parser_adds_the_token_count_with_a_tokenizer(tmp_path) -> None:
+    # Arrange
+    path = tmp_path / "doc.md"
+    path.write_text("---\ntitle: Title\nsummary: Summary\nuri: https://example.com\nauthors:\n  - author\n---\n"
+                    + "# Section\n\n" + "Some words in a sentence. " * 40 + "\n\n## Topic\n\nShort topic.\n",
+                    encoding="utf-8")
+    parser = MarkdownParser(tokenizer=word_offsets)
+
+    # Act
+    chunks = parser.parse(str(path), repository="org/repo", chunk_size=64)
+
+    # Assert
+    token_counts = [metadata["token_count"] for metadata in chunks["page_metadatas"]]
+    assert len(chunks["page_contents"]) == 9
+    assert all(count <= 64 for count in token_counts)
+    assert max(token_counts[:8]) - min(token_counts[:8]) <= 11
+    assert token_counts == [len(word_offsets(content)) for content in chunks["page_contents"]]
+    assert chunks["page_metadatas"][-1]["heading"] == {"Header 1": "Section", "Header 2": "Topic"}
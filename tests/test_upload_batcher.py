@@ -0,0 +1,63 @@
+from dataclasses import dataclass, field
+from src.document_importer.pipeline import FileTask
+from src.document_importer.upload_batcher import UploadBatcher
+
+
+@dataclass
+class FakeBulkUploadResult:
+    keys: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+class FakeSearchIndex:
+    def __init__(self, reject: str = None):
+        self.uploads: list[list[str]] = []
+        self.reject = reject
+
+    def build_documents(self, task: FileTask) -> list[dict]:
+        return [{"id": f"key-{content}", "content": content} for content in task.page_contents]
+
+    def bulk_index(self, documents: list[dict]) -> FakeBulkUploadResult:
+        self.uploads.append([document["content"] for document in documents])
+        keys = [document["id"] for document in documents]
+        failed = {document["id"]: "400: Invalid document" for document in documents
+                  if document["content"] == self.reject}
+        return FakeBulkUploadResult(keys=keys, failed=failed)
+
+
+def create_task(file_path: str, page_contents: list[str]) -> FileTask:
+    return FileTask(file_path, page_contents=page_contents, page_metadatas=[{} for _ in page_contents],
+                    vectors=[[1.0] for _ in page_contents])
+
+
+def test_upload_batcher_uploads_several_files_together() -> None:
+    # Arrange
+    index = FakeSearchIndex()
+    batcher = UploadBatcher(index.build_documents, index.bulk_index, batch_size=4)
+
+    # Act
+    finished = batcher.add(create_task("first.md", ["a", "b"]))
+    finished += batcher.add(create_task("second.md", ["c", "d"]))
+    finished += batcher.add(create_task("third.md", ["e"]))
+    finished += batcher.flush()
+
+    # Assert
+    assert index.uploads == [["a", "b", "c", "d"], ["e"]]
+    assert [(task.file_path, error) for task, error in finished] == [
+        ("first.md", None), ("second.md", None), ("third.md", None)
+    ]
+
+
+def test_upload_batcher_fails_only_files_with_rejected_documents() -> None:
+    # Arrange
+    index = FakeSearchIndex(reject="c")
+    batcher = UploadBatcher(index.build_documents, index.bulk_index, batch_size=100)
+    batcher.add(create_task("first.md", ["a", "b"]))
+    batcher.add(create_task("second.md", ["c", "d"]))
+
+    # Act
+    finished = batcher.flush()
+
+    # Assert
+    assert [(task.file_path, error is None) for task, error in finished] == [("first.md", True), ("second.md", False)]
+    assert "400: Invalid document" in str(finished[1][1])
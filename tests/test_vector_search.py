@@ -1,4 +1,8 @@
+import json
 import pytest
+from src.document_importer.bench import generate_corpus, run_benchmark
+from src.document_importer.fake_services import FakeEmbeddingService, FakeSearchService
+from src.document_importer.vector_search import VectorSearch
 # from  src.document_importer.vector_search import VectorSearch
 # from dotenv import load_dotenv, dotenv_values
 
@@ -11,4 +15,40 @@ import pytest
 #     assert vector_search is not None
 
 def test_empty_slap():
-    assert 1 == 1
\ No newline at end of file
+    assert 1 == 1
+
+def test_search_many_embeds_distinct_queries_once_and_keeps_the_query_order(tmp_path) -> None:
+    # Arrange
+    generate_corpus(str(tmp_path), 3, sections=2, paragraphs=2, words=20)
+    embedding_service = FakeEmbeddingService(dimensions=16, pool_size=4096)
+    search_service = FakeSearchService()
+
+    with embedding_service, search_service:
+        run_benchmark(str(tmp_path), embedding_service, search_service,
+                      settings={"EMBEDDING_CHECK_CONTEXT_LENGTH": "false"})
+        documents = list(search_service.documents["benchmark"].values())
+        vector_search = VectorSearch({
+            "AZURE_OPENAI_ENDPOINT": embedding_service.url, "AZURE_OPENAI_API_KEY": "test",
+            "AZURE_OPENAI_API_VERSION": "2024-02-01", "AZURE_DEPLOYMENT": "test", "EMBEDDING_DIMENSIONS": "16",
+            "EMBEDDING_CHECK_CONTEXT_LENGTH": "false", "VECTOR_STORE_ADDRESS": search_service.url,
+            "VECTOR_STORE_PASSWORD": "test", "INDEX_NAME": "benchmark",
+        })
+        queries = [documents[2]["content"], documents[0]["content"], documents[2]["content"]]
+        embedding_requests = embedding_service.requests
+
+        # Act
+        results = vector_search.search_many(queries, k=2)
+        first_requests = embedding_service.requests - embedding_requests
+        vector_search.search_many(queries, k=2)
+        second_requests = embedding_service.requests - embedding_requests - first_requests
+
+    # Assert
+    assert [result[0].metadata["id"] for result in results] == [documents[2]["id"], documents[0]["id"],
+                                                                documents[2]["id"]]
+    assert all(len(result) == 2 for result in results)
+    assert results[0][0].metadata["score"] > results[0][1].metadata["score"]
+    assert (results[0][0].metadata["source"], results[0][0].metadata["title"]) == (documents[2]["source"],
+                                                                                   documents[2]["title"])
+    assert "source" not in json.loads(documents[2]["metadata"])
+    assert first_requests == 1
+    assert second_requests == 0